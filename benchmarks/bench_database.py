@@ -0,0 +1,113 @@
+"""
+Write-path benchmark for DatabaseHandler.
+
+Compares the original connect-per-call pattern with the persistent WAL
+connection, both for single-statement writes and for the batch API.
+
+Run from the repository root:
+    python -m benchmarks.bench_database --trades 5000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks import offline
+offline.install()  # config imports MetaTrader5; these benchmarks need no terminal
+
+from database import DatabaseHandler
+
+
+def make_trade(i):
+    return {
+        'ticket': 10_000_000 + i,
+        'symbol': "EURUSD",
+        'strategy': 'Ensemble',
+        'direction': "BUY" if i % 2 else "SELL",
+        'entry_time': datetime.now(),
+        'entry_price': 1.0850 + (i % 100) * 1e-5,
+        'sl': 1.0800,
+        'tp': 1.0950,
+        'volume': 0.1,
+        'confidence': 0.55,
+        'regime': 'Dynamic',
+        'status': 'OPEN',
+        'metrics': {'z_score': -2.6, 'rsi': 28.0, 'sentiment': 0.0, 'atr': 0.0012}
+    }
+
+
+def legacy_log_trade(db_path, trade_data):
+    """The pre-WAL implementation: open, check, insert, commit, close on every call"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT id FROM trades WHERE ticket = ?', (trade_data.get('ticket'),))
+    if cursor.fetchone() is None:
+        cursor.execute('''
+        INSERT INTO trades (
+            ticket, symbol, strategy, direction, entry_time,
+            entry_price, sl, tp, volume, confidence, regime, status, metrics
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            trade_data['ticket'], trade_data['symbol'], trade_data['strategy'],
+            trade_data['direction'], trade_data['entry_time'], trade_data['entry_price'],
+            trade_data['sl'], trade_data['tp'], trade_data['volume'],
+            trade_data['confidence'], trade_data['regime'], 'OPEN',
+            str(trade_data['metrics'])
+        ))
+    conn.commit()
+    conn.close()
+
+
+def timed_writes(write, trades):
+    latencies = np.empty(len(trades))
+    start = time.perf_counter()
+    for i, trade in enumerate(trades):
+        t0 = time.perf_counter()
+        write(trade)
+        latencies[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - start
+    return len(trades) / elapsed, np.percentile(latencies, 99) * 1000
+
+
+def report(label, rate, p99_ms):
+    p99 = f"{p99_ms:8.3f} ms" if p99_ms is not None else "     n/a   "
+    print(f"{label:<34} {rate:>12,.0f} inserts/s   p99 {p99}")
+
+
+def run(n_trades, batch_size):
+    trades = [make_trade(i) for i in range(n_trades)]
+    with tempfile.TemporaryDirectory() as tmp:
+        # Legacy: schema created by the handler, then written with a fresh connection per call
+        legacy_path = os.path.join(tmp, "legacy.db")
+        DatabaseHandler(legacy_path).close()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        rate, p99 = timed_writes(lambda t: legacy_log_trade(legacy_path, t), trades)
+        report("connect-per-call (legacy)", rate, p99)
+
+        db = DatabaseHandler(os.path.join(tmp, "wal.db"))
+        rate, p99 = timed_writes(db.log_trade, trades)
+        report("persistent WAL, log_trade", rate, p99)
+        db.close()
+
+        db = DatabaseHandler(os.path.join(tmp, "batch.db"))
+        batches = [trades[i:i + batch_size] for i in range(0, n_trades, batch_size)]
+        start = time.perf_counter()
+        for batch in batches:
+            db.log_trades(batch)
+        elapsed = time.perf_counter() - start
+        report(f"persistent WAL, log_trades({batch_size})", n_trades / elapsed, None)
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DatabaseHandler write benchmark")
+    parser.add_argument("--trades", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    run(args.trades, args.batch_size)
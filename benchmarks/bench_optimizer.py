@@ -0,0 +1,43 @@
+"""
+Solve time of the strategy weight optimizer.
+
+Run from the repository root:
+    python -m benchmarks.bench_optimizer --strategies 40 --days 1500
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import offline
+offline.install()  # config imports MetaTrader5; these benchmarks need no terminal
+
+from risk.optimizer import WeightOptimizer
+
+
+def run(n_strategies, n_days, repeats):
+    rng = np.random.default_rng(11)
+    factors = rng.normal(size=(n_days, 3))
+    loadings = rng.normal(size=(3, n_strategies)) * 0.002
+    data = factors @ loadings + rng.normal(size=(n_days, n_strategies)) * 0.004 + 0.0002
+    returns = pd.DataFrame(data, columns=[f"strategy_{i}" for i in range(n_strategies)])
+
+    for method in ("risk_parity", "mean_variance"):
+        optimizer = WeightOptimizer(None, None, method=method)
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            optimizer.solve(returns)
+            timings.append(time.perf_counter() - t0)
+        print(f"{method:<14} {n_strategies} strategies x {n_days} days: "
+              f"median {np.median(timings) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Weight optimizer solve time")
+    parser.add_argument("--strategies", type=int, default=40)
+    parser.add_argument("--days", type=int, default=1500)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    run(args.strategies, args.days, args.repeats)
@@ -0,0 +1,143 @@
+"""
+Read-path benchmark for the trades table on a large synthetic history.
+
+Builds a schema-v1 database (no indexes, DATE() filters), times the original
+queries, migrates it through DatabaseHandler and times the same lookups again.
+Query plans are printed for both so a regression to a full scan is obvious.
+
+Run from the repository root:
+    python -m benchmarks.bench_queries --trades 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks import offline
+offline.install()  # config imports MetaTrader5; these benchmarks need no terminal
+
+from database import DatabaseHandler, MIGRATIONS
+
+STRATEGIES = ['statistical_arbitrage', 'momentum_breakout', 'volatility_regime', 'ml_ensemble', 'fundamental']
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "NZDUSD", "USDCAD"]
+
+LEGACY_QUERIES = {
+    'ticket lookup': ("SELECT id FROM trades WHERE ticket = ?", lambda n: (n // 2,)),
+    'today risk': ("SELECT SUM(pnl_net) FROM trades WHERE DATE(exit_time) = ? AND pnl_net < 0",
+                   lambda n: (datetime(2026, 1, 1).date(),)),
+    'strategy performance': ("SELECT strategy, pnl_net FROM trades WHERE status = 'CLOSED' "
+                             "ORDER BY exit_time DESC LIMIT ?", lambda n: (50,)),
+}
+
+INDEXED_QUERIES = {
+    'ticket lookup': ("SELECT id FROM trades WHERE ticket = ?", lambda n: (n // 2,)),
+    'today risk': ("SELECT SUM(pnl_net) FROM trades WHERE exit_date = ? AND pnl_net < 0",
+                   lambda n: ('2026-01-01',)),
+    'strategy performance': LEGACY_QUERIES['strategy performance'],
+}
+
+
+def build_legacy_db(path, n_trades, seed=7):
+    """Create a v1 database (base schema only) and fill it with n_trades closed trades"""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    MIGRATIONS[0][2](cursor)
+    cursor.execute("PRAGMA user_version = 1")
+
+    rng = np.random.default_rng(seed)
+    start = datetime(2020, 1, 1)
+    chunk = 100_000
+    for offset in range(0, n_trades, chunk):
+        size = min(chunk, n_trades - offset)
+        minutes = np.sort(rng.integers(0, 60 * 24 * 365 * 6, size)) + offset
+        pnl = rng.normal(5.0, 60.0, size)
+        strategy_idx = rng.integers(0, len(STRATEGIES), size)
+        symbol_idx = rng.integers(0, len(SYMBOLS), size)
+        rows = []
+        for i in range(size):
+            entry = start + timedelta(minutes=int(minutes[i]))
+            exit_ = entry + timedelta(hours=4)
+            rows.append((
+                offset + i, SYMBOLS[symbol_idx[i]], STRATEGIES[strategy_idx[i]], 'BUY',
+                entry.isoformat(' '), exit_.isoformat(' '), 1.1, 1.1, 0.1,
+                float(pnl[i]), float(pnl[i]), 0.5, 'Dynamic', 'CLOSED', '{}'
+            ))
+        cursor.executemany('''
+        INSERT INTO trades (ticket, symbol, strategy, direction, entry_time, exit_time,
+                            entry_price, exit_price, volume, profit, pnl_net, confidence,
+                            regime, status, metrics)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    conn.commit()
+    conn.close()
+
+
+def time_queries(conn, queries, n_trades, repeats):
+    results = {}
+    for label, (sql, params) in queries.items():
+        args = params(n_trades)
+        plan = " | ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, args))
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            conn.execute(sql, args).fetchall()
+            timings.append(time.perf_counter() - t0)
+        results[label] = (np.median(timings) * 1000, plan)
+    return results
+
+
+def print_results(title, results):
+    print(f"\n{title}")
+    for label, (ms, plan) in results.items():
+        print(f"  {label:<22} {ms:>10.3f} ms   {plan}")
+
+
+def run(n_trades, repeats):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trades.db")
+        t0 = time.perf_counter()
+        build_legacy_db(path, n_trades)
+        print(f"Built {n_trades:,} trades in {time.perf_counter() - t0:.1f}s")
+
+        conn = sqlite3.connect(path)
+        print_results("Schema v1 (no indexes)", time_queries(conn, LEGACY_QUERIES, n_trades, repeats))
+        conn.close()
+
+        t0 = time.perf_counter()
+        db = DatabaseHandler(path)
+        print(f"\nMigration took {time.perf_counter() - t0:.1f}s")
+        with db._lock:
+            results = time_queries(db._conn, INDEXED_QUERIES, n_trades, repeats)
+        print_results(f"Schema v{MIGRATIONS[-1][0]} (indexed)", results)
+
+        # Handler-level calls, including the upsert path
+        timings = {}
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            db.get_today_risk()
+        timings['get_today_risk'] = (time.perf_counter() - t0) / repeats
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            db.get_strategy_performance()
+        timings['get_strategy_performance'] = (time.perf_counter() - t0) / repeats
+        t0 = time.perf_counter()
+        for i in range(repeats):
+            db.log_trade({'ticket': n_trades // 3 + i, 'status': 'CLOSED',
+                          'exit_time': datetime.now(), 'pnl_net': 1.0})
+        timings['log_trade (upsert)'] = (time.perf_counter() - t0) / repeats
+        print("\nDatabaseHandler calls")
+        for label, seconds in timings.items():
+            print(f"  {label:<26} {seconds * 1000:>10.3f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="trades table query benchmark")
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    run(args.trades, args.repeats)
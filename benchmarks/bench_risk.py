@@ -0,0 +1,65 @@
+"""
+Latency of the portfolio VaR/ES gate on the order path.
+
+Seeds a RollingCorrelation engine with synthetic correlated returns and
+times PortfolioRiskGate.adjust() for a book of open positions.
+
+Run from the repository root:
+    python -m benchmarks.bench_risk --symbols 50 --positions 50
+"""
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from benchmarks import offline
+offline.install()  # config imports MetaTrader5; these benchmarks need no terminal
+
+from risk.correlation import RollingCorrelation
+from risk.var import PortfolioRiskGate
+from utils.position_book import BookPosition
+
+SymbolSpec = namedtuple('SymbolSpec', ['trade_tick_value', 'trade_tick_size', 'volume_step', 'volume_min'])
+
+
+class StaticSpecs:
+    """Contract specs for the synthetic symbols (stands in for BrokerStateCache.symbol_info)"""
+    def symbol_info(self, symbol):
+        return SymbolSpec(1.0, 0.00001, 0.01, 0.01)
+
+
+def run(n_symbols, n_positions, repeats, seed=3):
+    rng = np.random.default_rng(seed)
+    symbols = [f"S{i:03d}USD" for i in range(n_symbols)]
+    engine = RollingCorrelation(symbols, window=100)
+    loadings = rng.normal(size=(n_symbols, 4))
+    factors = rng.normal(size=(101, 4))
+    returns = (factors @ loadings.T + rng.normal(size=(101, n_symbols))) * 0.001
+    engine.seed(list(range(101)), np.exp(np.cumsum(returns, axis=0)))
+
+    gate = PortfolioRiskGate(engine, StaticSpecs(), limit=0.05)
+    positions = [
+        BookPosition(i, symbols[i % n_symbols], int(rng.integers(0, 2)), 0.1, 123456, 1.0)
+        for i in range(n_positions)
+    ]
+
+    timings = np.empty(repeats)
+    for k in range(repeats):
+        t0 = time.perf_counter()
+        lots, report = gate.adjust(symbols[k % n_symbols], "BUY", 1.0, positions, 100_000.0)
+        timings[k] = time.perf_counter() - t0
+
+    print(f"{n_symbols} symbols, {n_positions} positions, {repeats} checks")
+    print(f"  median {np.median(timings) * 1e6:8.1f} us   p99 {np.percentile(timings, 99) * 1e6:8.1f} us")
+    print(f"  last check: lots={lots} VaR(param)={report['after']['var_param']:.2f} "
+          f"VaR(hist)={report['after']['var_hist']:.2f} limit={report['limit']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Portfolio risk gate latency")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--positions", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.symbols, args.positions, args.repeats)
@@ -0,0 +1,358 @@
+"""
+Reproducible benchmark suite for the bot's hot paths, run offline.
+
+Everything runs against benchmarks.offline (recorded bars, no terminal):
+- features: MarketDataHandler.get_data at several lookbacks
+- strategies: each strategy's generate_signal
+- ml: MLEnsembleStrategy.train_model and predict
+- sentiment: SentimentEngine.analyze per headline vs analyze_batch
+  (skipped when transformers / FinBERT are unavailable)
+- database: DatabaseHandler writes and reads at 10k .. 1M trades
+- cycle: TradingBot.run_cycle for 6 / 30 / 100 symbols
+- replay: replay.harness throughput over the recorded symbols, as ms per bar
+  (spawned processes, like python -m replay)
+
+Results are written as JSON (one file per run, named after the commit) so
+two runs can be compared:
+    python -m benchmarks.bench_suite
+    python -m benchmarks.bench_suite --groups features,strategies --repeats 50
+    python -m benchmarks.bench_suite --compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks import offline
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+GROUPS = ('features', 'strategies', 'ml', 'sentiment', 'database', 'cycle', 'replay')
+REPLAY_WARMUP = 1000
+REPLAY_BARS = 600
+
+HEADLINES = [
+    "European Central Bank raises interest rates by 0.5% to fight inflation.",
+    "Eurozone economy shrinks, fears of recession grow.",
+    "Markets remain quiet ahead of the holiday season.",
+    "Fed signals patience as US inflation cools faster than expected.",
+    "Dollar slides after weaker Non-Farm Payrolls report.",
+    "Bank of Japan keeps ultra-loose policy, Yen weakens.",
+    "UK GDP beats forecasts, Sterling rallies.",
+    "Oil spike lifts commodity currencies; AUD and CAD gain.",
+]
+
+
+class StaticNews:
+    """Neutral news source for the fundamental strategy (no network, no models)"""
+    def get_market_sentiment(self, symbol="EURUSD"):
+        return 0.0, True
+
+
+def measure(func, repeats, warmup=1, setup=None):
+    """Time func() `repeats` times after `warmup` untimed calls. setup() runs untimed before each call."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        timings[i] = time.perf_counter() - t0
+    return {
+        'n': repeats,
+        'median_ms': float(np.median(timings) * 1000),
+        'p95_ms': float(np.percentile(timings, 95) * 1000),
+        'min_ms': float(timings.min() * 1000),
+        'mean_ms': float(timings.mean() * 1000),
+    }
+
+
+# === Groups ===
+
+def bench_features(terminal, repeats):
+    from utils.data_handler import MarketDataHandler
+    handler = MarketDataHandler()
+    available = terminal.cursor + 1
+    results = {}
+    for lookback in (1000, 5000, 20000):
+        if lookback > available:
+            print(f"  features: only {available} bars, skipping lookback={lookback}")
+            continue
+        # The offline cursor never moves, so without clearing every call would be a memo hit
+        results[f'features.get_data[lookback={lookback}]'] = measure(
+            lambda: handler.get_data("EURUSD", lookback=lookback), repeats, setup=handler.clear
+        )
+    return results
+
+
+def _strategies(model_path):
+    from strategies.arbitrage import StatisticalArbitrageStrategy
+    from strategies.momentum import MomentumBreakoutStrategy
+    from strategies.volatility import VolatilityRegimeStrategy
+    from strategies.ml_ensemble import MLEnsembleStrategy
+    from strategies.fundamental import FundamentalStrategy
+    return {
+        'statistical_arbitrage': StatisticalArbitrageStrategy(),
+        'momentum_breakout': MomentumBreakoutStrategy(),
+        'volatility_regime': VolatilityRegimeStrategy(),
+        'ml_ensemble': MLEnsembleStrategy(model_path=model_path),
+        'fundamental': FundamentalStrategy(StaticNews()),
+    }
+
+
+def bench_strategies(terminal, repeats, tmp):
+    from utils.data_handler import MarketDataHandler
+    df = MarketDataHandler().get_data("EURUSD")
+    strategies = _strategies(os.path.join(tmp, "strategies_rf.pkl"))
+    strategies['ml_ensemble'].train_model(df)
+    return {
+        f'strategy.{name}.generate_signal': measure(lambda s=strategy: s.generate_signal(df, symbol="EURUSD"), repeats)
+        for name, strategy in strategies.items()
+    }
+
+
+def bench_ml(terminal, repeats, tmp):
+    from utils.data_handler import MarketDataHandler
+    from strategies.ml_ensemble import MLEnsembleStrategy
+    df = MarketDataHandler().get_data("EURUSD", lookback=min(5000, terminal.cursor + 1))
+    ml = MLEnsembleStrategy(model_path=os.path.join(tmp, "ml_rf.pkl"))
+    return {
+        'ml.train_model': measure(lambda: ml.train_model(df), max(1, repeats // 10), warmup=0),
+        'ml.predict': measure(lambda: ml.generate_signal(df, symbol="EURUSD"), repeats),
+    }
+
+
+def bench_sentiment(terminal, repeats):
+    try:
+        from utils.sentiment_engine import SentimentEngine
+        engine = SentimentEngine()
+    except Exception as e:
+        print(f"  sentiment: skipped ({e})")
+        return {}
+    per_headline = measure(lambda: [engine.analyze(h) for h in HEADLINES], repeats)
+    batched = measure(lambda: engine.analyze_batch(HEADLINES), repeats)
+    return {
+        f'sentiment.analyze[x{len(HEADLINES)}]': per_headline,
+        f'sentiment.analyze_batch[x{len(HEADLINES)}]': batched,
+    }
+
+
+def _trade_rows(start, n, rng):
+    symbols = offline.DEFAULT_SYMBOLS
+    base = datetime(2020, 1, 1)
+    pnl = rng.normal(5.0, 60.0, n)
+    for i in range(n):
+        entry = base + timedelta(minutes=(start + i) * 7)
+        yield {
+            'ticket': start + i + 1, 'position_id': start + i + 1,
+            'symbol': symbols[(start + i) % len(symbols)], 'strategy': 'Ensemble',
+            'direction': "BUY" if i % 2 else "SELL", 'entry_time': entry,
+            'entry_price': 1.1, 'sl': 1.09, 'tp': 1.12, 'volume': 0.1, 'confidence': 0.5,
+            'regime': 'Dynamic', 'status': 'CLOSED', 'exit_time': entry + timedelta(hours=4),
+            'exit_price': 1.101, 'profit': float(pnl[i]), 'commission': 0.0, 'swap': 0.0,
+            'pnl_net': float(pnl[i]),
+            'metrics': {'z_score': 0.1, 'rsi': 50.0, 'atr': 0.001, 'sentiment': 0.0},
+        }
+
+
+def bench_database(terminal, repeats, tmp, sizes):
+    from database import DatabaseHandler
+    results = {}
+    rng = np.random.default_rng(5)
+    for size in sizes:
+        db = DatabaseHandler(os.path.join(tmp, f"bench_{size}.db"))
+        chunk = 10_000
+        t0 = time.perf_counter()
+        for offset in range(0, size, chunk):
+            db.write_batch(trades=list(_trade_rows(offset, min(chunk, size - offset), rng)))
+        elapsed = time.perf_counter() - t0
+        results[f'database.write_batch[{size}]'] = {
+            'n': size, 'total_s': elapsed, 'rows_per_s': size / elapsed,
+        }
+        day = datetime(2020, 1, 1) + timedelta(minutes=size * 7 // 2)
+        reads = {
+            'sync_state': lambda: db.get_sync_state('missing'),
+            'today_risk': db.get_today_risk,
+            'day_trade_counts': lambda: db.get_day_trade_counts(day.date()),
+            'strategy_performance': db.get_strategy_performance,
+            'strategy_daily_returns': lambda: db.get_strategy_daily_returns(day.date()),
+            'export_trades': lambda: db.export_trades(columns=['pnl_net', 'sl', 'entry_price']),
+        }
+        for name, read in reads.items():
+            results[f'database.{name}[{size}]'] = measure(read, repeats if name != 'export_trades' else max(3, repeats // 10))
+        db.close()
+    return results
+
+
+def bench_cycle(terminal, repeats, tmp, universe):
+    import config
+    import main
+    results = {}
+    base_rates = dict(terminal.rates)
+    for n_symbols in universe:
+        terminal.rates = offline.clone_symbols(base_rates, n_symbols)
+        terminal._specs.clear()
+        terminal._resampled.clear()
+        terminal.reset()
+        config.SYMBOLS = list(terminal.rates)
+        main.NewsHandler = StaticNews
+        bot = main.TradingBot()
+        bot.strategies['ml_ensemble'].model_path = os.path.join(tmp, "cycle_rf.pkl")
+
+        def setup():
+            # Start every cycle flat so each one evaluates every symbol, and cold: the bars
+            # never change offline, so memoized features and votes would all be hits
+            terminal.reset()
+            bot.positions.refresh()
+            bot.data_handler.clear()
+            bot.signal_cache.clear()
+
+        results[f'cycle.run_cycle[{n_symbols} symbols]'] = measure(bot.run_cycle, repeats, warmup=1, setup=setup)
+        bot.orders.close()
+        bot.journal.close()
+        bot.db.close()
+    terminal.rates = base_rates
+    return results
+
+
+def bench_replay(repeats, tmp, data_path):
+    from replay.harness import run_many
+    runs = run_many([{'name': f"bench{i}", 'params': {}} for i in range(repeats)], workers=1,
+                    data=data_path, bars=REPLAY_WARMUP + REPLAY_BARS, warmup=REPLAY_WARMUP,
+                    out_dir=os.path.join(tmp, "replay"))
+    failed = [run['error'] for run in runs if 'error' in run]
+    if failed:
+        print(f"  replay: failed ({failed[0]})")
+        return {}
+    per_bar = np.array([run['seconds'] / run['bars'] for run in runs])
+    return {
+        f"replay.bar[{runs[0]['symbols']} symbols]": {
+            'n': len(runs),
+            'median_ms': float(np.median(per_bar) * 1000),
+            'min_ms': float(per_bar.min() * 1000),
+            'bars_per_second': float(1 / np.median(per_bar)),
+        }
+    }
+
+
+# === Results ===
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save(results, source, out_dir=RESULTS_DIR):
+    commit = git_commit()
+    payload = {
+        'meta': {
+            'commit': commit,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'data': source,
+        },
+        'results': results,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
+
+
+def compare(old_path, new_path, threshold=1.10):
+    """Print new/old ratios of median time per case; flags cases slower by more than threshold"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    if old['meta'].get('data') != new['meta'].get('data'):
+        print(f"WARNING: different data ({old['meta'].get('data')} vs {new['meta'].get('data')})")
+    print(f"{'case':<52} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    regressions = 0
+    for case in sorted(set(old['results']) & set(new['results'])):
+        key = 'median_ms' if 'median_ms' in new['results'][case] else 'total_s'
+        a, b = old['results'][case].get(key), new['results'][case].get(key)
+        if not a or b is None:
+            continue
+        ratio = b / a
+        flag = "  SLOWER" if ratio > threshold else ""
+        regressions += ratio > threshold
+        print(f"{case:<52} {a:>10.3f} {b:>10.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def run(groups, repeats, db_sizes, universe, bars, data_path):
+    rates, source = offline.load(data_path, count=bars)
+    terminal = offline.install(rates)
+    print(f"[Bench] Data: {source}, {len(rates)} symbols x {terminal.cursor + 1} bars")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before any bot module is imported: DatabaseHandler binds DB_PATH as a default argument
+        import config
+        config.DB_PATH = os.path.join(tmp, "bench.db")
+        for group in groups:
+            print(f"[Bench] {group}...")
+            t0 = time.perf_counter()
+            if group == 'features':
+                results.update(bench_features(terminal, repeats))
+            elif group == 'strategies':
+                results.update(bench_strategies(terminal, repeats, tmp))
+            elif group == 'ml':
+                results.update(bench_ml(terminal, repeats, tmp))
+            elif group == 'sentiment':
+                results.update(bench_sentiment(terminal, repeats))
+            elif group == 'database':
+                results.update(bench_database(terminal, repeats, tmp, db_sizes))
+            elif group == 'cycle':
+                results.update(bench_cycle(terminal, max(1, repeats // 5), tmp, universe))
+            elif group == 'replay':
+                results.update(bench_replay(max(1, repeats // 10), tmp, data_path))
+            print(f"[Bench] {group} done in {time.perf_counter() - t0:.1f}s")
+
+    for case, stats in results.items():
+        value = f"{stats['median_ms']:10.3f} ms" if 'median_ms' in stats else f"{stats['rows_per_s']:10,.0f} rows/s"
+        print(f"  {case:<52} {value}")
+    return results, source
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--groups", default=",".join(GROUPS), help=f"Subset of {','.join(GROUPS)}")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--db-sizes", default="10000,100000,1000000")
+    parser.add_argument("--symbols", default="6,30,100", help="Universe sizes for the cycle group")
+    parser.add_argument("--bars", type=int, default=25_000)
+    parser.add_argument("--data", default=offline.DEFAULT_PATH)
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    results, source = run(
+        [g for g in args.groups.split(",") if g],
+        args.repeats,
+        [int(n) for n in args.db_sizes.split(",")],
+        [int(n) for n in args.symbols.split(",")],
+        args.bars,
+        args.data,
+    )
+    print(f"[Bench] Results written to {save(results, source, args.out)}")
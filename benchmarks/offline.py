@@ -0,0 +1,396 @@
+"""
+Offline stand-in for the MetaTrader5 terminal, serving recorded bars.
+
+Benchmarks need the bot's real code paths without a live terminal, and they
+must never send an order to one. install() puts an OfflineTerminal into
+sys.modules['MetaTrader5'] so every later `import MetaTrader5 as mt5` gets it.
+Call it before importing any bot module.
+
+Bars come from a recording made against a live terminal:
+    python -m benchmarks.offline --record --bars 25000
+If there is no recording, deterministic synthetic bars are generated, so the
+suite still runs. Results then aren't comparable with runs on recorded data.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "rates.npz")
+DEFAULT_SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD", "NZDUSD"]
+
+# Same layout as the structured array copy_rates_from_pos returns
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+TIMEFRAME_SECONDS = {1: 60, 5: 300, 15: 900, 30: 1800, 16385: 3600, 16388: 14400, 16408: 86400}
+
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'digits', 'point', 'spread', 'filling_mode', 'trade_contract_size',
+    'trade_tick_size', 'trade_tick_value', 'volume_min', 'volume_max', 'volume_step',
+    'swap_long', 'swap_short', 'currency_base', 'currency_profit',
+])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc'])
+AccountInfo = namedtuple('AccountInfo', ['login', 'balance', 'equity', 'profit', 'margin',
+                                         'margin_free', 'leverage', 'currency'])
+TradePosition = namedtuple('TradePosition', ['ticket', 'time', 'type', 'magic', 'identifier',
+                                             'volume', 'price_open', 'sl', 'tp', 'price_current',
+                                             'swap', 'profit', 'symbol', 'comment'])
+TradeDeal = namedtuple('TradeDeal', ['ticket', 'order', 'time', 'type', 'entry', 'magic',
+                                     'position_id', 'volume', 'price', 'commission', 'swap',
+                                     'profit', 'symbol', 'comment'])
+OrderCheckResult = namedtuple('OrderCheckResult', ['retcode', 'balance', 'equity', 'margin',
+                                                   'margin_free', 'comment', 'request'])
+OrderSendResult = namedtuple('OrderSendResult', ['retcode', 'deal', 'order', 'volume', 'price',
+                                                 'bid', 'ask', 'comment', 'request'])
+
+
+# === Recorded data ===
+
+def record(symbols, count, path=DEFAULT_PATH, timeframe=None):
+    """Copy the last `count` bars of each symbol from a live terminal into an .npz file"""
+    import MetaTrader5 as mt5
+    import config
+    if not mt5.initialize():
+        raise RuntimeError(f"MT5 Init Failed: {mt5.last_error()}")
+    timeframe = timeframe or config.TIMEFRAME
+    rates = {}
+    for symbol in symbols:
+        data = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+        if data is None:
+            print(f"[Offline] No bars for {symbol}: {mt5.last_error()}")
+            continue
+        rates[symbol] = np.asarray(data, dtype=RATES_DTYPE)
+    mt5.shutdown()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **rates)
+    print(f"[Offline] Recorded {len(rates)} symbols x {count} bars to {path}")
+    return rates
+
+
+def synthetic(symbols, count, seed=0, start=1_600_000_000, step=3600):
+    """Deterministic H1-like bars: correlated log-normal closes with plausible ranges and spreads"""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(count, 2)) * 0.0008
+    rates = {}
+    for i, symbol in enumerate(symbols):
+        local = np.random.default_rng(seed + 1 + i)
+        loading = local.uniform(-1, 1, size=2)
+        returns = factors @ loading + local.normal(size=count) * 0.0012
+        level = 150.0 if symbol[3:6] == "JPY" else local.uniform(0.6, 1.4)
+        close = level * np.exp(np.cumsum(returns))
+        open_ = np.concatenate(([level], close[:-1]))
+        wick = np.abs(local.normal(size=(2, count))) * 0.0006 * close
+        bars = np.zeros(count, dtype=RATES_DTYPE)
+        bars['time'] = start + np.arange(count) * step
+        bars['open'] = open_
+        bars['close'] = close
+        bars['high'] = np.maximum(open_, close) + wick[0]
+        bars['low'] = np.minimum(open_, close) - wick[1]
+        bars['tick_volume'] = local.integers(200, 5000, size=count)
+        bars['spread'] = local.integers(5, 20, size=count)
+        rates[symbol] = bars
+    return rates
+
+
+def load(path=DEFAULT_PATH, symbols=None, count=None, seed=0):
+    """
+    Recorded bars if the file exists, else synthetic ones.
+    Returns: (rates {symbol: structured array}, source description)
+    """
+    symbols = symbols or DEFAULT_SYMBOLS
+    if os.path.exists(path):
+        with np.load(path) as data:
+            rates = {symbol: data[symbol] for symbol in data.files}
+        missing = [s for s in symbols if s not in rates]
+        if not missing:
+            if count:
+                rates = {s: bars[-count:] for s, bars in rates.items()}
+            return rates, f"recorded:{os.path.basename(path)}"
+        print(f"[Offline] {path} lacks {missing}; using synthetic bars")
+    return synthetic(symbols, count or 25_000, seed), f"synthetic:seed={seed}"
+
+
+def clone_symbols(rates, n, seed=0):
+    """
+    Scale the universe to n symbols. Extra symbols copy a recorded one under a
+    broker-style suffix (EURUSD.c07), shifted in time so they aren't identical.
+    """
+    names = list(rates)
+    result = dict(rates)
+    rng = np.random.default_rng(seed)
+    i = 0
+    while len(result) < n:
+        base = names[i % len(names)]
+        bars = rates[base].copy()
+        shift = int(rng.integers(1, len(bars) // 4))
+        for field in ('open', 'high', 'low', 'close'):
+            bars[field] = np.roll(bars[field], shift)
+        result[f"{base}.c{i:02d}"] = bars
+        i += 1
+    return {name: result[name] for name in list(result)[:n]}
+
+
+# === Terminal ===
+
+class OfflineTerminal:
+    """
+    The subset of the MetaTrader5 API the bot uses, backed by in-memory bars.
+
+    The "current" bar is at index `cursor` (default: the last bar). Market
+    orders fill immediately at bid/ask and open a position. Nothing else
+    happens to positions here: stops, swaps and time all stand still.
+    """
+    TIMEFRAME_M1, TIMEFRAME_M5, TIMEFRAME_M15, TIMEFRAME_M30 = 1, 5, 15, 30
+    TIMEFRAME_H1, TIMEFRAME_H4, TIMEFRAME_D1 = 16385, 16388, 16408
+    ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+    POSITION_TYPE_BUY, POSITION_TYPE_SELL = 0, 1
+    DEAL_TYPE_BUY, DEAL_TYPE_SELL = 0, 1
+    DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT, DEAL_ENTRY_OUT_BY = 0, 1, 2, 3
+    ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN = 0, 1, 2
+    ORDER_TIME_GTC = 0
+    TRADE_ACTION_DEAL = 1
+    TRADE_RETCODE_REQUOTE = 10004
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID_VOLUME = 10014
+    TRADE_RETCODE_MARKET_CLOSED = 10018
+    TRADE_RETCODE_NO_MONEY = 10019
+    TRADE_RETCODE_PRICE_CHANGED = 10020
+    TRADE_RETCODE_PRICE_OFF = 10021
+
+    def __init__(self, rates, balance=100_000.0, currency="USD", timeframe=16385):
+        self.rates = rates
+        self.timeframe = timeframe
+        self.currency = currency
+        self.balance = balance
+        self.cursor = min(len(bars) for bars in rates.values()) - 1
+        self._resampled = {}
+        self._specs = {}
+        self._error = (1, "Success")
+        self.positions = {}
+        self.deals = []
+        self._next_ticket = 1
+
+    # === Session ===
+
+    def initialize(self, *args, **kwargs):
+        return True
+
+    def shutdown(self):
+        return True
+
+    def last_error(self):
+        return self._error
+
+    def symbol_select(self, symbol, enable=True):
+        return symbol in self.rates
+
+    # === Market data ===
+
+    def now(self):
+        """Server time: the close of the current bar"""
+        return int(self.rates[next(iter(self.rates))]['time'][self.cursor]) + TIMEFRAME_SECONDS[self.timeframe]
+
+    def _index(self, symbol):
+        """Index of the current bar in `symbol`'s array"""
+        return self.cursor
+
+    def _bars(self, symbol, timeframe):
+        bars = self.rates.get(symbol)
+        if bars is None or timeframe == self.timeframe:
+            return bars
+        key = (symbol, timeframe)
+        if key not in self._resampled:
+            self._resampled[key] = self._resample(bars, TIMEFRAME_SECONDS[timeframe])
+        return self._resampled[key]
+
+    @staticmethod
+    def _resample(bars, seconds):
+        buckets = bars['time'] // seconds
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        ends = np.append(starts[1:], len(bars))
+        out = np.zeros(len(starts), dtype=RATES_DTYPE)
+        out['time'] = buckets[starts] * seconds
+        out['open'] = bars['open'][starts]
+        out['close'] = bars['close'][ends - 1]
+        out['high'] = np.maximum.reduceat(bars['high'], starts)
+        out['low'] = np.minimum.reduceat(bars['low'], starts)
+        out['tick_volume'] = np.add.reduceat(bars['tick_volume'], starts)
+        out['spread'] = bars['spread'][starts]
+        return out
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        bars = self._bars(symbol, timeframe)
+        if bars is None:
+            self._error = (-1, f"unknown symbol {symbol}")
+            return None
+        index = self._index(symbol)
+        if timeframe != self.timeframe:
+            # Completed higher-timeframe bars, plus the forming one built only
+            # from base bars up to now (no look-ahead into the rest of the bucket)
+            base = self.rates[symbol]
+            seconds = TIMEFRAME_SECONDS[timeframe]
+            bucket = int(base['time'][index]) // seconds * seconds
+            complete = bars[:np.searchsorted(bars['time'], bucket, side='left')]
+            forming = self._resample(base[np.searchsorted(base['time'], bucket):index + 1], seconds)
+            bars = np.concatenate((complete, forming))
+            index = len(bars) - 1
+        end = index + 1 - start_pos
+        if end <= 0:
+            return None
+        return bars[max(0, end - count):end]
+
+    def symbol_info(self, symbol):
+        if symbol not in self.rates:
+            return None
+        info = self._specs.get(symbol)
+        if info is None:
+            base, quote = symbol[:3], symbol[3:6]
+            point = 0.001 if quote == "JPY" else 0.00001
+            info = SymbolInfo(
+                name=symbol, digits=3 if quote == "JPY" else 5, point=point, spread=10,
+                filling_mode=1, trade_contract_size=100_000.0, trade_tick_size=point,
+                trade_tick_value=self._tick_value(symbol, point), volume_min=0.01,
+                volume_max=100.0, volume_step=0.01, swap_long=-5.0, swap_short=1.0,
+                currency_base=base, currency_profit=quote,
+            )
+            self._specs[symbol] = info
+        return info
+
+    def _tick_value(self, symbol, point):
+        """Account-currency value of one point on one lot (fixed at the latest close)"""
+        quote = symbol[3:6]
+        value = 100_000.0 * point
+        if quote == self.currency:
+            return value
+        if symbol[:3] == self.currency:
+            return value / float(self.rates[symbol]['close'][self._index(symbol)])
+        return value
+
+    def symbol_info_tick(self, symbol):
+        bars = self.rates.get(symbol)
+        if bars is None:
+            return None
+        bar = bars[self._index(symbol)]
+        bid = float(bar['close'])
+        ask = bid + self._spread(bar) * self.symbol_info(symbol).point
+        now = self.now()
+        return Tick(now, bid, ask, bid, int(bar['tick_volume']), now * 1000)
+
+    def _spread(self, bar):
+        """Spread in points for a bar"""
+        return int(bar['spread'])
+
+    # === Account and orders ===
+
+    def account_info(self):
+        profit = sum(self._floating(pos) for pos in self.positions.values())
+        equity = self.balance + profit
+        return AccountInfo(1, self.balance, equity, profit, 0.0, equity, 100, self.currency)
+
+    def _floating(self, pos):
+        tick = self.symbol_info_tick(pos.symbol)
+        info = self.symbol_info(pos.symbol)
+        exit_price = tick.bid if pos.type == self.POSITION_TYPE_BUY else tick.ask
+        move = exit_price - pos.price_open if pos.type == self.POSITION_TYPE_BUY else pos.price_open - exit_price
+        return move / info.trade_tick_size * info.trade_tick_value * pos.volume
+
+    def positions_get(self, symbol=None, **kwargs):
+        positions = tuple(self.positions.values())
+        if symbol is not None:
+            positions = tuple(p for p in positions if p.symbol == symbol)
+        return positions
+
+    def history_deals_get(self, date_from, date_to, **kwargs):
+        start = date_from.timestamp() if hasattr(date_from, 'timestamp') else date_from
+        end = date_to.timestamp() if hasattr(date_to, 'timestamp') else date_to
+        return tuple(d for d in self.deals if start <= d.time <= end)
+
+    def order_check(self, request):
+        info = self.symbol_info(request.get("symbol"))
+        if info is None:
+            return None
+        volume = request.get("volume", 0.0)
+        if volume < info.volume_min or volume > info.volume_max:
+            return OrderCheckResult(self.TRADE_RETCODE_INVALID_VOLUME, self.balance, self.balance,
+                                    0.0, self.balance, "Invalid volume", request)
+        return OrderCheckResult(0, self.balance, self.balance, 0.0, self.balance, "Done", request)
+
+    def order_send(self, request):
+        symbol = request["symbol"]
+        tick = self.symbol_info_tick(symbol)
+        if tick is None:
+            return None
+        is_buy = request["type"] == self.ORDER_TYPE_BUY
+        price = self._fill_price(symbol, tick, is_buy)
+        ticket = self._ticket()
+        position = TradePosition(
+            ticket, tick.time, self.POSITION_TYPE_BUY if is_buy else self.POSITION_TYPE_SELL,
+            request.get("magic", 0), ticket, request["volume"], price, request.get("sl", 0.0),
+            request.get("tp", 0.0), price, 0.0, 0.0, symbol, request.get("comment", ""),
+        )
+        self.positions[ticket] = position
+        commission = self._commission(request["volume"])
+        self.balance += commission
+        deal = self._deal(position, self.DEAL_ENTRY_IN, price, tick.time, commission=commission)
+        return OrderSendResult(self.TRADE_RETCODE_DONE, deal.ticket, ticket, request["volume"],
+                               price, tick.bid, tick.ask, "Request executed", request)
+
+    def _fill_price(self, symbol, tick, is_buy):
+        return tick.ask if is_buy else tick.bid
+
+    def _commission(self, volume):
+        """Commission charged per fill (negative = cost)"""
+        return 0.0
+
+    def _ticket(self):
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
+
+    def _deal(self, position, entry, price, when, profit=0.0, swap=0.0, commission=0.0):
+        is_buy = position.type == self.POSITION_TYPE_BUY
+        if entry != self.DEAL_ENTRY_IN:
+            is_buy = not is_buy
+        deal = TradeDeal(
+            self._ticket(), position.ticket, when, self.DEAL_TYPE_BUY if is_buy else self.DEAL_TYPE_SELL,
+            entry, position.magic, position.ticket, position.volume, price, commission, swap, profit,
+            position.symbol, position.comment,
+        )
+        self.deals.append(deal)
+        return deal
+
+    def reset(self):
+        """Drop every position and deal (between benchmark iterations)"""
+        self.positions.clear()
+        self.deals.clear()
+
+
+def install(rates=None, **kwargs):
+    """Make `import MetaTrader5` return an OfflineTerminal. Returns the terminal."""
+    if rates is None:
+        rates, _ = load()
+    terminal = OfflineTerminal(rates, **kwargs)
+    sys.modules['MetaTrader5'] = terminal
+    return terminal
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record bars for offline benchmarks")
+    parser.add_argument("--record", action="store_true", help="Copy bars from the live terminal")
+    parser.add_argument("--symbols", default=",".join(DEFAULT_SYMBOLS))
+    parser.add_argument("--bars", type=int, default=25_000)
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    args = parser.parse_args()
+    if args.record:
+        record(args.symbols.split(","), args.bars, args.path)
+    else:
+        t0 = time.perf_counter()
+        rates, source = load(args.path, args.symbols.split(","), args.bars)
+        print(f"{source}: {len(rates)} symbols x {min(len(b) for b in rates.values())} bars "
+              f"({time.perf_counter() - t0:.2f}s)")
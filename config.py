@@ -20,5 +20,91 @@ STRATEGY_WEIGHTS = {
     'fundamental': 0.30
 }
 
+# === SIGNAL THRESHOLDS (tuned offline with `python -m sweep`) ===
+CONSENSUS_THRESHOLD = 0.40  # Weighted vote a direction needs before a trade is considered
+SL_ATR_MULT = 1.5  # Stop distance in ATRs
+TP_SL_RATIO = 2.0  # Take-profit distance as a multiple of the stop distance
+# Constructor overrides per strategy, e.g. {'statistical_arbitrage': {'z_entry': 2.0}}
+STRATEGY_PARAMS = {}
+# Bar-driven strategies (depends_on = CLOSED_BARS) vote on the last closed bar, and their votes are
+# cached until the next close. Off: they vote on the forming bar every cycle, as they always have.
+SIGNALS_ON_CLOSED_BARS = False
+
+# === MARKET DATA ===
+BAR_DTYPE = "float64"  # "float32" halves bar/indicator memory per symbol (~7 significant digits)
+
 # === DATABASE ===
 DB_PATH = "trading_history.db"
+DB_SYNCHRONOUS = "NORMAL"  # Safe with WAL: only a power loss can drop the last commits
+DB_CACHE_SIZE_KB = 16384  # 16 MB page cache
+DB_STATEMENT_CACHE = 256  # Prepared statements kept per connection
+DB_BUSY_TIMEOUT_MS = 5000
+STRATEGY_STATS_WINDOW = 50  # Closed trades per strategy in the rolling performance window
+
+# === JOURNAL (write-behind logging) ===
+JOURNAL_MAX_PENDING = 10000  # Records buffered before producers feel back-pressure
+JOURNAL_BATCH_SIZE = 500  # Max records per SQLite transaction
+JOURNAL_FLUSH_INTERVAL = 1.0  # Seconds a partial batch may wait before being written
+JOURNAL_LINGER = 0.05  # Seconds the writer lets a burst of records build up before a batch (flush() cuts it short)
+JOURNAL_PUT_TIMEOUT = 0.05  # Seconds a signal/metric may block before it is dropped
+JOURNAL_SIGNALS = True  # Journal every computed strategy vote to the signals table (trades keep theirs in trade_votes)
+JOURNAL_FLUSH_TIMEOUT = 5.0  # Seconds flush() waits for a failed batch's retry before reporting False
+
+# === RECONCILIATION (MT5 deal history -> trades table) ===
+RECONCILE_INITIAL_DAYS = 30  # History pulled on the very first sync
+RECONCILE_OVERLAP_SECONDS = 86400  # Re-read window; covers broker/server clock offsets
+
+# === BROKER STATE CACHE ===
+TICK_MAX_AGE_MS = 250  # Quotes older than this are refetched before pricing an order
+
+# === CORRELATION ENGINE ===
+CORRELATION_WINDOW = 100  # Bars of log returns in the rolling correlation window
+
+# === MARKET REGIME ===
+REGIME_WINDOW = 800  # Closed bars per symbol the volatility percentile is ranked over (as in VolatilityRegimeStrategy)
+REGIME_ADX_TREND = 25  # ADX above this is TRENDING, below RANGING
+REGIME_BIAS_THRESHOLD = 0.001  # Move from the daily open (fraction) that counts as an UP/DOWN day
+REGIME_FILTER = False  # Reject consensus USD signals against the USDJPY daily bias (USDJPY must be in SYMBOLS)
+
+# === PORTFOLIO RISK GATE ===
+VAR_CONFIDENCE = 0.99
+VAR_HORIZON_BARS = 24  # Risk horizon in bars of TIMEFRAME (24 x H1 = one day)
+MAX_PORTFOLIO_VAR = 0.03  # Max VaR of the whole book as a fraction of equity
+
+# === MONTE CARLO SIZING ===
+MC_PATHS = 200000  # Simulated equity paths per strategy
+MC_TRADES_PER_PATH = 250  # Trades per path (roughly a year of activity)
+MC_BLOCK_SIZE = 5  # Block bootstrap length; keeps streaks of wins/losses together
+MC_RUIN_DRAWDOWN = 0.5  # A path is "ruined" once equity falls 50% below its start
+MC_MAX_RISK_OF_RUIN = 0.01  # Largest acceptable probability of ruin
+MC_MIN_TRADES = 30  # Realized trades needed before simulated sizing replaces defaults
+MC_WORKERS = None  # Process pool size (None = CPU count)
+
+# === CURRENCY EXPOSURE ===
+MAX_CURRENCY_EXPOSURE = 3.0  # Max |net notional| per currency, as a multiple of equity
+EXPOSURE_RATE_MAX_AGE_MS = 60000  # Conversion quotes only need to be roughly current
+
+# === WEIGHT OPTIMIZER ===
+OPTIMIZER_METHOD = "mean_variance"  # Or "risk_parity" (ignores mean returns); mean_variance falls back to it
+OPTIMIZER_MIN_TRADE_DAYS = 5  # Strategies with fewer days of trade votes keep their prior weight
+OPTIMIZER_MIN_VARIANCE = 1e-10  # ... as do those whose daily returns barely vary (fraction of equity, squared)
+OPTIMIZER_LOOKBACK_DAYS = 365  # Daily strategy returns used per solve
+OPTIMIZER_MIN_DAYS = 20  # Below this, fall back to the win-rate heuristic
+OPTIMIZER_BLEND = 0.5  # Share of the solved weights vs. STRATEGY_WEIGHTS
+
+# === ORDER PIPELINE ===
+ORDER_WORKERS = 4  # Orders for different symbols in flight at once
+ORDER_MAX_RETRIES = 3  # Sends per order on requote / price change
+ORDER_BACKOFF_BASE = 0.1  # Seconds; attempt n waits uniform(0, base * 2**n)
+ORDER_DRAIN_TIMEOUT = 5.0  # End-of-cycle wait for in-flight orders before moving on
+
+# === EXECUTION TELEMETRY ===
+TELEMETRY_CAPACITY = 4096  # Orders kept in memory for latency / slippage percentiles
+
+# === METRICS / PROFILING ===
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108  # Prometheus scrape port (None disables the HTTP endpoint)
+METRICS_FILE = None  # e.g. "metrics.prom" for a textfile collector; written every cycle
+PROFILER_ENABLED = False  # Sample the trading loop's stack (for finding the dominant stage)
+PROFILER_INTERVAL = 0.005  # Seconds between stack samples
+PROFILER_OUTPUT = "profile.folded"  # Folded stacks, written on shutdown
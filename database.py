@@ -1,191 +1,823 @@
+import ast
+import json
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 import pandas as pd
-from datetime import datetime
 import config
+from risk.strategy_stats import StrategyStats
+from utils import clock
+
+
+def _migrate_base_schema(cursor):
+    # Trades table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket INTEGER,
+        symbol TEXT,
+        strategy TEXT,
+        direction TEXT,
+        entry_time TIMESTAMP,
+        exit_time TIMESTAMP,
+        entry_price REAL,
+        exit_price REAL,
+        sl REAL,
+        tp REAL,
+        volume REAL,
+        profit REAL,
+        commission REAL,
+        swap REAL,
+        pnl_net REAL,
+        confidence REAL,
+        regime TEXT,
+        status TEXT,
+        metrics TEXT
+    )
+    ''')
+
+    # Databases created before the metrics column existed
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(trades)")}
+    if 'metrics' not in columns:
+        cursor.execute("ALTER TABLE trades ADD COLUMN metrics TEXT")
+
+    # Daily Performance table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        date DATE PRIMARY KEY,
+        equity_start REAL,
+        equity_end REAL,
+        daily_return REAL,
+        trades_count INTEGER,
+        win_rate REAL,
+        sharpe_ratio REAL,
+        max_drawdown REAL
+    )
+    ''')
+
+
+def _migrate_trade_indexes(cursor):
+    # The old check-then-insert path could race into duplicate tickets; keep the
+    # first row for each so the unique index can be built.
+    cursor.execute('''
+    DELETE FROM trades
+    WHERE ticket IS NOT NULL
+      AND id NOT IN (SELECT MIN(id) FROM trades WHERE ticket IS NOT NULL GROUP BY ticket)
+    ''')
+
+    # Stored calendar date of the exit so daily queries don't evaluate DATE() per row
+    cursor.execute("ALTER TABLE trades ADD COLUMN exit_date TEXT")
+    cursor.execute("UPDATE trades SET exit_date = DATE(exit_time) WHERE exit_time IS NOT NULL")
+
+    cursor.execute("CREATE UNIQUE INDEX idx_trades_ticket ON trades(ticket)")
+    cursor.execute("CREATE INDEX idx_trades_status_exit ON trades(status, exit_time)")
+    cursor.execute("CREATE INDEX idx_trades_strategy_exit ON trades(strategy, exit_time)")
+    cursor.execute("CREATE INDEX idx_trades_exit_date ON trades(exit_date, pnl_net)")
+
+
+def _migrate_journal_tables(cursor):
+    # One row per strategy vote per cycle, written by the TradeJournal
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS signals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        time TIMESTAMP,
+        symbol TEXT,
+        strategy TEXT,
+        signal TEXT,
+        confidence REAL,
+        weight REAL
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_strategy_time ON signals(strategy, time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_signals_symbol_time ON signals(symbol, time)")
+
+    # Free-form numeric time series (cycle durations, counters, ...)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metrics (
+        time TIMESTAMP,
+        name TEXT,
+        value REAL,
+        symbol TEXT
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_name_time ON metrics(name, time)")
+
+
+def _migrate_strategy_stats(cursor):
+    # Lifetime aggregates per (strategy, symbol), maintained by triggers whenever
+    # a trade becomes CLOSED so no reader ever has to scan the trades table.
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS strategy_stats (
+        strategy TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        trades INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        pnl_sum REAL NOT NULL DEFAULT 0,
+        pnl_sumsq REAL NOT NULL DEFAULT 0,
+        last_exit_time TIMESTAMP,
+        PRIMARY KEY (strategy, symbol)
+    )
+    ''')
+
+    accumulate = '''
+        INSERT INTO strategy_stats (strategy, symbol, trades, wins, pnl_sum, pnl_sumsq, last_exit_time)
+        VALUES (COALESCE(NEW.strategy, ''), COALESCE(NEW.symbol, ''), 1, NEW.pnl_net > 0,
+                NEW.pnl_net, NEW.pnl_net * NEW.pnl_net, NEW.exit_time)
+        ON CONFLICT(strategy, symbol) DO UPDATE SET
+            trades = trades + 1,
+            wins = wins + excluded.wins,
+            pnl_sum = pnl_sum + excluded.pnl_sum,
+            pnl_sumsq = pnl_sumsq + excluded.pnl_sumsq,
+            last_exit_time = MAX(COALESCE(last_exit_time, ''), excluded.last_exit_time);
+    '''
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_trades_closed_insert AFTER INSERT ON trades
+    WHEN NEW.status = 'CLOSED' AND NEW.pnl_net IS NOT NULL
+    BEGIN {accumulate} END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_trades_closed_update AFTER UPDATE OF status ON trades
+    WHEN NEW.status = 'CLOSED' AND OLD.status IS NOT 'CLOSED' AND NEW.pnl_net IS NOT NULL
+    BEGIN {accumulate} END
+    ''')
+
+    # Backfill from the trades that were closed before the triggers existed
+    cursor.execute('''
+    INSERT OR REPLACE INTO strategy_stats (strategy, symbol, trades, wins, pnl_sum, pnl_sumsq, last_exit_time)
+    SELECT COALESCE(strategy, ''), COALESCE(symbol, ''), COUNT(*), SUM(pnl_net > 0),
+           SUM(pnl_net), SUM(pnl_net * pnl_net), MAX(exit_time)
+    FROM trades
+    WHERE status = 'CLOSED' AND pnl_net IS NOT NULL
+    GROUP BY COALESCE(strategy, ''), COALESCE(symbol, '')
+    ''')
+
+
+def _migrate_deal_sync(cursor):
+    # MT5 position id of each trade, used to match exit deals back to the entry
+    cursor.execute("ALTER TABLE trades ADD COLUMN position_id INTEGER")
+    cursor.execute("ALTER TABLE trades ADD COLUMN closed_volume REAL DEFAULT 0")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_position ON trades(position_id)")
+
+    # Small key/value store for persisted cursors (e.g. last reconciled deal)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    ''')
+
+
+def _migrate_equity_curve(cursor):
+    # Epoch seconds as the rowid keeps each sample to a few bytes
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS equity_curve (
+        time INTEGER PRIMARY KEY,
+        equity REAL NOT NULL
+    )
+    ''')
+
+
+def _migrate_executions(cursor):
+    # One row per order sent: stage latencies (ms) and requested vs filled price
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS executions (
+        time TIMESTAMP,
+        symbol TEXT,
+        direction TEXT,
+        status TEXT,
+        retries INTEGER,
+        bar_age_ms REAL,
+        votes_ms REAL,
+        risk_ms REAL,
+        send_ms REAL,
+        fill_ms REAL,
+        total_ms REAL,
+        reference_price REAL,
+        requested_price REAL,
+        filled_price REAL,
+        slippage_points REAL
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_executions_symbol_time ON executions(symbol, time)')
+
+
+def _migrate_vote_attribution(cursor):
+    # Trades are opened by the ensemble, so their strategy column is 'Ensemble'.
+    # Each close is credited to the strategies that voted on it instead: P&L as
+    # is for a vote in the trade's direction, negated for a vote against it.
+    # Trades without votes (older or manual ones) keep their own strategy.
+    cursor.execute('''
+    CREATE VIEW IF NOT EXISTS trade_attribution AS
+    SELECT t.ticket, v.strategy, COALESCE(t.symbol, '') AS symbol, t.exit_time,
+           CASE WHEN v.signal = t.direction THEN t.pnl_net ELSE -t.pnl_net END AS pnl
+    FROM trades t JOIN trade_votes v ON v.ticket = t.ticket
+    WHERE t.status = 'CLOSED' AND t.pnl_net IS NOT NULL AND v.signal IS NOT NULL
+    UNION ALL
+    SELECT t.ticket, COALESCE(t.strategy, ''), COALESCE(t.symbol, ''), t.exit_time, t.pnl_net
+    FROM trades t
+    WHERE t.status = 'CLOSED' AND t.pnl_net IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM trade_votes v WHERE v.ticket = t.ticket AND v.signal IS NOT NULL)
+    ''')
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_trades_closed_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_trades_closed_update")
+    accumulate = '''
+        INSERT INTO strategy_stats (strategy, symbol, trades, wins, pnl_sum, pnl_sumsq, last_exit_time)
+        SELECT strategy, symbol, 1, pnl > 0, pnl, pnl * pnl, exit_time
+        FROM trade_attribution WHERE ticket = NEW.ticket
+        ON CONFLICT(strategy, symbol) DO UPDATE SET
+            trades = trades + 1,
+            wins = wins + excluded.wins,
+            pnl_sum = pnl_sum + excluded.pnl_sum,
+            pnl_sumsq = pnl_sumsq + excluded.pnl_sumsq,
+            last_exit_time = MAX(COALESCE(last_exit_time, ''), excluded.last_exit_time);
+    '''
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_trades_closed_insert AFTER INSERT ON trades
+    WHEN NEW.status = 'CLOSED' AND NEW.pnl_net IS NOT NULL
+    BEGIN {accumulate} END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_trades_closed_update AFTER UPDATE OF status ON trades
+    WHEN NEW.status = 'CLOSED' AND OLD.status IS NOT 'CLOSED' AND NEW.pnl_net IS NOT NULL
+    BEGIN {accumulate} END
+    ''')
+
+    # Rebuild from history under the new attribution
+    cursor.execute("DELETE FROM strategy_stats")
+    cursor.execute('''
+    INSERT INTO strategy_stats (strategy, symbol, trades, wins, pnl_sum, pnl_sumsq, last_exit_time)
+    SELECT strategy, symbol, COUNT(*), SUM(pnl > 0), SUM(pnl), SUM(pnl * pnl), MAX(exit_time)
+    FROM trade_attribution
+    GROUP BY strategy, symbol
+    ''')
+
+
+# Non-numeric trades columns; everything else exports as float64
+TEXT_COLUMNS = {'symbol', 'strategy', 'direction', 'entry_time', 'exit_time',
+                'exit_date', 'regime', 'status', 'metrics'}
+
+# Per-trade indicator snapshot, stored as typed columns on trades
+METRIC_COLUMNS = ('z_score', 'rsi', 'atr', 'sentiment')
+
+
+def _parse_legacy_metrics(text):
+    """Read a str(dict) metrics blob, including numpy reprs like np.float64(1.5)"""
+    if not text:
+        return {}
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(re.sub(r'np\.\w+\(([^()]*)\)', r'\1', text))
+    except (ValueError, SyntaxError):
+        return {}
+
+
+def _migrate_structured_metrics(cursor):
+    for column in METRIC_COLUMNS:
+        cursor.execute(f"ALTER TABLE trades ADD COLUMN {column} REAL")
+
+    # Strategy votes that produced each trade, one row per (trade, strategy)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS trade_votes (
+        ticket INTEGER NOT NULL,
+        strategy TEXT NOT NULL,
+        signal TEXT,
+        confidence REAL,
+        weight REAL,
+        PRIMARY KEY (ticket, strategy)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trade_votes_strategy ON trade_votes(strategy)")
+
+    # One-off parse of the old repr blobs; after this nothing reads them row by row
+    rows = cursor.execute("SELECT id, metrics FROM trades WHERE metrics IS NOT NULL").fetchall()
+    updates = []
+    for trade_id, text in rows:
+        metrics = _parse_legacy_metrics(text)
+        values = []
+        for column in METRIC_COLUMNS:
+            try:
+                values.append(float(metrics[column]) if metrics.get(column) is not None else None)
+            except (TypeError, ValueError):
+                values.append(None)
+        updates.append((*values, trade_id))
+    cursor.executemany(
+        f"UPDATE trades SET {', '.join(c + ' = ?' for c in METRIC_COLUMNS)} WHERE id = ?",
+        updates
+    )
+
+
+def _migrate_reference_slippage(cursor):
+    # Fill vs the close the decision was made on. Older rows stay NULL: the
+    # point size they would need was never stored.
+    cursor.execute("ALTER TABLE executions ADD COLUMN reference_slippage_points REAL")
+
+
+# Ordered schema migrations: (version, description, function).
+# PRAGMA user_version stores the last version applied to a database file.
+# Append new entries; never edit one that has already shipped.
+MIGRATIONS = [
+    (1, "base schema", _migrate_base_schema),
+    (2, "trade indexes and exit_date", _migrate_trade_indexes),
+    (3, "signals and metrics journal tables", _migrate_journal_tables),
+    (4, "incremental strategy_stats", _migrate_strategy_stats),
+    (5, "deal reconciliation columns and sync_state", _migrate_deal_sync),
+    (6, "equity_curve", _migrate_equity_curve),
+    (7, "typed metric columns and trade_votes", _migrate_structured_metrics),
+    (8, "execution telemetry", _migrate_executions),
+    (9, "strategy_stats credited to the voting strategies", _migrate_vote_attribution),
+    (10, "reference slippage in executions", _migrate_reference_slippage),
+]
+
 
 class DatabaseHandler:
     def __init__(self, db_path=config.DB_PATH):
         self.db_path = db_path
+        # One long-lived connection shared by every caller. sqlite3 objects are not
+        # safe for concurrent use, so all access is serialized through this lock.
+        self._lock = threading.RLock()
+        self._tx_depth = 0
+        self._on_commit = []
+        self._conn = self._connect()
         self._init_db()
 
-    def _init_db(self):
-        """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Trades table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS trades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket INTEGER,
-            symbol TEXT,
-            strategy TEXT,
-            direction TEXT,
-            entry_time TIMESTAMP,
-            exit_time TIMESTAMP,
-            entry_price REAL,
-            exit_price REAL,
-            sl REAL,
-            tp REAL,
-            volume REAL,
-            profit REAL,
-            commission REAL,
-            swap REAL,
-            pnl_net REAL,
-            confidence REAL,
-            regime TEXT,
-            regime TEXT,
-            status TEXT,
-            metrics TEXT
-        )
-        ''')
-        
-        # Attempt migration for existing users
-        try:
-            cursor.execute("ALTER TABLE trades ADD COLUMN metrics TEXT")
-        except:
-            pass # Column likely exists
-        
-        # Daily Performance table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS daily_stats (
-            date DATE PRIMARY KEY,
-            equity_start REAL,
-            equity_end REAL,
-            daily_return REAL,
-            trades_count INTEGER,
-            win_rate REAL,
-            sharpe_ratio REAL,
-            max_drawdown REAL
+        # Rolling per-strategy performance, kept current as trades close (see trade_attribution)
+        self.strategy_stats = StrategyStats(config.STRATEGY_STATS_WINDOW)
+        with self._lock:
+            keys = self._conn.execute("SELECT strategy, symbol FROM strategy_stats").fetchall()
+            self.strategy_stats.load(self._conn, keys)
+
+    def _connect(self):
+        """Open the persistent connection and apply performance pragmas"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,  # Autocommit; transactions are opened explicitly
+            cached_statements=config.DB_STATEMENT_CACHE
         )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # WAL lets readers proceed while a write is in flight and turns each commit
+        # into a sequential append. With synchronous=NORMAL the fsync only happens at
+        # checkpoints instead of on every commit.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={config.DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size=-{int(config.DB_CACHE_SIZE_KB)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={int(config.DB_BUSY_TIMEOUT_MS)}")
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a group of statements as one atomic write.
+        Nested calls join the outer transaction, so helpers can be composed freely.
+
+        Usage:
+            with db.transaction() as cursor:
+                cursor.execute(...)
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            if self._tx_depth == 0:
+                cursor.execute("BEGIN IMMEDIATE")
+            self._tx_depth += 1
+            try:
+                yield cursor
+            except BaseException:
+                self._tx_depth -= 1
+                if self._tx_depth == 0:
+                    self._on_commit.clear()
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._tx_depth -= 1
+                if self._tx_depth == 0:
+                    try:
+                        self._conn.execute("COMMIT")
+                    except sqlite3.Error:
+                        self._on_commit.clear()
+                        self._conn.execute("ROLLBACK")
+                        raise
+                    callbacks, self._on_commit = self._on_commit, []
+                    for callback in callbacks:
+                        callback()
+            finally:
+                cursor.close()
+
+    def close(self):
+        """Checkpoint the WAL and release the connection"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                pass
+            self._conn.close()
+            self._conn = None
+
+    def _init_db(self):
+        """Bring the schema up to date by applying any pending migrations"""
+        with self.transaction() as cursor:
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            for target, description, migrate in MIGRATIONS:
+                if target <= version:
+                    continue
+                print(f"[Database] Migrating schema to v{target}: {description}")
+                migrate(cursor)
+                # PRAGMA does not accept bound parameters
+                cursor.execute(f"PRAGMA user_version = {int(target)}")
+
         print(f"[Database] Initialized at {self.db_path}")
 
     def log_trade(self, trade_data):
         """Log a new trade or update existing"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if ticket already exists
-        cursor.execute('SELECT id FROM trades WHERE ticket = ?', (trade_data.get('ticket'),))
-        exists = cursor.fetchone()
-        
-        if exists:
-            # Update existing trade (e.g. at exit)
-            query = '''
-            UPDATE trades SET 
-                exit_time = ?, exit_price = ?, profit = ?, 
-                commission = ?, swap = ?, pnl_net = ?, status = ?
-            WHERE ticket = ?
-            '''
-            cursor.execute(query, (
-                trade_data.get('exit_time'),
-                trade_data.get('exit_price'),
-                trade_data.get('profit'),
-                trade_data.get('commission'),
-                trade_data.get('swap'),
-                trade_data.get('pnl_net'),
-                trade_data.get('status'),
-                trade_data.get('ticket')
-            ))
-        else:
-            # Insert new trade
-            query = '''
-            INSERT INTO trades (
-                ticket, symbol, strategy, direction, entry_time, 
-                entry_price, sl, tp, volume, confidence, regime, status, metrics
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            '''
-            cursor.execute(query, (
-                trade_data.get('ticket'),
-                trade_data.get('symbol'),
-                trade_data.get('strategy'),
-                trade_data.get('direction'),
-                trade_data.get('entry_time'),
-                trade_data.get('entry_price'),
-                trade_data.get('sl'),
-                trade_data.get('tp'),
-                trade_data.get('volume'),
-                trade_data.get('confidence'),
-                trade_data.get('regime'),
-                'OPEN',
-                str(trade_data.get('metrics', {}))
-            ))
-            
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            self._write_trade(cursor, trade_data)
+
+    def log_trades(self, trades):
+        """Log many trades in a single transaction (one commit for the whole batch)"""
+        with self.transaction() as cursor:
+            for trade_data in trades:
+                self._write_trade(cursor, trade_data)
+
+    def write_batch(self, trades=(), signals=(), metrics=(), equity=(), executions=()):
+        """Write a mixed batch of journal records in one transaction"""
+        with self.transaction() as cursor:
+            for trade_data in trades:
+                self._write_trade(cursor, trade_data)
+            if signals:
+                cursor.executemany('''
+                INSERT INTO signals (time, symbol, strategy, signal, confidence, weight)
+                VALUES (:time, :symbol, :strategy, :signal, :confidence, :weight)
+                ''', signals)
+            if metrics:
+                cursor.executemany('''
+                INSERT INTO metrics (time, name, value, symbol)
+                VALUES (:time, :name, :value, :symbol)
+                ''', metrics)
+            if equity:
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO equity_curve (time, equity) VALUES (?, ?)", equity
+                )
+            if executions:
+                cursor.executemany('''
+                INSERT INTO executions (
+                    time, symbol, direction, status, retries, bar_age_ms, votes_ms, risk_ms,
+                    send_ms, fill_ms, total_ms, reference_price, requested_price, filled_price,
+                    slippage_points, reference_slippage_points
+                ) VALUES (
+                    :time, :symbol, :direction, :status, :retries, :bar_age_ms, :votes_ms, :risk_ms,
+                    :send_ms, :fill_ms, :total_ms, :reference_price, :requested_price, :filled_price,
+                    :slippage_points, :reference_slippage_points
+                )
+                ''', executions)
+
+    def _write_trade(self, cursor, trade_data):
+        closing = trade_data.get('status') == 'CLOSED' and trade_data.get('pnl_net') is not None
+        if closing:
+            # A trade already closed is not counted twice
+            cursor.execute('SELECT status FROM trades WHERE ticket = ?', (trade_data.get('ticket'),))
+            previous = cursor.fetchone()
+            closing = previous is None or previous[0] != 'CLOSED'
+
+        # Votes go in first: a trade inserted already CLOSED is credited to them by its trigger
+        votes = trade_data.get('votes')
+        if votes:
+            cursor.executemany('''
+            INSERT OR REPLACE INTO trade_votes (ticket, strategy, signal, confidence, weight)
+            VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (trade_data.get('ticket'), name, signal, float(confidence), float(weight))
+                for name, (signal, confidence, weight) in votes.items()
+            ])
+
+        # New tickets are inserted; a known ticket only has its exit fields updated
+        query = '''
+        INSERT INTO trades (
+            ticket, symbol, strategy, direction, entry_time, entry_price, sl, tp,
+            volume, confidence, regime, status, metrics, position_id,
+            z_score, rsi, atr, sentiment,
+            exit_time, exit_price, profit, commission, swap, pnl_net, exit_date
+        ) VALUES (
+            :ticket, :symbol, :strategy, :direction, :entry_time, :entry_price, :sl, :tp,
+            :volume, :confidence, :regime, :status, :metrics, :position_id,
+            :z_score, :rsi, :atr, :sentiment,
+            :exit_time, :exit_price, :profit, :commission, :swap, :pnl_net, DATE(:exit_time)
+        )
+        ON CONFLICT(ticket) DO UPDATE SET
+            exit_time = excluded.exit_time,
+            exit_price = excluded.exit_price,
+            profit = excluded.profit,
+            commission = excluded.commission,
+            swap = excluded.swap,
+            pnl_net = excluded.pnl_net,
+            status = excluded.status,
+            exit_date = excluded.exit_date
+        '''
+        metrics = dict(trade_data.get('metrics') or {})
+        typed = {}
+        for column in METRIC_COLUMNS:
+            value = metrics.pop(column, None)
+            typed[column] = float(value) if value is not None else None
+
+        cursor.execute(query, {
+            **typed,
+            'ticket': trade_data.get('ticket'),
+            'symbol': trade_data.get('symbol'),
+            'strategy': trade_data.get('strategy'),
+            'direction': trade_data.get('direction'),
+            'entry_time': trade_data.get('entry_time'),
+            'entry_price': trade_data.get('entry_price'),
+            'sl': trade_data.get('sl'),
+            'tp': trade_data.get('tp'),
+            'volume': trade_data.get('volume'),
+            'confidence': trade_data.get('confidence'),
+            'regime': trade_data.get('regime'),
+            'status': trade_data.get('status') or 'OPEN',
+            # Anything without a typed column is kept as JSON
+            'metrics': json.dumps(metrics, default=float) if metrics else None,
+            'position_id': trade_data.get('position_id'),
+            'exit_time': trade_data.get('exit_time'),
+            'exit_price': trade_data.get('exit_price'),
+            'profit': trade_data.get('profit'),
+            'commission': trade_data.get('commission'),
+            'swap': trade_data.get('swap'),
+            'pnl_net': trade_data.get('pnl_net')
+        })
+
+        if closing:
+            self._credit_strategies(cursor, trade_data.get('ticket'))
+
+    def _credit_strategies(self, cursor, ticket):
+        """Queue the rolling-window update for a trade that just closed, per strategy it is credited to"""
+        rows = cursor.execute(
+            "SELECT strategy, symbol, pnl FROM trade_attribution WHERE ticket = ?", (ticket,)
+        ).fetchall()
+        def record():
+            for strategy, symbol, pnl in rows:
+                self.strategy_stats.record(strategy, symbol, pnl)
+        self._on_commit.append(record)
+
+    def get_sync_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def apply_deal_sync(self, entries, exits, state):
+        """
+        Apply one reconciliation pass atomically.
+
+        entries: [(position_id, entry_deal_ticket, commission)] for our entry deals
+        exits:   [{position_id, exit_time, exit_price, volume, profit, commission, swap}]
+        state:   {key: value} cursor values stored in sync_state in the same commit
+
+        Returns: number of trades that transitioned to CLOSED
+        """
+        closed = 0
+        with self.transaction() as cursor:
+            for position_id, deal_ticket, commission in entries:
+                cursor.execute('''
+                UPDATE trades SET position_id = ?, commission = COALESCE(commission, 0) + ?
+                WHERE ticket = ? AND position_id IS NULL
+                ''', (position_id, commission, deal_ticket))
+                if cursor.rowcount == 0:
+                    # Trade was logged with its position id already; just add the entry commission
+                    cursor.execute('''
+                    UPDATE trades SET commission = COALESCE(commission, 0) + ?
+                    WHERE ticket = ? AND position_id = ?
+                    ''', (commission, deal_ticket, position_id))
+
+            for deal in exits:
+                # Partial closes accumulate; the trade is CLOSED once its full volume is out
+                cursor.execute('''
+                UPDATE trades SET
+                    exit_price = (COALESCE(exit_price, 0) * COALESCE(closed_volume, 0) + :exit_price * :volume)
+                                 / (COALESCE(closed_volume, 0) + :volume),
+                    closed_volume = COALESCE(closed_volume, 0) + :volume,
+                    exit_time = :exit_time,
+                    exit_date = DATE(:exit_time),
+                    profit = COALESCE(profit, 0) + :profit,
+                    commission = COALESCE(commission, 0) + :commission,
+                    swap = COALESCE(swap, 0) + :swap,
+                    pnl_net = COALESCE(profit, 0) + :profit + COALESCE(commission, 0) + :commission
+                              + COALESCE(swap, 0) + :swap,
+                    status = CASE WHEN COALESCE(closed_volume, 0) + :volume >= volume - 1e-9
+                                  THEN 'CLOSED' ELSE status END
+                WHERE position_id = :position_id AND status IS NOT 'CLOSED'
+                RETURNING ticket, status
+                ''', deal)
+                for ticket, status in cursor.fetchall():
+                    if status == 'CLOSED':
+                        closed += 1
+                        self._credit_strategies(cursor, ticket)
+
+            self.set_sync_state(state)
+        return closed
+
+    def set_sync_state(self, values):
+        with self.transaction() as cursor:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                [(key, str(value)) for key, value in values.items()]
+            )
+
+    def get_day_trade_counts(self, date):
+        """(closed trade count, winners) for one exit date; a range scan on idx_trades_exit_date"""
+        with self._lock:
+            count, wins = self._conn.execute(
+                "SELECT COUNT(*), SUM(pnl_net > 0) FROM trades WHERE exit_date = ?",
+                (date.isoformat(),)
+            ).fetchone()
+        return count, wins or 0
+
+    def get_daily_stats(self, date):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT equity_start, equity_end, max_drawdown FROM daily_stats WHERE date = ?",
+                (date.isoformat(),)
+            ).fetchone()
+        return row
+
+    def get_daily_returns(self, after=None, before=None):
+        """[(date, daily_return)] of days strictly between `after` and `before` (ISO dates or None), oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT date, daily_return FROM daily_stats WHERE date > ? AND date < ? ORDER BY date",
+                (after or '', before or '9999-12-31')
+            ).fetchall()
+
+    def save_daily_stats(self, stats, state=None):
+        """Upsert one daily_stats row, optionally with sync_state values in the same commit"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+            INSERT OR REPLACE INTO daily_stats (
+                date, equity_start, equity_end, daily_return, trades_count,
+                win_rate, sharpe_ratio, max_drawdown
+            ) VALUES (
+                :date, :equity_start, :equity_end, :daily_return, :trades_count,
+                :win_rate, :sharpe_ratio, :max_drawdown
+            )
+            ''', stats)
+            if state:
+                self.set_sync_state(state)
+
+    def get_strategy_daily_returns(self, since=None):
+        """
+        Daily return attributed to each strategy from its votes on closed trades.
+
+        A vote in the trade's direction earns confidence x pnl_net; a vote against
+        it earns the opposite. P&L is divided by that day's starting equity when
+        daily_stats has it.
+        Returns: DataFrame indexed by exit_date with one column per strategy
+        """
+        query = '''
+        SELECT t.exit_date AS date, v.strategy,
+               SUM(CASE WHEN v.signal = t.direction THEN v.confidence
+                        WHEN v.signal IS NULL THEN 0
+                        ELSE -v.confidence END * t.pnl_net)
+               / COALESCE(MAX(d.equity_start), 1.0) AS ret
+        FROM trade_votes v
+        JOIN trades t ON t.ticket = v.ticket
+        LEFT JOIN daily_stats d ON d.date = t.exit_date
+        WHERE t.status = 'CLOSED' AND t.pnl_net IS NOT NULL AND t.exit_date >= ?
+        GROUP BY t.exit_date, v.strategy
+        '''
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=[since.isoformat() if since else ''])
+        if df.empty:
+            return df
+        return df.pivot(index='date', columns='strategy', values='ret').fillna(0.0).sort_index()
 
     def get_trades_df(self):
         """Get trades as DataFrame for analysis"""
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query("SELECT * FROM trades", conn)
-        conn.close()
+        with self._lock:
+            return pd.read_sql_query("SELECT * FROM trades", self._conn)
+
+    def export_trades(self, columns=None, status='CLOSED', since=None):
+        """
+        Bulk export of trades with their typed metrics, for vectorized analysis.
+
+        Args:
+            columns (list): Columns to fetch. Defaults to identity, P&L and metrics.
+            status (str): Filter on trade status, or None for all trades.
+            since (datetime): Only trades that exited at or after this time.
+
+        Returns:
+            pd.DataFrame with numeric columns as float64 (NULL -> NaN), e.g.
+            df.groupby(pd.cut(df.z_score, bins))['pnl_net'].mean()
+        """
+        columns = columns or [
+            'ticket', 'symbol', 'strategy', 'direction', 'entry_time', 'exit_time',
+            'volume', 'confidence', 'pnl_net', *METRIC_COLUMNS
+        ]
+        query = f"SELECT {', '.join(columns)} FROM trades WHERE 1 = 1"
+        params = []
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        if since is not None:
+            query += " AND exit_time >= ?"
+            params.append(since)
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=params)
+        for column in df.columns:
+            if column not in TEXT_COLUMNS:
+                df[column] = df[column].astype('float64')
         return df
 
+    def export_trade_arrays(self, columns=None, status='CLOSED', since=None):
+        """Same as export_trades, as a dict of NumPy arrays keyed by column"""
+        df = self.export_trades(columns, status, since)
+        return {column: df[column].to_numpy() for column in df.columns}
+
+    def export_trade_votes(self, status='CLOSED'):
+        """
+        Strategy votes joined to trade outcomes, pivoted to one row per trade.
+        Returns: DataFrame indexed by ticket with pnl_net, direction and
+        '<strategy>' columns holding the signed confidence (+BUY / -SELL / 0).
+        """
+        query = '''
+        SELECT v.ticket, v.strategy,
+               CASE v.signal WHEN 'BUY' THEN v.confidence WHEN 'SELL' THEN -v.confidence ELSE 0 END AS vote,
+               t.direction, t.pnl_net
+        FROM trade_votes v JOIN trades t ON t.ticket = v.ticket
+        '''
+        params = []
+        if status is not None:
+            query += " WHERE t.status = ?"
+            params.append(status)
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=params)
+        if df.empty:
+            return df
+        votes = df.pivot(index='ticket', columns='strategy', values='vote').fillna(0.0)
+        outcome = df.drop_duplicates('ticket').set_index('ticket')[['direction', 'pnl_net']]
+        return outcome.join(votes)
+
     def get_today_risk(self):
         """Calculate total risk used today (sum of initial risk of open/closed trades)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # We estimate risk used as: Sum of (Volume * Confidence * Base_Risk)? 
         # Actually, RiskManager tracks `daily_risk_used` as a running counter of % risk.
         # But for exact restart, we might just sum the 'pnl_net' of closed trades + current open risk?
         # A simpler approach for the 'Hard Cap' is to sum Realized Loss + Open Risk.
         
         # Let's approximate by summing the Net Loss of today's closed trades.
-        today = datetime.now().date()
-        query = "SELECT SUM(pnl_net) FROM trades WHERE DATE(exit_time) = ? AND pnl_net < 0"
-        cursor.execute(query, (today,))
-        realized_loss = cursor.fetchone()[0] or 0.0
-        
-        conn.close()
+        # exit_date is stored at write time so this is a range scan on idx_trades_exit_date
+        today = clock.now().date().isoformat()
+        query = "SELECT SUM(pnl_net) FROM trades WHERE exit_date = ? AND pnl_net < 0"
+        with self._lock:
+            realized_loss = self._conn.execute(query, (today,)).fetchone()[0] or 0.0
         
         # Note: accurate tracking requires storing 'risk_pct' per trade. 
         # For now, we return Realized Loss to check against Max Drawdown.
         return abs(realized_loss)
 
-    def get_strategy_performance(self, lookback=50):
+    def get_strategy_performance(self):
         """
-        Calculate win rate for each strategy over the last N trades.
+        Win rate for each strategy over its last STRATEGY_STATS_WINDOW closed trades,
+        counting the trades it voted on (a vote against a losing trade is a win).
+        Served from in-memory aggregates: O(strategies), independent of history size.
         Returns: Dict {strategy_name: win_rate}
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get last N closed trades
-        query = '''
-        SELECT strategy, pnl_net 
-        FROM trades 
-        WHERE status = 'CLOSED' 
-        ORDER BY exit_time DESC 
-        LIMIT ?
-        '''
-        cursor.execute(query, (lookback,))
-        trades = cursor.fetchall()
-        
-        conn.close()
-        
-        if not trades:
-            return {}
-            
-        stats = {}
-        for strategy, pnl in trades:
-            if strategy not in stats:
-                stats[strategy] = {'wins': 0, 'total': 0}
-            
-            stats[strategy]['total'] += 1
-            if pnl > 0:
-                stats[strategy]['wins'] += 1
-                
-        # Calculate win rates
-        win_rates = {}
-        for strategy, data in stats.items():
-            if data['total'] > 0:
-                win_rates[strategy] = data['wins'] / data['total']
-            else:
-                win_rates[strategy] = 0.0
-                
-        return win_rates
+        return self.strategy_stats.win_rates()
+
+    def get_strategy_stats(self):
+        """
+        Rolling and lifetime performance per strategy with per-symbol breakdowns.
+        Returns: Dict {strategy: {'rolling': {...}, 'lifetime': {...}, 'symbols': {...}}}
+        """
+        rolling = self.strategy_stats.summary()
+        with self._lock:
+            rows = self._conn.execute('''
+            SELECT strategy, symbol, trades, wins, pnl_sum, pnl_sumsq FROM strategy_stats
+            ''').fetchall()
+
+        report = {}
+        for strategy, symbol, trades, wins, pnl_sum, pnl_sumsq in rows:
+            entry = report.setdefault(strategy, {
+                'rolling': {k: v for k, v in rolling.get(strategy, {}).items() if k != 'symbols'},
+                'lifetime': {'trades': 0, 'wins': 0, 'pnl_sum': 0.0, 'pnl_sumsq': 0.0},
+                'symbols': {}
+            })
+            lifetime = entry['lifetime']
+            lifetime['trades'] += trades
+            lifetime['wins'] += wins
+            lifetime['pnl_sum'] += pnl_sum
+            lifetime['pnl_sumsq'] += pnl_sumsq
+            entry['symbols'][symbol] = {
+                'trades': trades,
+                'win_rate': wins / trades if trades else 0.0,
+                'pnl_sum': pnl_sum,
+                'rolling': rolling.get(strategy, {}).get('symbols', {}).get(symbol)
+            }
+
+        for entry in report.values():
+            lifetime = entry['lifetime']
+            n = lifetime['trades']
+            lifetime['win_rate'] = lifetime['wins'] / n if n else 0.0
+            lifetime['mean'] = lifetime['pnl_sum'] / n if n else 0.0
+        return report
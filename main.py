@@ -1,15 +1,31 @@
 import MetaTrader5 as mt5
+import importlib
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 
 import config
 from database import DatabaseHandler
 from utils.data_handler import MarketDataHandler
 from utils.executor import TradeExecutor
+from utils.order_pipeline import OrderPipeline, FILLED
 from utils.news_handler import NewsHandler
+from utils.journal import TradeJournal
+from utils.reconciler import DealReconciler
+from utils.broker_cache import BrokerStateCache
+from utils.position_book import PositionBook
+from utils import clock
+from utils.telemetry import ExecutionTelemetry
+from utils.metrics import REGISTRY, MetricsExporter, SamplingProfiler
 from risk.risk_manager import RiskManager
 from risk.portfolio import PortfolioManager
+from risk.equity import EquityTracker
+from risk.correlation import RollingCorrelation
+from risk.var import PortfolioRiskGate
+from risk.monte_carlo import MonteCarloSizer
+from risk.exposure import CurrencyExposure
+from risk.optimizer import WeightOptimizer
+from market_regime import RegimeEngine, MarketRegime
 
 # Strategy Imports
 from strategies.arbitrage import StatisticalArbitrageStrategy
@@ -17,77 +33,225 @@ from strategies.momentum import MomentumBreakoutStrategy
 from strategies.volatility import VolatilityRegimeStrategy
 from strategies.ml_ensemble import MLEnsembleStrategy
 from strategies.fundamental import FundamentalStrategy
+from strategies.signal_cache import SignalCache
+from strategies.base import CLOSED_BARS, FORMING_BAR
+from utils.bars import timeframe_seconds
+
+# Indicators run_cycle reads directly: ATR for stop distances, the rest for trade metrics
+TRADE_FEATURES = ('atr', 'z_score', 'rsi')
 
 class TradingBot:
     def __init__(self):
         print("=== INITIALIZING PROFESSIONAL FOREX BOT ===")
+        startup = time.perf_counter()
+        self.startup_times = {}
         
-        # 1. Initialize MT5
-        if not mt5.initialize():
-            raise Exception(f"MT5 Init Failed: {mt5.last_error()}")
+        # 1. Slow, independent start-up work runs concurrently: terminal connection,
+        #    database migrations, ML model load and the indicator library import.
+        #    The news/NLP stack warms up on its own thread and is not waited for.
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup") as pool:
+            terminal = pool.submit(self._timed, 'mt5', mt5.initialize)
+            database = pool.submit(self._timed, 'database', DatabaseHandler)
+            ml_strategy = pool.submit(self._timed, 'ml_model', MLEnsembleStrategy)
+            indicators = pool.submit(self._timed, 'indicators', importlib.import_module, 'pandas_ta')
+            self.news_handler = NewsHandler()
+            
+            if not terminal.result():
+                raise Exception(f"MT5 Init Failed: {mt5.last_error()}")
+            self.db = database.result()
+            ml_strategy = ml_strategy.result()
+            indicators.result()
         
         # 2. Components
-        self.db = DatabaseHandler()
+        components_start = time.perf_counter()
+        self.journal = TradeJournal(self.db)
+        self.reconciler = DealReconciler(self.db)
+        self.equity = EquityTracker(self.db, self.journal)
         self.data_handler = MarketDataHandler()
-        self.news_handler = NewsHandler()
-        self.executor = TradeExecutor()
-        self.risk_manager = RiskManager(self.db)
-        self.portfolio = PortfolioManager()
+        self.broker = BrokerStateCache()
+        self.positions = PositionBook()
+        self.exposure = CurrencyExposure(self.broker)
+        self.positions.subscribe(self.exposure)
+        self.executor = TradeExecutor(self.broker)
+        self.orders = OrderPipeline(self.executor)
+        self.telemetry = ExecutionTelemetry(self.journal)
+        self.metrics = MetricsExporter()
+        self.profiler = SamplingProfiler() if config.PROFILER_ENABLED else None
+        self.sizer = MonteCarloSizer(self.db)
+        self.risk_manager = RiskManager(self.db, self.broker, self.sizer)
+        self.correlation = RollingCorrelation(config.SYMBOLS)
+        self.portfolio = PortfolioManager(self.correlation)
+        self.risk_gate = PortfolioRiskGate(self.correlation, self.broker)
+        self.optimizer = WeightOptimizer(self.db, self.portfolio)
+        self.regime = RegimeEngine(config.SYMBOLS)
+        self.judge = MarketRegime(self.regime)
         
         # 3. Strategies
         self.strategies = {
-            'statistical_arbitrage': StatisticalArbitrageStrategy(),
-            'momentum_breakout': MomentumBreakoutStrategy(),
-            'volatility_regime': VolatilityRegimeStrategy(),
-            'ml_ensemble': MLEnsembleStrategy(),
+            'statistical_arbitrage': StatisticalArbitrageStrategy(**config.STRATEGY_PARAMS.get('statistical_arbitrage', {})),
+            'momentum_breakout': MomentumBreakoutStrategy(**config.STRATEGY_PARAMS.get('momentum_breakout', {})),
+            'volatility_regime': VolatilityRegimeStrategy(**config.STRATEGY_PARAMS.get('volatility_regime', {})),
+            'ml_ensemble': ml_strategy,
             'fundamental': FundamentalStrategy(self.news_handler)
         }
+        self.signal_cache = SignalCache()
+        # Indicators are computed only if an enabled strategy (or run_cycle itself,
+        # for stops, trade metrics and regime labels) reads them
+        self.data_handler.require(set(TRADE_FEATURES).union(
+            self.regime.features, *(strategy.features for strategy in self.strategies.values())
+        ))
+        # Bar-driven strategies vote on the forming bar unless SIGNALS_ON_CLOSED_BARS is set;
+        # only then can the forming bar do without indicators and their votes be cached
+        if not config.SIGNALS_ON_CLOSED_BARS:
+            for strategy in self.strategies.values():
+                if strategy.depends_on == CLOSED_BARS:
+                    strategy.depends_on = FORMING_BAR
+        self.data_handler.forming_features = not config.SIGNALS_ON_CLOSED_BARS
+        self.startup_times['components'] = time.perf_counter() - components_start
         
+        total = time.perf_counter() - startup
+        for name, seconds in self.startup_times.items():
+            REGISTRY.set('startup_seconds', seconds, component=name)
+        REGISTRY.set('startup_seconds', total, component='total')
+        self.journal.log_metric('startup_seconds', total)
+        parts = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.startup_times.items())
+        print(f"[Startup] Ready in {total:.2f}s ({parts})")
         print(f"[Bot] Initialized with {len(config.SYMBOLS)} pairs and {len(self.strategies)} strategies.")
 
-    def aggregate_signals(self, symbol, df):
+    def _timed(self, name, func, *args):
+        """Call func(*args), recording its wall time under startup_times[name]"""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.startup_times[name] = time.perf_counter() - start
+
+    def aggregate_signals(self, symbol, df, closed=None):
         """
         Run all strategies and aggregate votes.
+        closed: df without the forming bar (df itself when its newest bar has closed).
+        CLOSED_BARS strategies read it, and their votes are served from the signal
+        cache until the next bar closes; only newly computed votes are journaled.
+        Returns: (votes, details) where details is {strategy: (signal, confidence, weight)}
         """
         votes = {'BUY': 0.0, 'SELL': 0.0}
+        details = {}
         
         print(f"\n--- Analyzing {symbol} ---")
         
+        now = clock.now()
+        # One consistent set of weights for the whole vote, even if the optimizer publishes mid-cycle
+        weights = self.portfolio.snapshot()
+        closed = df if closed is None else closed
+        bar_time = int(closed.time[-1])
         for name, strategy in self.strategies.items():
-            weight = self.portfolio.get_strategy_weight(name)
-            signal, confidence = strategy.generate_signal(df, symbol=symbol)
+            weight = weights.get(name, 0.0)
+            vote = self.signal_cache.get(name, strategy, symbol, bar_time)
+            if vote is None:
+                frame = closed if strategy.depends_on == CLOSED_BARS else df
+                with REGISTRY.timer('strategy_seconds', strategy=name):
+                    vote = strategy.generate_signal(frame, symbol=symbol)
+                self.signal_cache.put(name, strategy, symbol, bar_time, vote)
+                # Every new vote (including abstentions) goes to the write-behind journal
+                if config.JOURNAL_SIGNALS:
+                    self.journal.log_signal(symbol, name, vote[0], vote[1], weight, timestamp=now)
+            signal, confidence = vote
+            details[name] = (signal, confidence, weight)
             
             if signal:
                 print(f"  > {name}: {signal} (Conf: {confidence:.2f}, Weight: {weight})")
                 votes[signal] += confidence * weight
-                
-                # Log signal to DB (optional optimization)
             else:
                 pass
                 # print(f"  > {name}: No Signal")
         
-        return votes
+        return votes, details
+
+    def handle_order_event(self, event):
+        """Apply the outcome of an order sent by the pipeline"""
+        context = event.context
+        self.telemetry.finish(context['trace'], event.status == FILLED)
+        REGISTRY.inc('orders_total', status=event.status)
+        if event.status == FILLED:
+            result = event.result
+            self.positions.resolve_pending(context['placeholder'], result.order, result.price)
+            trade_record = dict(context['trade'],
+                                ticket=result.deal, # Note: result.order provided, ensure deal info fetched if needed
+                                position_id=result.order, # Market orders open a position with the order's ticket
+                                entry_time=event.time,
+                                entry_price=result.price)
+            self.journal.log_trade(trade_record)
+        else:
+            reason = event.result.comment if event.result is not None else "no result"
+            print(f"  [Orders] {event.direction} {event.symbol} not filled ({reason})")
+            self.positions.resolve_pending(context['placeholder'])
+            # Give back the daily risk reserved when the order was submitted
+            self.risk_manager.update_daily_risk(-context['risk'])
 
     def run_cycle(self):
         """Single trading cycle"""
-        current_time = datetime.now()
+        current_time = clock.now()
+        self.broker.begin_cycle()
         
         # Daily Reset
         if current_time.hour == 0 and current_time.minute < 5:
             self.risk_manager.reset_daily_risk()
         
+        # Orders that finished after last cycle's drain. Handled before reconciling:
+        # a fill's trade row must exist before the sync consumes its entry deal.
+        for event in self.orders.drain():
+            self.handle_order_event(event)
+        
+        # Close out trades that exited since the last cycle. Pending journal writes
+        # (including the trades just logged) are flushed first so they can be matched;
+        # if they could not be written, the sync waits for a later cycle rather than
+        # move its cursor past entry deals that have no trade row yet.
+        with REGISTRY.timer('stage_seconds', stage='reconcile'):
+            if self.journal.flush():
+                self.reconciler.sync()
+            else:
+                print("  [Reconcile] Journal has unwritten trades. Sync skipped this cycle.")
+                REGISTRY.inc('reconcile_skipped_total')
+        
+        # One positions_get() per cycle; our own fills are added as they happen
+        with REGISTRY.timer('stage_seconds', stage='positions'):
+            self.positions.refresh()
+        
+        # Roll the correlation matrix forward if a new bar has closed
+        with REGISTRY.timer('stage_seconds', stage='correlation'):
+            self.correlation.refresh()
+        REGISTRY.set('symbols', len(config.SYMBOLS))
+        
         for symbol in config.SYMBOLS:
+            # 1. Get Data (for every symbol: regime labels must stay current even
+            #    for the pairs skipped below, e.g. USDJPY while it has a position)
+            df = self.data_handler.get_data(symbol)
+            if df is None:
+                continue
+            latest = df.latest()
+            tick = self.broker.symbol_info_tick(symbol)
+            # The newest row is still forming unless the broker clock has passed its close
+            forming = tick is None or tick.time < latest.time + timeframe_seconds(config.TIMEFRAME)
+            closed = df.head(len(df) - 1) if forming else df
+            # Stops and trade metrics read the indicators of the newest bar that has them (the
+            # forming row's are NaN unless the data handler computes forming_features); the
+            # price is the newest row's live close
+            bar = latest if not forming or self.data_handler.forming_features else closed.latest()
+            self.regime.update(symbol, closed)
+
             # 0. Check for existing positions
-            positions = mt5.positions_get(symbol=symbol)
-            if positions:
+            if self.positions.has_position(symbol):
                 print(f"  [Trade] Position already open for {symbol}. Skipping.")
                 continue
-
-            # 1. Get Data
-            df = self.data_handler.get_data(symbol)
-            if df is None:
+            if self.orders.is_pending(symbol):
+                print(f"  [Trade] Order still in flight for {symbol}. Skipping.")
                 continue
 
+            # Bar age is measured on the broker clock: latest tick vs. open of the forming bar
+            trace = self.telemetry.start(
+                symbol, latest.time, tick.time_msc if tick is not None else None
+            )
+
             # 1.5 News Filter
             # 1.5 News Filter
             # sentiment, safe_to_trade = self.news_handler.get_market_sentiment(symbol)
@@ -112,10 +276,13 @@ class TradingBot:
             
             # 2.5 Dynamic Portfolio Optimization (At the start of new hour)
             if is_new_hour and symbol == config.SYMBOLS[0]: # Run once per hour
-                self.portfolio.optimize_weights(self.db)
+                self.optimizer.run_in_background()
+                # Re-simulate sizing off the loop; cached until new closed trades arrive
+                self.sizer.run_in_background()
             
             # 3. Aggregate Signals
-            votes = self.aggregate_signals(symbol, df)
+            votes, vote_details = self.aggregate_signals(symbol, df, closed)
+            trace.mark('votes')
             
             # 4. Decision Logic
             winner = None
@@ -129,18 +296,17 @@ class TradingBot:
                 max_score = votes['SELL']
             
             # Threshold (e.g. 0.40 out of 1.0 total weight)
-            if winner and max_score > 0.40:
+            if winner and max_score > config.CONSENSUS_THRESHOLD:
                 print(f"  >>> CONSENSUS: {winner} with Score {max_score:.2f}")
+                risk_start = time.perf_counter()
                 
                 # 5. Risk Check
-                latest = df.iloc[-1]
-                vol_mult = 1.5
-                sl_distance = latest['atr'] * vol_mult
-                tp_distance = sl_distance * 2.0
+                sl_distance = bar['atr'] * config.SL_ATR_MULT
+                tp_distance = sl_distance * config.TP_SL_RATIO
                 
                 # Calculate Lots
                 lots = self.risk_manager.calculate_position_size(
-                    symbol, sl_distance, confidence=max_score
+                    symbol, sl_distance, confidence=max_score, strategy='Ensemble'
                 )
                 
                 if lots > 0:
@@ -153,9 +319,13 @@ class TradingBot:
                         print(f"  [News] Trade blocked: Negative signal but Positive Sentiment ({sentiment:.2f})")
                         continue
 
+                    # 5.55 Regime Judge (cached labels, no broker calls)
+                    if config.REGIME_FILTER and not self.judge.validate_signal(symbol, winner):
+                        continue
+
                     # 5.6 Check Correlation (Risk Management)
                     # Get ALL open positions to check against
-                    all_positions = mt5.positions_get()
+                    all_positions = self.positions.all()
                     if all_positions:
                         allowed = self.portfolio.check_correlation(
                             symbol, winner, all_positions, self.data_handler
@@ -164,54 +334,139 @@ class TradingBot:
                             print(f"  [Risk] Trade blocked due to High Correlation with existing positions.")
                             continue
 
-                     # 6. Execute
-                    result = self.executor.execute_trade(
-                        symbol, winner, lots, 
-                        # price=0, # Removed as not supported by signature
-                        sl=latest['close'] - sl_distance if winner == 'BUY' else latest['close'] + sl_distance,
-                        tp=latest['close'] + tp_distance if winner == 'BUY' else latest['close'] - tp_distance,
+                    # 5.7 Portfolio VaR / ES limit on the whole book including this trade
+                    account = self.broker.account_info()
+                    if account:
+                        sized_lots, var_report = self.risk_gate.adjust(
+                            symbol, winner, lots, all_positions, account.equity
+                        )
+                        if sized_lots <= 0:
+                            print(f"  [Risk] Trade blocked: portfolio VaR limit ({var_report.get('limit', 0):.2f})")
+                            continue
+                        if sized_lots < lots:
+                            print(f"  [Risk] Size reduced {lots} -> {sized_lots} to stay within portfolio VaR")
+                            lots = sized_lots
+
+                        # 5.8 Net currency exposure caps (e.g. long EURUSD + long GBPUSD = short USD twice)
+                        allowed, projected = self.exposure.check(symbol, winner, lots, account.equity)
+                        if not allowed:
+                            legs = ", ".join(f"{ccy} {amount:,.0f}" for ccy, amount in projected.items())
+                            print(f"  [Risk] Trade blocked: currency exposure cap ({legs})")
+                            continue
+
+                    trace.mark('risk')
+                    REGISTRY.observe('stage_seconds', time.perf_counter() - risk_start, stage='risk')
+                    trace.direction = winner
+                    trace.reference_price = float(latest['close'])
+
+                     # 6. Execute (validated now, sent by the order pipeline)
+                    sl_price = latest['close'] - sl_distance if winner == 'BUY' else latest['close'] + sl_distance
+                    tp_price = latest['close'] + tp_distance if winner == 'BUY' else latest['close'] - tp_distance
+                    risk = config.BASE_RISK_PER_TRADE * max_score
+                    # Held in the book until it fills, so later symbols' checks count it
+                    placeholder = self.positions.add_pending(
+                        symbol, winner, lots, config.MAGIC_NUMBER, latest['close']
+                    )
+                    # 7. Trade record, completed with fill details when the order event arrives
+                    trade_record = {
+                        'symbol': symbol,
+                        'strategy': 'Ensemble',
+                        'direction': winner,
+                        'sl': float(sl_price), # Needed to express outcomes in R for sizing
+                        'tp': float(tp_price),
+                        'volume': lots,
+                        'confidence': max_score,
+                        'regime': 'Dynamic',
+                        'status': 'OPEN',
+                        'metrics': {
+                            'z_score': bar.get('z_score', 0),
+                            'rsi': bar.get('rsi', 0),
+                            'sentiment': sentiment,
+                            'atr': bar.get('atr', 0)
+                        },
+                        'votes': vote_details
+                    }
+                    submit_start = time.perf_counter()
+                    accepted, reason = self.orders.submit(
+                        symbol, winner, lots,
+                        sl=sl_price,
+                        tp=tp_price,
                         strategy_name="Ensemble",
-                        confidence=max_score
+                        confidence=max_score,
+                        context={'placeholder': placeholder, 'trade': trade_record, 'risk': risk, 'trace': trace},
+                        trace=trace
                     )
-                    
-                    if result and result.retcode == mt5.TRADE_RETCODE_DONE:
-                        # 7. Log Trade
-                        trade_record = {
-                            'ticket': result.deal, # Note: result.order provided, ensure deal info fetched if needed
-                            'symbol': symbol,
-                            'strategy': 'Ensemble',
-                            'direction': winner,
-                            'entry_time': datetime.now(),
-                            'entry_price': result.price,
-                            'sl': 0.0, # logged from request if available
-                            'tp': 0.0,
-                            'volume': lots,
-                            'confidence': max_score,
-                            'regime': 'Dynamic',
-                            'status': 'OPEN',
-                            'metrics': {
-                                'z_score': latest.get('z_score', 0),
-                                'rsi': latest.get('rsi', 0),
-                                'sentiment': sentiment,
-                                'atr': latest.get('atr', 0)
-                            }
-                        }
-                        self.db.log_trade(trade_record)
-                        self.risk_manager.update_daily_risk(config.BASE_RISK_PER_TRADE * max_score)
+                    REGISTRY.observe('stage_seconds', time.perf_counter() - submit_start, stage='execution')
+                    if not accepted:
+                        REGISTRY.inc('orders_total', status='REJECTED')
+                        self.positions.resolve_pending(placeholder)
+                        print(f"  [Orders] {symbol} rejected before sending: {reason}")
+                        continue
+                    self.risk_manager.update_daily_risk(risk)
                 else:
                     print("  [Risk] Trade rejected (Size 0)")
             else:
-                print(f"  [Wait] No consensus for {symbol} (Winner: {winner} score {max_score:.2f} < 0.40)")
+                print(f"  [Wait] No consensus for {symbol} (Winner: {winner} score {max_score:.2f} < {config.CONSENSUS_THRESHOLD:.2f})")
+
+        # Collect fills; anything slower is picked up at the start of the next cycle
+        with REGISTRY.timer('stage_seconds', stage='execution'):
+            for event in self.orders.drain(timeout=config.ORDER_DRAIN_TIMEOUT):
+                self.handle_order_event(event)
 
     def start(self):
         print("System Started. Press Ctrl+C to stop.")
+        self.metrics.start()
+        if self.profiler:
+            self.profiler.start()
         try:
             while True:
+                cycle_start = time.perf_counter()
                 self.run_cycle()
+                cycle_seconds = time.perf_counter() - cycle_start
+                self.journal.log_metric('cycle_seconds', cycle_seconds)
+                REGISTRY.observe('cycle_seconds', cycle_seconds)
+                
+                # Fresh read: the cycle's cached account may predate price moves
+                self.broker.invalidate_account()
+                account = self.broker.account_info()
+                if account:
+                    self.equity.sample(account.equity)
+                    print(f"[Equity] {self.equity.summary()}")
+                    self.equity.checkpoint_if_due()
+                
+                if clock.now().minute == 0:
+                    for symbol, stats in self.telemetry.summary().items():
+                        p50, p95, p99 = stats.get('total_ms', (float('nan'),) * 3)
+                        slip = stats.get('slippage_points', (float('nan'),) * 3)
+                        ref = stats.get('reference_slippage_points', (float('nan'),) * 3)
+                        print(f"[Exec] {symbol}: {stats['orders']} orders, fill rate {stats['fill_rate']:.0%} | "
+                              f"latency p50/p95/p99 {p50:.0f}/{p95:.0f}/{p99:.0f} ms | "
+                              f"slippage {slip[0]:.1f}/{slip[1]:.1f}/{slip[2]:.1f} pts "
+                              f"(vs close {ref[0]:.1f}/{ref[1]:.1f}/{ref[2]:.1f})")
+                
+                for field, (hits, misses, ratio) in self.broker.stats().items():
+                    self.journal.log_metric(f'broker_cache_{field}_hit_ratio', ratio)
+                    REGISTRY.set('broker_cache_hit_ratio', ratio, field=field)
+                skip_ratio = self.signal_cache.skip_ratio()
+                self.journal.log_metric('signal_cache_skip_ratio', skip_ratio)
+                REGISTRY.set('signal_cache_skip_ratio', skip_ratio)
+                REGISTRY.set('journal_pending', self.journal.pending())
+                self.metrics.write()
                 print("\n[Sleep] Waiting 60 seconds...")
                 time.sleep(60)
         except KeyboardInterrupt:
             print("Stopping...")
+            if self.profiler:
+                self.profiler.stop()
+                self.profiler.dump()
+                print(f"[Profiler] Top frames: {self.profiler.top(5)}")
+            self.metrics.stop()
+            self.orders.close()
+            for event in self.orders.drain():
+                self.handle_order_event(event)
+            self.equity.checkpoint()
+            self.journal.close()
+            self.db.close()
             mt5.shutdown()
 
 if __name__ == "__main__":
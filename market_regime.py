@@ -1,9 +1,109 @@
-import MetaTrader5 as mt5
-import pandas as pd
-import pandas_ta as ta
+from collections import namedtuple
+
+import numpy as np
+
+import config
+from utils.metrics import REGISTRY
+
+# Labels of one symbol at its last closed bar
+Regime = namedtuple('Regime', ['bar_time', 'state', 'adx', 'vol_percentile', 'bias', 'daily_change'])
+
+
+class RegimeEngine:
+    """
+    Regime labels for every symbol, computed together from the shared bar store.
+
+    run_cycle hands over each symbol's closed-bar frame with update(); its
+    tail is copied into preallocated (symbols x window) arrays only when a
+    new bar has closed. The next get() recomputes all symbols in one
+    vectorized pass:
+    - state: TRENDING / RANGING from the ADX of the last closed bar
+    - vol_percentile: rank of volatility_20 within the window, 0..1
+    - bias: UP / DOWN / FLAT, last close vs. the open of its day
+    Lookups are then a dict read; no broker calls. run_cycle updates every
+    symbol each cycle, including those it skips for trading.
+    """
+    features = ('adx', 'volatility_20')  # Indicators update() reads from the frames
+
+    def __init__(self, symbols=None, window=config.REGIME_WINDOW):
+        self.symbols = list(symbols or config.SYMBOLS)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        shape = (len(self.symbols), window)
+        # Right-aligned: the newest closed bar is column -1; missing history stays NaN / -1
+        self._adx = np.full(shape, np.nan)
+        self._vol = np.full(shape, np.nan)
+        self._open = np.full(shape, np.nan)
+        self._close = np.full(shape, np.nan)
+        self._time = np.full(shape, -1, dtype=np.int64)
+        self._dirty = False
+        self._regimes = {}
+
+    def update(self, symbol, frame):
+        """Take `symbol`'s closed bars (BarFrame without the forming bar). Returns True if a new bar was stored."""
+        i = self.index.get(symbol)
+        if i is None or len(frame) == 0:
+            return False
+        bar_time = int(frame.time[-1])
+        if bar_time == self._time[i, -1]:
+            return False
+        n = min(len(frame), self.window)
+        for target, column in ((self._adx, 'adx'), (self._vol, 'volatility_20'),
+                               (self._open, 'open'), (self._close, 'close')):
+            target[i, :-n] = np.nan
+            target[i, -n:] = frame[column][-n:]
+        self._time[i, :-n] = -1
+        self._time[i, -n:] = frame.time[-n:]
+        self._dirty = True
+        return True
+
+    @REGISTRY.timed('stage_seconds', stage='regime')
+    def refresh(self):
+        """Recompute the labels of every symbol if any received a new bar"""
+        if not self._dirty:
+            return
+        adx = self._adx[:, -1]
+        vol = self._vol
+        last_vol = vol[:, -1:]
+        # Rank like percentile_of_last, ignoring the NaN padding
+        with np.errstate(invalid='ignore', divide='ignore'):
+            less = np.count_nonzero(vol < last_vol, axis=1)
+            equal = np.count_nonzero(vol == last_vol, axis=1)
+            vol_percentile = (less + (equal + 1) / 2) / np.count_nonzero(np.isfinite(vol), axis=1)
+        vol_percentile[np.isnan(last_vol[:, 0])] = np.nan
+
+        # Open of the first bar of the last closed bar's day
+        last_time = self._time[:, -1]
+        day_start = last_time - last_time % 86400
+        first = np.argmax(self._time >= day_start[:, None], axis=1)
+        daily_open = self._open[np.arange(len(self.symbols)), first]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change = self._close[:, -1] / daily_open - 1.0
+
+        state = np.where(adx > config.REGIME_ADX_TREND, "TRENDING", "RANGING")
+        state[np.isnan(adx)] = "UNKNOWN"
+        bias = np.where(change > config.REGIME_BIAS_THRESHOLD, "UP",
+                        np.where(change < -config.REGIME_BIAS_THRESHOLD, "DOWN", "FLAT"))
+        bias[np.isnan(change)] = "UNKNOWN"
+
+        self._regimes = {
+            symbol: Regime(int(last_time[i]), str(state[i]), float(adx[i]), float(vol_percentile[i]),
+                           str(bias[i]), float(change[i]))
+            for symbol, i in self.index.items() if last_time[i] >= 0
+        }
+        self._dirty = False
+
+    def get(self, symbol):
+        """Regime of `symbol` at its last closed bar, or None before its first update"""
+        if self._dirty:
+            self.refresh()
+        return self._regimes.get(symbol)
+
 
 class MarketRegime:
-    def __init__(self):
+    """The regime 'judge': label lookups and the USDJPY confirmation, all served by a RegimeEngine"""
+    def __init__(self, engine):
+        self.engine = engine
         # We watch these pairs to confirm USD strength/weakness
         self.correlations = {
             "USDJPY": "Direct",   # If USD is strong, this goes UP
@@ -15,70 +115,34 @@ class MarketRegime:
     def get_market_state(self, symbol):
         """
         Returns 'TRENDING' or 'RANGING' using ADX (Average Directional Index).
+        ADX > 25 usually indicates a strong trend; below 20 a sleeping/choppy market.
         """
-        # Get 50 candles of H1 data to calculate trend strength
-        rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_H1, 0, 50)
-        
-        if rates is None or len(rates) < 50:
-            return "UNKNOWN"
-        
-        df = pd.DataFrame(rates)
-        # Calculate ADX with length 14
-        try:
-            adx_df = ta.adx(df['high'], df['low'], df['close'], length=14)
-            if adx_df is None or adx_df.empty:
-                return "UNKNOWN"
-                
-            current_adx = adx_df['ADX_14'].iloc[-1]
-            
-            # ADX > 25 usually indicates a strong trend. 
-            # ADX < 20 indicates a sleeping/choppy market.
-            if current_adx > 25:
-                return "TRENDING"
-            else:
-                return "RANGING"
-        except Exception as e:
-            print(f"   ⚠️ Error calculating ADX: {e}")
-            return "UNKNOWN"
+        regime = self.engine.get(symbol)
+        return regime.state if regime else "UNKNOWN"
 
 
     def get_trend(self, symbol):
-        """Returns 'UP', 'DOWN', or 'FLAT' based on simple Price vs Open"""
-        tick = mt5.symbol_info_tick(symbol)
-        if not tick:
-            return "UNKNOWN"
-        
-        # Simple Logic: Is current price above the daily open?
-        # (For a real system, we'd use moving averages here too)
-        rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_D1, 0, 1)
-        if rates is None: return "UNKNOWN"
-        
-        daily_open = rates[0]['open']
-        current_price = tick.bid
-
-        change = (current_price - daily_open) / daily_open
-        
-        if change > 0.001: return "UP"
-        if change < -0.001: return "DOWN"
-        return "FLAT"
+        """Returns 'UP', 'DOWN', or 'FLAT': last close vs. the daily open"""
+        regime = self.engine.get(symbol)
+        return regime.bias if regime else "UNKNOWN"
 
 
     def validate_signal(self, proposed_pair, signal_type):
         """
         Validates EURUSD trade against USDJPY.
         """
-        if "USD" not in proposed_pair: return True 
+        if "USD" not in proposed_pair: return True
 
         print(f"   [Judge] Validating {signal_type} signal on {proposed_pair}...")
 
         jpy_trend = self.get_trend("USDJPY")
-        
+
         if signal_type == "BUY":
             # Buy EURUSD = Weak Dollar = USDJPY should be DOWN or FLAT
             if jpy_trend == "UP":
                 print(f"   ❌ REJECTED: USDJPY is Rising (Dollar Strong). Unsafe to Buy EUR.")
                 return False
-        
+
         elif signal_type == "SELL":
             # Sell EURUSD = Strong Dollar = USDJPY should be UP or FLAT
             if jpy_trend == "DOWN":
@@ -86,4 +150,4 @@ class MarketRegime:
                 return False
 
         print(f"   ✅ CONFIRMED: Regime supports trade (USDJPY is {jpy_trend}).")
-        return True
\ No newline at end of file
+        return True
@@ -16,6 +16,7 @@ import pandas_ta as ta
 from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestClassifier
 import warnings
+from utils.metrics import REGISTRY, MetricsExporter
 warnings.filterwarnings('ignore')
 
 # === CONFIGURATION ===
@@ -240,17 +241,20 @@ class ProfessionalTradingSystem:
         Aggregate all strategy signals with weights
         This is similar to Renaissance's multi-signal approach
         """
-        df = self.get_market_data(symbol)
+        with REGISTRY.timer('stage_seconds', stage='fetch'):
+            df = self.get_market_data(symbol)
         if df is None or len(df) < 200:
             return None
         
         signals = {}
         
         # Run all strategies
-        signals['stat_arb'] = self.strategy_statistical_arbitrage(df)
-        signals['momentum'] = self.strategy_momentum_breakout(df)
-        signals['volatility'] = self.strategy_volatility_regime(df)
-        signals['ml'] = self.strategy_ml_ensemble(df)
+        for name, strategy in (('stat_arb', self.strategy_statistical_arbitrage),
+                               ('momentum', self.strategy_momentum_breakout),
+                               ('volatility', self.strategy_volatility_regime),
+                               ('ml', self.strategy_ml_ensemble)):
+            with REGISTRY.timer('strategy_seconds', strategy=name):
+                signals[name] = strategy(df)
         
         # Weighted voting system
         buy_score = 0
@@ -369,6 +373,8 @@ class ProfessionalTradingSystem:
         print("\n=== PROFESSIONAL MULTI-STRATEGY SYSTEM ACTIVE ===\n")
         
         last_check = {}
+        exporter = MetricsExporter()
+        exporter.start()
         
         while True:
             try:
@@ -390,9 +396,13 @@ class ProfessionalTradingSystem:
                     
                     if result:
                         direction, confidence, df = result
-                        self.execute_trade(symbol, direction, confidence, df)
+                        with REGISTRY.timer('stage_seconds', stage='execution'):
+                            self.execute_trade(symbol, direction, confidence, df)
                         last_check[symbol] = current_time
                 
+                REGISTRY.observe('cycle_seconds', (datetime.now() - current_time).total_seconds())
+                exporter.write()
+                
                 # Performance reporting
                 if current_time.minute == 0:  # Every hour
                     equity = mt5.account_info().equity
@@ -0,0 +1,63 @@
+"""
+Replay TradingBot over recorded bars for one or many parameter sets.
+
+    python -m replay --bars 6000
+    python -m replay --params sets.json --workers 8 --commission 7
+
+sets.json is a list of config overrides, either plain dicts or
+{"name": "...", "params": {...}}. Each run leaves <out>/<name>.db (same
+schema as the live trading_history.db). A summary of all runs goes to
+<out>/results.json.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import offline
+from replay.harness import run_many
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accelerated replay of TradingBot")
+    parser.add_argument("--params", help="JSON file with a list of parameter sets")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--data", default=offline.DEFAULT_PATH)
+    parser.add_argument("--bars", type=int, default=None, help="Use only the last N bars")
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--out", default="replay_runs")
+    parser.add_argument("--cycle-minute", type=int, default=1,
+                        help="Minute of the hour each cycle runs at (0 also retrains ML / reoptimizes hourly)")
+    parser.add_argument("--spread", type=float, default=1.0, help="Multiplier on recorded spreads")
+    parser.add_argument("--slippage", type=float, default=0.0, help="Adverse slippage per fill, in points")
+    parser.add_argument("--commission", type=float, default=0.0, help="Commission per lot per side")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    param_sets = [{'name': 'baseline', 'params': {}}]
+    if args.params:
+        with open(args.params) as f:
+            param_sets = json.load(f)
+
+    results = run_many(
+        param_sets, workers=args.workers, data=args.data, bars=args.bars, warmup=args.warmup,
+        out_dir=args.out, cycle_minute=args.cycle_minute, spread_multiplier=args.spread,
+        slippage_points=args.slippage, commission_per_lot=args.commission, verbose=args.verbose,
+    )
+
+    print(f"{'run':<20} {'trades':>7} {'win%':>6} {'net pnl':>12} {'max DD':>7} {'sharpe':>7} {'bars/s':>8} {'sym-bars/s':>10}")
+    ranked = sorted(results, key=lambda r: r.get('net_pnl', float('-inf')), reverse=True)
+    for r in ranked:
+        if 'error' in r:
+            print(f"{r['name']:<20} ERROR {r['error']}")
+            continue
+        win = f"{r['win_rate']:.0%}" if r['win_rate'] is not None else "-"
+        print(f"{r['name']:<20} {r['closed_trades']:>7} {win:>6} {r['net_pnl']:>12,.2f} "
+              f"{r['max_drawdown']:>7.2%} {r['sharpe']:>7.2f} {r['bars_per_second']:>8.1f} "
+              f"{r['symbol_bars_per_second']:>10.1f}")
+    print(f"Results: {args.out}/results.json")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.offline import OfflineTerminal, TIMEFRAME_SECONDS
+
+SWAP_TRIPLE_WEEKDAY = 2  # Wednesday's rollover books three days of swap
+
+
+class SimulatedBroker(OfflineTerminal):
+    """
+    OfflineTerminal that moves through history on a virtual clock.
+
+    step(i) advances to the close of bar i of the timeline. Before the bot
+    sees the new bar, every open position is marked through it:
+    - SL/TP hits on the bar's range. Long positions close on the bid, short
+      ones on the ask (bid + spread). If one bar touches both, the stop is
+      assumed to fill first. A gap through the level fills at the bar's open.
+    - swap at each midnight rollover, tripled on Wednesdays.
+    Closes are written as DEAL_ENTRY_OUT deals carrying profit, swap and
+    commission, so the DealReconciler books them like real exits.
+
+    Fills happen at bid/ask with optional spread scaling, adverse slippage
+    and per-lot commission. The clock reads `cycle_minute` minutes into the
+    following bar, matching the live loop's first cycle after a close.
+
+    Like OfflineTerminal, this module must not import config (or anything
+    that does): it is installed as MetaTrader5 before config is loaded.
+    """
+    def __init__(self, rates, timeline=None, cycle_minute=1, spread_multiplier=1.0,
+                 slippage_points=0.0, commission_per_lot=0.0, **kwargs):
+        super().__init__(rates, **kwargs)
+        # Bars of all symbols are matched by time, so recordings with gaps still line up
+        self.timeline = timeline if timeline is not None else rates[next(iter(rates))]['time']
+        self.cycle_offset = TIMEFRAME_SECONDS[self.timeframe] + cycle_minute * 60
+        self.spread_multiplier = spread_multiplier
+        self.slippage_points = slippage_points
+        self.commission_per_lot = commission_per_lot
+        self.cursor = 0
+        self._bar_time = int(self.timeline[0])
+        self._indexes = {}
+
+    # === Clock ===
+
+    def now(self):
+        return self._bar_time + self.cycle_offset
+
+    def clock(self):
+        """Naive server-time datetime, for utils.clock.set_source"""
+        return datetime.fromtimestamp(self.now(), timezone.utc).replace(tzinfo=None)
+
+    def _index(self, symbol):
+        index = self._indexes.get(symbol)
+        if index is None:
+            times = self.rates[symbol]['time']
+            index = max(int(np.searchsorted(times, self._bar_time, side='right')) - 1, 0)
+            self._indexes[symbol] = index
+        return index
+
+    def step(self, cursor):
+        """Advance to the close of timeline bar `cursor`, settling positions through it"""
+        previous_day = self.clock().date()
+        self.cursor = cursor
+        self._bar_time = int(self.timeline[cursor])
+        self._indexes.clear()
+
+        for ticket in list(self.positions):
+            self._check_stops(self.positions[ticket])
+        if self.clock().date() != previous_day:
+            self._rollover(previous_day)
+
+    # === Costs ===
+
+    def _spread(self, bar):
+        return int(round(int(bar['spread']) * self.spread_multiplier))
+
+    def _fill_price(self, symbol, tick, is_buy):
+        slip = self.slippage_points * self.symbol_info(symbol).point
+        return tick.ask + slip if is_buy else tick.bid - slip
+
+    def _commission(self, volume):
+        return -self.commission_per_lot * volume
+
+    # === Position lifecycle ===
+
+    def _check_stops(self, pos):
+        bars = self.rates[pos.symbol]
+        index = self._index(pos.symbol)
+        bar = bars[index]
+        if int(bar['time']) <= pos.time - TIMEFRAME_SECONDS[self.timeframe]:
+            return  # Opened at this bar's close; its range is already history
+        spread = self._spread(bar) * self.symbol_info(pos.symbol).point
+        is_buy = pos.type == self.POSITION_TYPE_BUY
+        # Longs exit on the bid (bar prices); shorts on the ask
+        offset = 0.0 if is_buy else spread
+        open_, high, low = bar['open'] + offset, bar['high'] + offset, bar['low'] + offset
+
+        price = None
+        if pos.sl:
+            if is_buy and low <= pos.sl:
+                price = min(pos.sl, open_)
+            elif not is_buy and high >= pos.sl:
+                price = max(pos.sl, open_)
+        if price is None and pos.tp:
+            if is_buy and high >= pos.tp:
+                price = max(pos.tp, open_)
+            elif not is_buy and low <= pos.tp:
+                price = min(pos.tp, open_)
+        if price is not None:
+            close_time = int(bar['time']) + TIMEFRAME_SECONDS[self.timeframe]
+            self.close_position(pos.ticket, float(price), close_time)
+
+    def _rollover(self, day):
+        days = 3 if day.weekday() == SWAP_TRIPLE_WEEKDAY else 1
+        for ticket, pos in self.positions.items():
+            info = self.symbol_info(pos.symbol)
+            points = info.swap_long if pos.type == self.POSITION_TYPE_BUY else info.swap_short
+            swap = points * info.trade_tick_value * pos.volume * days
+            self.positions[ticket] = pos._replace(swap=pos.swap + swap)
+
+    def close_position(self, ticket, price, when=None):
+        """Close a position at `price`, book the OUT deal and settle the balance"""
+        pos = self.positions.pop(ticket)
+        info = self.symbol_info(pos.symbol)
+        move = price - pos.price_open if pos.type == self.POSITION_TYPE_BUY else pos.price_open - price
+        profit = move / info.trade_tick_size * info.trade_tick_value * pos.volume
+        commission = self._commission(pos.volume)
+        self.balance += profit + pos.swap + commission
+        self._deal(pos, self.DEAL_ENTRY_OUT, price, when or self.now(),
+                   profit=profit, swap=pos.swap, commission=commission)
+
+    def account_info(self):
+        info = super().account_info()
+        swap = sum(pos.swap for pos in self.positions.values())
+        return info._replace(equity=info.equity + swap, profit=info.profit + swap,
+                             margin_free=info.margin_free + swap)
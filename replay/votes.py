@@ -0,0 +1,78 @@
+import pandas as pd
+
+from strategies.base import LIVE
+from strategies.ml_ensemble import MLEnsembleStrategy
+from strategies.signal_cache import SignalCache
+from sweep.engine import STRATEGIES, VOL_RANK_WINDOW
+
+# Rule-based strategy -> feature columns its vectorized signals() takes, in order
+INPUTS = {name: columns for name, (_, columns) in STRATEGIES.items()}
+
+
+class ReplayVotes(SignalCache):
+    """
+    SignalCache for replay: each strategy's votes are computed once per symbol
+    for every bar of the recording, then looked up by bar time.
+
+    Replay cycles run after a bar's close, so the newest bar a strategy sees
+    has always closed and its vote depends only on (symbol, bar time,
+    parameters), whatever the strategy's depends_on. The rule-based
+    strategies run their vectorized signals() over the full feature columns
+    of ReplayDataHandler (volatility_20's rank over the same window
+    get_data serves, as in sweep); the ML ensemble scores all bars in one
+    forest pass and again after every retrain (model_version is part of
+    params_hash). LIVE strategies and an untrained model still run per call.
+
+    Votes served from here are not journaled to the signals table; trades
+    still record their votes in trade_votes.
+    """
+    def __init__(self, data_handler):
+        super().__init__()
+        self.data = data_handler
+        self._series = {}  # (name, symbol) -> (params_hash, bar times, direction, confidence)
+
+    def get(self, name, strategy, symbol, bar_time):
+        series = self._series_of(name, strategy, symbol)
+        if series is None:
+            self._count(name, 'bypass')
+            return None
+        times, direction, confidence = series[1:]
+        i = int(times.searchsorted(bar_time))
+        if i == len(times) or times[i] != bar_time:
+            self._count(name, 'miss')
+            return None
+        self._count(name, 'hit')
+        return strategy._vote(direction[i], confidence[i])
+
+    def put(self, name, strategy, symbol, bar_time, vote):
+        pass  # Votes come from the precomputed series
+
+    def clear(self):
+        super().clear()
+        self._series.clear()
+
+    def _series_of(self, name, strategy, symbol):
+        if strategy.depends_on == LIVE or symbol not in self.data.broker.rates:
+            return None
+        if isinstance(strategy, MLEnsembleStrategy):
+            if strategy.model is None:
+                return None
+        elif name not in INPUTS:
+            return None
+        params = strategy.params_hash()
+        series = self._series.get((name, symbol))
+        if series is not None and series[0] == params:
+            return series
+
+        frame = self.data._full(symbol, frozenset(strategy.features))
+        if isinstance(strategy, MLEnsembleStrategy):
+            direction, confidence = strategy.signals(frame.matrix(strategy.feature_cols))
+        else:
+            columns = {column: frame[column] for column in INPUTS[name] if column in frame}
+            if 'vol_percentile' in INPUTS[name]:
+                # Same statistic as percentile_of_last over get_data's window
+                columns['vol_percentile'] = pd.Series(frame['volatility_20']).rolling(
+                    VOL_RANK_WINDOW, min_periods=1).rank(pct=True).to_numpy()
+            direction, confidence = strategy.signals(*(columns[column] for column in INPUTS[name]))
+        series = self._series[(name, symbol)] = (params, frame.time.copy(), direction, confidence)
+        return series
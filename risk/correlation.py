@@ -0,0 +1,174 @@
+import MetaTrader5 as mt5
+import threading
+import numpy as np
+import config
+
+
+class RollingCorrelation:
+    """
+    Rolling correlation of log returns for a fixed set of symbols.
+
+    The engine keeps a ring buffer of the last `window` aligned return rows,
+    plus running sums S = sum(r) and P = sum(r r^T). When a new bar closes,
+    the row leaving the window is subtracted and the new one added. The full
+    N x N covariance and correlation matrices are rebuilt from these sums in
+    O(N^2), without rescanning the window. They are recomputed exactly from
+    the buffer once per window so floating-point drift can't build up.
+
+    refresh() should be called once per cycle. It makes one copy_rates call
+    per symbol for the last two closed bars and re-seeds from history on the
+    first call or after a gap.
+    """
+    def __init__(self, symbols=None, window=config.CORRELATION_WINDOW, timeframe=config.TIMEFRAME):
+        self.symbols = list(symbols or config.SYMBOLS)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.timeframe = timeframe
+        self._lock = threading.Lock()
+        n = len(self.symbols)
+        self._buffer = np.zeros((window, n))
+        self._head = 0
+        self._count = 0
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._last_close = None
+        self._last_time = None
+        self._updates_since_exact = 0
+        self._cov = None
+        self._corr = None
+
+    @property
+    def ready(self):
+        return self._corr is not None and self._count >= 2
+
+    # === Feeding ===
+
+    def refresh(self):
+        """Pull the latest closed bar for every symbol and roll the window forward if it is new"""
+        latest = {}
+        for symbol in self.symbols:
+            # pos=1 skips the forming bar
+            rates = mt5.copy_rates_from_pos(symbol, self.timeframe, 1, 2)
+            if rates is None or len(rates) < 2:
+                return False
+            latest[symbol] = rates
+
+        times = {int(rates[-1]['time']) for rates in latest.values()}
+        if len(times) != 1:
+            return False  # Symbols disagree on the last closed bar; wait for them to align
+        bar_time = times.pop()
+
+        if self._last_time is None:
+            return self.bootstrap()
+        if bar_time == self._last_time:
+            return False
+        previous = {int(rates[0]['time']) for rates in latest.values()}
+        if previous != {self._last_time}:
+            return self.bootstrap()  # Missed bars (restart, disconnect): re-seed from history
+
+        closes = np.array([latest[symbol][-1]['close'] for symbol in self.symbols], dtype=float)
+        self.update(bar_time, closes)
+        return True
+
+    def bootstrap(self):
+        """Seed the window from history, aligning bars on time across all symbols"""
+        frames = {}
+        for symbol in self.symbols:
+            rates = mt5.copy_rates_from_pos(symbol, self.timeframe, 1, self.window + 1)
+            if rates is None or len(rates) < 3:
+                print(f"[Correlation] Not enough history for {symbol}")
+                return False
+            frames[symbol] = dict(zip(rates['time'].astype(np.int64).tolist(), rates['close'].tolist()))
+
+        common = sorted(set.intersection(*(set(frame) for frame in frames.values())))
+        if len(common) < 3:
+            return False
+        closes = np.array([[frames[s][t] for s in self.symbols] for t in common])
+        self.seed(common, closes)
+        print(f"[Correlation] Seeded {len(self.symbols)} symbols with {self._count} aligned returns")
+        return True
+
+    def seed(self, times, closes):
+        """Reset from a (T x N) array of aligned closes"""
+        returns = np.diff(np.log(closes), axis=0)[-self.window:]
+        with self._lock:
+            self._buffer[:] = 0.0
+            self._buffer[:len(returns)] = returns
+            self._count = len(returns)
+            self._head = self._count % self.window
+            self._last_close = closes[-1].copy()
+            self._last_time = int(times[-1])
+            self._recompute_exact()
+
+    def update(self, bar_time, closes):
+        """Add one aligned bar (closes ordered like self.symbols). O(N^2)."""
+        with self._lock:
+            r = np.log(closes / self._last_close)
+            if self._count == self.window:
+                old = self._buffer[self._head]
+                self._sum -= old
+                self._cross -= np.outer(old, old)
+            else:
+                self._count += 1
+            self._buffer[self._head] = r
+            self._head = (self._head + 1) % self.window
+            self._sum += r
+            self._cross += np.outer(r, r)
+            self._last_close = closes.copy()
+            self._last_time = int(bar_time)
+
+            self._updates_since_exact += 1
+            if self._updates_since_exact >= self.window:
+                self._recompute_exact()
+            else:
+                self._rebuild_matrices()
+
+    def _recompute_exact(self):
+        data = self.returns()
+        self._sum = data.sum(axis=0)
+        self._cross = data.T @ data
+        self._updates_since_exact = 0
+        self._rebuild_matrices()
+
+    def _rebuild_matrices(self):
+        n = self._count
+        if n < 2:
+            self._cov = self._corr = None
+            return
+        cov = (self._cross - np.outer(self._sum, self._sum) / n) / (n - 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr = np.nan_to_num(corr)
+        np.fill_diagonal(corr, 1.0)
+        self._cov = cov
+        self._corr = corr
+
+    # === Lookups ===
+
+    def get(self, symbol_a, symbol_b):
+        """Correlation of two symbols' returns, or None if either is not tracked"""
+        i, j = self.index.get(symbol_a), self.index.get(symbol_b)
+        if i is None or j is None or self._corr is None:
+            return None
+        return float(self._corr[i, j])
+
+    def matrix(self):
+        """Returns: (symbols, N x N correlation matrix)"""
+        with self._lock:
+            return list(self.symbols), None if self._corr is None else self._corr.copy()
+
+    def covariance(self):
+        """Returns: (symbols, N x N covariance matrix of per-bar log returns)"""
+        with self._lock:
+            return list(self.symbols), None if self._cov is None else self._cov.copy()
+
+    def last_closes(self):
+        """Closes of the last aligned bar, ordered like self.symbols"""
+        return self._last_close
+
+    def returns(self):
+        """Window of aligned log returns in time order, shape (count x N)"""
+        if self._count < self.window:
+            return self._buffer[:self._count].copy()
+        return np.roll(self._buffer, -self._head, axis=0)
@@ -0,0 +1,168 @@
+import math
+from array import array
+from utils import clock
+
+TRADING_DAYS = 252
+
+
+class EquityTracker:
+    """
+    Streaming equity curve and daily performance.
+
+    Each sample updates the day's return, peak and max drawdown in O(1).
+    The sample is appended to a compact in-memory array and queued to the
+    equity_curve table through the journal. When the day changes, the
+    finished day goes into daily_stats. Its return also feeds a running
+    Welford mean/variance of daily returns, which gives the Sharpe ratio
+    without re-reading any history. The Welford state is stored in
+    sync_state so it survives restarts, together with the last day folded
+    into it. A day left open by a restart (checkpointed, but the bot was down
+    at midnight) is closed into the state when the tracker loads.
+    """
+    STATE_KEYS = ('equity.days', 'equity.mean', 'equity.m2')
+    CLOSED_KEY = 'equity.closed_through'  # ISO date of the last day folded into the Welford state
+    CHECKPOINT_SECONDS = 3600
+
+    def __init__(self, db, journal=None):
+        self.db = db
+        self.journal = journal
+        # Today's curve: epoch seconds and equity, 8 bytes per value
+        self.times = array('d')
+        self.values = array('d')
+        self.day = None
+        self.equity_start = None
+        self.equity_last = None
+        self.peak = None
+        self.max_drawdown = 0.0
+
+        # Welford accumulator over completed daily returns
+        days, mean, m2 = (db.get_sync_state(key, 0) for key in self.STATE_KEYS)
+        self.days = int(days)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+        self.closed_through = db.get_sync_state(self.CLOSED_KEY)
+        self.last_checkpoint = None
+        self._close_missed_days(clock.now().date())
+
+    def _close_missed_days(self, today):
+        """Fold checkpointed days before `today` that were never closed (restart after midnight)"""
+        rows = self.db.get_daily_returns(after=self.closed_through, before=today.isoformat())
+        if self.closed_through is None and self.days:
+            # State saved before closed_through existed: its days are already folded in
+            rows = []
+            last = self.db.get_daily_returns(before=today.isoformat())
+            self.closed_through = last[-1][0] if last else None
+        for day, daily_return in rows:
+            self.days, self.mean, self.m2 = self._welford(self.days, self.mean, self.m2, daily_return or 0.0)
+            self.closed_through = day
+        if rows:
+            print(f"[Equity] Closed {len(rows)} day(s) missed while stopped, through {self.closed_through}")
+        if self.closed_through is not None:
+            self.db.set_sync_state(self._state())
+
+    def _state(self):
+        state = dict(zip(self.STATE_KEYS, (self.days, self.mean, self.m2)))
+        state[self.CLOSED_KEY] = self.closed_through
+        return state
+
+    def sample(self, equity, now=None):
+        """Record one equity observation"""
+        now = now or clock.now()
+        if equity is None or equity <= 0:
+            return
+
+        if self.day != now.date():
+            if self.day is not None:
+                self._close_day()
+            self._open_day(now.date(), equity)
+
+        self.times.append(now.timestamp())
+        self.values.append(equity)
+        self.equity_last = equity
+        if equity > self.peak:
+            self.peak = equity
+        drawdown = (self.peak - equity) / self.peak
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+
+        if self.journal is not None:
+            self.journal.log_equity(now.timestamp(), equity)
+
+    def _open_day(self, day, equity):
+        # Chain days together so moves between the last and first sample count
+        start = self.equity_last if self.equity_last else equity
+        self.day = day
+        self.times = array('d')
+        self.values = array('d')
+        self.equity_start = start
+        self.peak = start
+        self.max_drawdown = 0.0
+
+        # Resume a day that was interrupted by a restart
+        row = self.db.get_daily_stats(day)
+        if row is not None and row[0]:
+            self.equity_start = row[0]
+            self.peak = max(row[0], row[1] or row[0])
+            self.max_drawdown = row[2] or 0.0
+
+    def daily_return(self):
+        if not self.equity_start:
+            return 0.0
+        return self.equity_last / self.equity_start - 1.0
+
+    def sharpe(self, include_today=False):
+        """Annualized Sharpe ratio of daily returns (risk-free rate taken as 0)"""
+        n, mean, m2 = self.days, self.mean, self.m2
+        if include_today and self.equity_start:
+            n, mean, m2 = self._welford(n, mean, m2, self.daily_return())
+        if n < 2:
+            return 0.0
+        std = math.sqrt(m2 / (n - 1))
+        if std == 0:
+            return 0.0
+        return mean / std * math.sqrt(TRADING_DAYS)
+
+    @staticmethod
+    def _welford(n, mean, m2, x):
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        return n, mean, m2
+
+    def _stats_row(self, sharpe):
+        count, wins = self.db.get_day_trade_counts(self.day)
+        return {
+            'date': self.day.isoformat(),
+            'equity_start': self.equity_start,
+            'equity_end': self.equity_last,
+            'daily_return': self.daily_return(),
+            'trades_count': count,
+            'win_rate': wins / count if count else 0.0,
+            'sharpe_ratio': sharpe,
+            'max_drawdown': self.max_drawdown
+        }
+
+    def checkpoint(self):
+        """Persist the day so far (safe to call at any time, e.g. hourly or on shutdown)"""
+        if self.day is None:
+            return
+        self.db.save_daily_stats(self._stats_row(self.sharpe(include_today=True)))
+        self.last_checkpoint = clock.now()
+
+    def checkpoint_if_due(self):
+        """checkpoint() if CHECKPOINT_SECONDS have passed since the last one (call every loop)"""
+        if (self.last_checkpoint is None
+                or (clock.now() - self.last_checkpoint).total_seconds() >= self.CHECKPOINT_SECONDS):
+            self.checkpoint()
+
+    def _close_day(self):
+        self.days, self.mean, self.m2 = self._welford(self.days, self.mean, self.m2, self.daily_return())
+        self.closed_through = self.day.isoformat()
+        self.db.save_daily_stats(self._stats_row(self.sharpe()), self._state())
+        print(f"[Equity] Closed {self.day}: Return {self.daily_return():+.2%} | "
+              f"Max DD {self.max_drawdown:.2%} | Sharpe {self.sharpe():.2f}")
+
+    def summary(self):
+        return (f"Equity {self.equity_last:,.2f} | Today {self.daily_return():+.2%} | "
+                f"DD {self.max_drawdown:.2%} | Sharpe {self.sharpe(include_today=True):.2f}")
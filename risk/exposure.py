@@ -0,0 +1,129 @@
+import threading
+from collections import defaultdict
+import config
+from utils.position_book import currency_legs, POSITION_BUY
+
+
+class CurrencyExposure:
+    """
+    Net notional exposure per currency across the whole book.
+
+    Every position is split into two legs using its contract size:
+    - long EURUSD 1 lot = +100,000 EUR and -100,000 x price USD
+    - short USDJPY 1 lot = -100,000 USD and +100,000 x price JPY
+
+    Legs are kept in native currency units. They are updated incrementally as
+    the PositionBook reports opens and closes (subscribe this object to it).
+    An order check touches only the two currencies of the candidate and
+    converts them to account currency with cached quotes: O(1) per order.
+    """
+    def __init__(self, broker, cap=config.MAX_CURRENCY_EXPOSURE):
+        self.broker = broker
+        self.cap = cap
+        self._lock = threading.Lock()
+        self._net = defaultdict(float)
+        self._legs = {}
+        self._account_currency = None
+        self._rate_symbols = {}
+
+    # === PositionBook listener ===
+
+    def add(self, pos):
+        legs = self._position_legs(pos.symbol, pos.type == POSITION_BUY, pos.volume, pos.price_open)
+        if legs is None:
+            return
+        with self._lock:
+            self._legs[pos.ticket] = legs
+            for currency, amount in legs:
+                self._net[currency] += amount
+
+    def remove(self, pos):
+        with self._lock:
+            legs = self._legs.pop(pos.ticket, None)
+            if legs is None:
+                return
+            for currency, amount in legs:
+                self._net[currency] -= amount
+
+    # === Legs and conversion ===
+
+    def _position_legs(self, symbol, is_buy, volume, price):
+        info = self.broker.symbol_info(symbol)
+        if info is None or not price:
+            return None
+        base, quote = currency_legs(symbol)
+        units = volume * info.trade_contract_size * (1.0 if is_buy else -1.0)
+        return ((base, units), (quote, -units * price))
+
+    def account_currency(self):
+        if self._account_currency is None:
+            account = self.broker.account_info()
+            if account is None:
+                return None
+            self._account_currency = account.currency
+        return self._account_currency
+
+    def rate(self, currency):
+        """Account-currency value of one unit of `currency`, or None if no quote is available"""
+        account = self.account_currency()
+        if currency == account:
+            return 1.0
+
+        # Remember which pair (direct or inverse) quotes this currency
+        candidates = self._rate_symbols.get(currency)
+        if candidates is None:
+            candidates = [(currency + account, False), (account + currency, True)]
+        for symbol, inverse in candidates:
+            tick = self.broker.symbol_info_tick(symbol, max_age_ms=config.EXPOSURE_RATE_MAX_AGE_MS)
+            if tick is None or not tick.bid or not tick.ask:
+                continue
+            self._rate_symbols[currency] = [(symbol, inverse)]
+            mid = (tick.bid + tick.ask) / 2
+            return 1.0 / mid if inverse else mid
+        return None
+
+    # === Queries ===
+
+    def net(self, currency):
+        """Net exposure in units of `currency` (positive = long)"""
+        return self._net.get(currency, 0.0)
+
+    def net_in_account(self):
+        """Returns: Dict {currency: net exposure in account currency}"""
+        with self._lock:
+            items = [(ccy, amount) for ccy, amount in self._net.items() if abs(amount) > 1e-9]
+        result = {}
+        for currency, amount in items:
+            rate = self.rate(currency)
+            if rate is not None:
+                result[currency] = amount * rate
+        return result
+
+    def check(self, symbol, direction, volume, equity):
+        """
+        Would this order push any currency beyond the cap?
+        Returns: (allowed, {currency: projected exposure in account currency})
+        """
+        tick = self.broker.symbol_info_tick(symbol, max_age_ms=config.EXPOSURE_RATE_MAX_AGE_MS)
+        if tick is None:
+            return True, {}
+        price = tick.ask if direction == "BUY" else tick.bid
+        legs = self._position_legs(symbol, direction == "BUY", volume, price)
+        if legs is None:
+            return True, {}
+
+        limit = self.cap * equity
+        projected = {}
+        allowed = True
+        for currency, amount in legs:
+            # The account currency is capped too: it is where one-sided USD bets show up
+            rate = self.rate(currency)
+            if rate is None:
+                continue
+            before = self.net(currency) * rate
+            after = (self.net(currency) + amount) * rate
+            projected[currency] = after
+            # Only block orders that grow the exposure beyond the cap
+            if abs(after) > limit and abs(after) > abs(before):
+                allowed = False
+        return allowed, projected
@@ -0,0 +1,191 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import config
+
+# Risk per trade (fraction of equity lost at -1R) evaluated for every strategy
+FRACTIONS = np.round(np.arange(0.0025, 0.0801, 0.0025), 4)
+DRAWDOWN_BINS = np.linspace(0.0, 1.0, 401)
+
+
+def _simulate_chunk(outcomes, fractions, n_paths, n_trades, block, ruin_drawdown, seed, batch=4096):
+    """
+    Worker: simulate n_paths block-bootstrapped equity paths for every fraction.
+    Paths are processed in batches to bound memory per worker.
+    Returns mergeable summaries: (log-growth sum, log-growth sum of squares,
+    ruin count, max-drawdown histogram) per fraction.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(outcomes)
+    block = max(1, min(block, n))
+    n_blocks = -(-n_trades // block)
+    floor = np.log(1.0 - ruin_drawdown)
+
+    growth_sum = np.zeros(len(fractions))
+    growth_sq = np.zeros(len(fractions))
+    ruined = np.zeros(len(fractions), dtype=np.int64)
+    dd_hist = np.zeros((len(fractions), len(DRAWDOWN_BINS) - 1), dtype=np.int64)
+
+    for done in range(0, n_paths, batch):
+        size = min(batch, n_paths - done)
+        starts = rng.integers(0, n - block + 1, size=(size, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block)).reshape(size, -1)[:, :n_trades]
+        r = outcomes[idx]
+
+        for k, f in enumerate(fractions):
+            # A -1R trade loses f of equity; anything worse than -100% is a wipe-out
+            step = np.log(np.clip(1.0 + f * r, 1e-12, None))
+            log_equity = np.cumsum(step, axis=1)
+            peak = np.maximum.accumulate(np.maximum(log_equity, 0.0), axis=1)
+            max_dd = 1.0 - np.exp((log_equity - peak).min(axis=1))
+            terminal = log_equity[:, -1]
+
+            growth_sum[k] += terminal.sum()
+            growth_sq[k] += (terminal * terminal).sum()
+            ruined[k] += (log_equity.min(axis=1) <= floor).sum()
+            dd_hist[k] += np.histogram(max_dd, bins=DRAWDOWN_BINS)[0]
+
+    return growth_sum, growth_sq, ruined, dd_hist
+
+
+def _hist_quantile(hist, q):
+    cdf = np.cumsum(hist) / max(hist.sum(), 1)
+    return float(DRAWDOWN_BINS[1:][np.searchsorted(cdf, q)])
+
+
+class MonteCarloSizer:
+    """
+    Risk-of-ruin and position-sizing simulator driven by realized trades.
+
+    Each closed trade becomes an R-multiple: the exit move divided by the
+    initial stop distance. Many equity paths are then resampled from those
+    outcomes with a block bootstrap, so streaks of wins and losses stay
+    together. Every candidate risk fraction is simulated, with chunks of
+    paths spread over a process pool. The result per strategy holds:
+    - drawdown quantiles
+    - risk of ruin
+    - the growth-optimal (full Kelly) fraction
+    - the largest fraction whose risk of ruin stays under MC_MAX_RISK_OF_RUIN,
+      expressed as a multiplier of full Kelly
+
+    Results are cached per strategy and recomputed only when new closed trades arrive.
+    """
+    def __init__(self, db, paths=config.MC_PATHS, trades_per_path=config.MC_TRADES_PER_PATH,
+                 block=config.MC_BLOCK_SIZE, workers=config.MC_WORKERS):
+        self.db = db
+        self.paths = paths
+        self.trades_per_path = trades_per_path
+        self.block = block
+        self.workers = workers or os.cpu_count() or 1
+        self.results = {}
+        self._cache_keys = {}
+        self._thread = None
+
+    # === Inputs ===
+
+    def load_outcomes(self):
+        """Returns: Dict {strategy: (R-multiples array, cache key)}"""
+        df = self.db.export_trades(
+            columns=['ticket', 'strategy', 'direction', 'entry_price', 'exit_price', 'sl', 'exit_time']
+        )
+        df = df[(df['sl'] > 0) & df['exit_price'].notna() & df['entry_price'].notna()]
+        if df.empty:
+            return {}
+        risk = (df['entry_price'] - df['sl']).abs()
+        sign = np.where(df['direction'] == 'BUY', 1.0, -1.0)
+        df = df.assign(r=sign * (df['exit_price'] - df['entry_price']) / risk)
+        df = df[np.isfinite(df['r'])].sort_values('exit_time')
+
+        outcomes = {}
+        for strategy, group in df.groupby('strategy'):
+            key = (len(group), group['ticket'].iloc[-1])
+            outcomes[strategy] = (group['r'].to_numpy(), key)
+        return outcomes
+
+    # === Simulation ===
+
+    def simulate(self, outcomes, seed=None):
+        """Run the full simulation for one array of R-multiples"""
+        seed = seed if seed is not None else int(time.time())
+        # A few chunks per worker keeps the pool busy if one finishes early
+        chunks = 1 if self.workers == 1 else self.workers * 4
+        per_chunk = -(-self.paths // chunks)
+        args = [
+            (outcomes, FRACTIONS, per_chunk, self.trades_per_path, self.block,
+             config.MC_RUIN_DRAWDOWN, seed + i)
+            for i in range(chunks)
+        ]
+        if chunks == 1:
+            parts = [_simulate_chunk(*args[0])]
+        else:
+            # Spawned, not forked: this runs on a thread of a multithreaded process, and a
+            # forked child could inherit locks held by the journal, order or metrics threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                parts = list(pool.map(_simulate_chunk, *zip(*args)))
+
+        total = per_chunk * chunks
+        growth_sum = sum(p[0] for p in parts)
+        growth_sq = sum(p[1] for p in parts)
+        ruined = sum(p[2] for p in parts)
+        dd_hist = sum(p[3] for p in parts)
+
+        mean_growth = growth_sum / total
+        growth_std = np.sqrt(np.maximum(growth_sq / total - mean_growth ** 2, 0.0))
+        risk_of_ruin = ruined / total
+
+        kelly_idx = int(np.argmax(mean_growth))
+        kelly = float(FRACTIONS[kelly_idx])
+        safe = np.where((risk_of_ruin <= config.MC_MAX_RISK_OF_RUIN) & (FRACTIONS <= kelly))[0]
+        optimal = float(FRACTIONS[safe[-1]]) if len(safe) and mean_growth[kelly_idx] > 0 else 0.0
+
+        wins = outcomes[outcomes > 0]
+        losses = outcomes[outcomes <= 0]
+        return {
+            'trades': len(outcomes),
+            'win_rate': len(wins) / len(outcomes),
+            'reward_risk': float(wins.mean() / -losses.mean()) if len(wins) and len(losses) and losses.mean() < 0 else None,
+            'kelly_fraction': kelly,
+            'optimal_fraction': optimal,
+            'kelly_multiplier': optimal / kelly if kelly > 0 else 0.0,
+            'risk_of_ruin': dict(zip(FRACTIONS.tolist(), risk_of_ruin.tolist())),
+            'drawdown': {
+                float(f): {q: _hist_quantile(dd_hist[k], q) for q in (0.5, 0.95, 0.99)}
+                for k, f in enumerate(FRACTIONS)
+            },
+            'growth': dict(zip(FRACTIONS.tolist(), zip(mean_growth.tolist(), growth_std.tolist())))
+        }
+
+    def run(self):
+        """Recompute every strategy whose closed trades changed since the last run"""
+        for strategy, (outcomes, key) in self.load_outcomes().items():
+            if len(outcomes) < config.MC_MIN_TRADES or self._cache_keys.get(strategy) == key:
+                continue
+            started = time.perf_counter()
+            result = self.simulate(outcomes)
+            self.results[strategy] = result  # Single assignment: readers see old or new, never partial
+            self._cache_keys[strategy] = key
+            print(f"[MonteCarlo] {strategy}: {result['trades']} trades | "
+                  f"Kelly {result['kelly_fraction']:.2%} -> use {result['optimal_fraction']:.2%} "
+                  f"(x{result['kelly_multiplier']:.2f}) | "
+                  f"RoR {result['risk_of_ruin'].get(result['optimal_fraction'], 0):.2%} "
+                  f"| {time.perf_counter() - started:.1f}s")
+
+    def run_in_background(self):
+        """Start run() on a worker thread unless one is already in progress"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run_safely, name="monte-carlo", daemon=True)
+        self._thread.start()
+
+    def _run_safely(self):
+        try:
+            self.run()
+        except Exception as e:
+            print(f"[MonteCarlo] Simulation failed: {e}")
+
+    def get(self, strategy):
+        return self.results.get(strategy)
@@ -0,0 +1,134 @@
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+import config
+from utils import clock
+
+
+def shrink_covariance(returns):
+    """
+    Ledoit-Wolf shrinkage of the sample covariance towards a scaled identity.
+    returns: (T x S) array. Returns: (S x S) covariance.
+    """
+    t, s = returns.shape
+    x = returns - returns.mean(axis=0)
+    sample = x.T @ x / t
+    mu = np.trace(sample) / s
+    target = mu * np.eye(s)
+    d2 = ((sample - target) ** 2).sum()
+    # Average squared distance of single-observation outer products from the sample
+    b2 = ((x ** 2).T @ (x ** 2)).sum() / t - (sample ** 2).sum()
+    b2 = min(max(b2 / t, 0.0), d2)
+    shrinkage = b2 / d2 if d2 > 0 else 1.0
+    return shrinkage * target + (1 - shrinkage) * sample
+
+
+def risk_parity(cov, iterations=500, tol=1e-10):
+    """Long-only weights with equal risk contribution w_i (cov w)_i"""
+    n = cov.shape[0]
+    w = 1.0 / np.sqrt(np.diag(cov))
+    w /= w.sum()
+    for _ in range(iterations):
+        contrib = w * (cov @ w)
+        target = contrib.sum() / n
+        updated = w * np.sqrt(target / np.maximum(contrib, 1e-18))
+        updated /= updated.sum()
+        if np.abs(updated - w).max() < tol:
+            return updated
+        w = updated
+    return w
+
+
+def mean_variance(mean, cov):
+    """Long-only tangency-style weights: cov^-1 mu with negatives clipped, or None if nothing is positive"""
+    raw = np.linalg.solve(cov, mean)
+    raw = np.clip(raw, 0.0, None)
+    if raw.sum() <= 0:
+        return None
+    return raw / raw.sum()
+
+
+class WeightOptimizer:
+    """
+    Strategy weights from the daily returns each strategy's votes earned.
+
+    The (days x strategies) matrix comes from a single grouped SQL query. The
+    solve is a shrinkage covariance plus a mean-variance step (risk parity
+    when no strategy has a positive mean, or if configured), all in NumPy, so dozens of strategies over years of days take
+    milliseconds. It runs on a background thread and hands the result to
+    PortfolioManager.publish_weights, which swaps the whole dict at once.
+    """
+    def __init__(self, db, portfolio, method=config.OPTIMIZER_METHOD):
+        self.db = db
+        self.portfolio = portfolio
+        self.method = method
+        self._thread = None
+
+    def solve(self, returns):
+        """
+        returns: DataFrame (days x strategies).
+        Returns: Dict {strategy: weight} normalized to 1.0 over all configured strategies
+        """
+        data = returns.to_numpy(dtype=float)
+        # A strategy that (almost) never voted on a trade has a near-zero variance and would
+        # look risk-free to the solver; leave it out so it keeps its prior share
+        active = ((np.count_nonzero(data, axis=0) >= config.OPTIMIZER_MIN_TRADE_DAYS)
+                  & (data.var(axis=0) >= config.OPTIMIZER_MIN_VARIANCE))
+        names = [name for name, keep in zip(returns.columns, active) if keep]
+        data = data[:, active]
+
+        solved = {}
+        if names:
+            cov = shrink_covariance(data)
+            # Keep the matrix invertible when two strategies' returns are collinear
+            cov += np.eye(len(names)) * max(np.trace(cov) / len(names), 1e-12) * 1e-6
+            weights = None
+            if self.method == "mean_variance":
+                weights = mean_variance(data.mean(axis=0), cov)
+            if weights is None:
+                # Nothing earned a positive expected return (or risk parity requested)
+                weights = risk_parity(cov)
+            solved = dict(zip(names, weights))
+
+        # Blend with the configured prior; strategies without history keep their prior share
+        base = config.STRATEGY_WEIGHTS
+        base_total = sum(base.values())
+        covered = sum(base.get(name, 0.0) for name in names) / base_total if base_total else 0.0
+        blend = config.OPTIMIZER_BLEND
+        result = {}
+        for name, prior in base.items():
+            prior /= base_total
+            if name in solved:
+                result[name] = (1 - blend) * prior + blend * solved[name] * covered
+            else:
+                result[name] = prior
+        total = sum(result.values())
+        return {name: w / total for name, w in result.items()}
+
+    def run(self):
+        since = clock.now().date() - timedelta(days=config.OPTIMIZER_LOOKBACK_DAYS)
+        returns = self.db.get_strategy_daily_returns(since)
+        if returns.empty or len(returns) < config.OPTIMIZER_MIN_DAYS:
+            # Not enough vote history yet: keep the win-rate heuristic
+            self.portfolio.optimize_weights(self.db)
+            return
+
+        started = time.perf_counter()
+        weights = self.solve(returns)
+        self.portfolio.publish_weights(weights)
+        print(f"[Optimizer] {self.method}: {returns.shape[1]} strategies x {returns.shape[0]} days "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def run_in_background(self):
+        """Start run() on a worker thread unless one is already in progress"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run_safely, name="weight-optimizer", daemon=True)
+        self._thread.start()
+
+    def _run_safely(self):
+        try:
+            self.run()
+        except Exception as e:
+            print(f"[Optimizer] Failed: {e}")
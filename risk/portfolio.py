@@ -1,21 +1,36 @@
 import config
 
+import numpy as np
+
 class PortfolioManager:
-    def __init__(self):
+    def __init__(self, correlation=None):
         self.weights = config.STRATEGY_WEIGHTS.copy() # Make a mutable copy
         self.active_strategies = list(self.weights.keys())
+        # Optional RollingCorrelation engine; when ready, checks are table lookups
+        self.correlation = correlation
         
     def get_strategy_weight(self, strategy_name):
         return self.weights.get(strategy_name, 0.0)
 
+    def snapshot(self):
+        """Current weights dict. It is replaced, never mutated, so it is safe to keep for a whole cycle."""
+        return self.weights
+
+    def publish_weights(self, new_weights):
+        """Swap in a complete set of weights in one assignment (safe from a background thread)"""
+        self.weights = dict(new_weights)
+        print("[Portfolio] New Weights Distribution:")
+        for name, w in self.weights.items():
+            print(f"   - {name}: {w:.1%}")
+
     def optimize_weights(self, db_handler):
         """
         Adjust weights based on realized performance (Win Rate).
         """
         print("[Portfolio] Optimizing strategy weights based on performance...")
         
-        # Get win rates (last 50 trades)
-        win_rates = db_handler.get_strategy_performance(lookback=50)
+        # Get win rates (rolling window per strategy, maintained incrementally)
+        win_rates = db_handler.get_strategy_performance()
         
         if not win_rates:
             print("[Portfolio] Not enough data to optimize. Keeping default weights.")
@@ -45,12 +60,7 @@ class PortfolioManager:
         # Normalize to sum to 1.0 (or slightly more/less depending on conviction?)
         # Let's normalize to 1.0 to keep total risk consistent
         if total_score > 0:
-            for name in new_weights:
-                self.weights[name] = new_weights[name] / total_score
-                
-        print("[Portfolio] New Weights Distribution:")
-        for name, w in self.weights.items():
-            print(f"   - {name}: {w:.1%}")
+            self.publish_weights({name: score / total_score for name, score in new_weights.items()})
     
     def check_correlation(self, new_symbol, new_direction, active_positions, data_handler):
         """
@@ -62,12 +72,7 @@ class PortfolioManager:
             
         print(f"[Risk] Checking correlation for {new_symbol} ({new_direction})...")
         
-        # Get data for new symbol
-        df_new = data_handler.get_data(new_symbol, lookback=100)
-        if df_new is None or df_new.empty:
-            print(f"  [Risk] No data for {new_symbol}, skipping correlation check (Allowing).")
-            return True
-            
+        df_new = None
         for pos in active_positions:
             active_symbol = pos.symbol
             active_direction = "BUY" if pos.type == 0 else "SELL" # 0=Buy, 1=Sell in MT5
@@ -76,24 +81,21 @@ class PortfolioManager:
             if active_symbol == new_symbol:
                 continue
                 
-            # Get data for active symbol
-            df_active = data_handler.get_data(active_symbol, lookback=100)
-            if df_active is None or df_active.empty:
-                continue
-                
-            # Align dataframes by index (time) to ensure we compare same candles
-            # Use inner join to only keep overlapping times
-            common_index = df_new.index.intersection(df_active.index)
-            
-            if len(common_index) < 50:
-                 # Not enough overlapping data
-                 continue
-                 
-            s1 = df_new.loc[common_index]['close']
-            s2 = df_active.loc[common_index]['close']
+            # Fast path: rolling return correlation maintained by the engine
+            correlation = None
+            if self.correlation is not None and self.correlation.ready:
+                correlation = self.correlation.get(new_symbol, active_symbol)
             
-            # Calculate Correlation
-            correlation = s1.corr(s2)
+            if correlation is None:
+                # Symbol not tracked by the engine: compute from fetched data
+                if df_new is None:
+                    df_new = data_handler.get_data(new_symbol, lookback=400, features=())
+                    if df_new is None or not len(df_new):
+                        print(f"  [Risk] No data for {new_symbol}, skipping correlation check (Allowing).")
+                        return True
+                correlation = self._fetch_correlation(df_new, active_symbol, data_handler)
+                if correlation is None:
+                    continue
             
             # Logic:
             # 1. High Positive Correlation (> 0.70)
@@ -113,3 +115,21 @@ class PortfolioManager:
                 return False
                 
         return True
+
+    def _fetch_correlation(self, df_new, active_symbol, data_handler):
+        """Correlation of log returns over the overlapping candles of two fetched series"""
+        # 400 bars: the EMA-200 warm-up is dropped by get_data, leaving ~200 usable
+        df_active = data_handler.get_data(active_symbol, lookback=400, features=())
+        if df_active is None or not len(df_active):
+            return None
+            
+        # Align on candle time so we compare the same bars
+        common, i1, i2 = np.intersect1d(df_new.time, df_active.time, assume_unique=True, return_indices=True)
+        
+        if len(common) < 50:
+            # Not enough overlapping data
+            return None
+            
+        r1 = np.diff(np.log(df_new['close'][i1]))
+        r2 = np.diff(np.log(df_active['close'][i2]))
+        return float(np.corrcoef(r1, r2)[0, 1])
@@ -1,10 +1,13 @@
-import MetaTrader5 as mt5
 import numpy as np
 import config
+from utils.broker_cache import BrokerStateCache
 
 class RiskManager:
-    def __init__(self, database):
+    def __init__(self, database, broker=None, sizer=None):
         self.db = database
+        self.broker = broker or BrokerStateCache()
+        # Optional MonteCarloSizer; replaces the default Kelly inputs once enough trades exist
+        self.sizer = sizer
         self.daily_risk_used = 0.0
         self._load_risk_state()
         
@@ -13,7 +16,7 @@ class RiskManager:
         # Converting absolute $ loss to % of equity
         try:
             realized_loss = self.db.get_today_risk()
-            account = mt5.account_info()
+            account = self.broker.account_info()
             if account and account.equity > 0:
                 self.daily_risk_used = realized_loss / account.equity
                 if self.daily_risk_used > 0:
@@ -24,7 +27,7 @@ class RiskManager:
     def check_daily_limits(self, potential_risk):
         """Check if trade exceeds max daily risk"""
         # Fetch available equity
-        account = mt5.account_info()
+        account = self.broker.account_info()
         if not account:
             return False
             
@@ -34,7 +37,7 @@ class RiskManager:
             
         return True
 
-    def calculate_position_size(self, symbol, sl_distance, confidence, win_rate=0.55):
+    def calculate_position_size(self, symbol, sl_distance, confidence, win_rate=0.55, strategy=None):
         """
         Calculate position size using Half-Kelly Criterion.
         
@@ -42,22 +45,30 @@ class RiskManager:
         where:
         p = probability of win (win_rate)
         b = odds received (reward_to_risk ratio)
+        
+        When the Monte Carlo sizer has a result for `strategy`, its simulated
+        ruin-constrained fraction is used instead of the default inputs.
         """
-        account = mt5.account_info()
+        account = self.broker.account_info()
         if not account:
             return 0.0
         
         balance = account.balance
         
-        # Reward to Risk (approximate target)
-        reward_risk_ratio = 2.0  # Conservative estimate, or dynamic based on TP/SL
-        
-        # Kelly Formula
-        # K = W - (1-W)/R
-        kelly_fraction = win_rate - (1 - win_rate) / reward_risk_ratio
-        
-        # Use Half-Kelly for safety
-        kelly_fraction *= 0.5
+        simulated = self.sizer.get(strategy) if self.sizer and strategy else None
+        if simulated:
+            # Largest risk fraction with acceptable risk of ruin on resampled realized trades
+            kelly_fraction = simulated['optimal_fraction']
+        else:
+            # Reward to Risk (approximate target)
+            reward_risk_ratio = 2.0  # Conservative estimate, or dynamic based on TP/SL
+            
+            # Kelly Formula
+            # K = W - (1-W)/R
+            kelly_fraction = win_rate - (1 - win_rate) / reward_risk_ratio
+            
+            # Use Half-Kelly for safety
+            kelly_fraction *= 0.5
         
         # Cap at max risk per trade (e.g., 2% absolute max even if Kelly says 10%)
         # And scale by confidence
@@ -69,7 +80,7 @@ class RiskManager:
         risk_amount = balance * risk_pct
         
         # Calculate Lots
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self.broker.symbol_info(symbol)
         if not symbol_info:
             return 0.0
             
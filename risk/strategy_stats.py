@@ -0,0 +1,113 @@
+import math
+import threading
+from collections import deque
+
+
+class RollingWindow:
+    """
+    Last N trade results with running count, wins, sum and sum of squares.
+    Adding a result is O(1): the value that falls out of the window is subtracted.
+    """
+    __slots__ = ('values', 'count', 'wins', 'total', 'total_sq')
+
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.count = 0
+        self.wins = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, pnl):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.count -= 1
+            self.wins -= old > 0
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(pnl)
+        self.count += 1
+        self.wins += pnl > 0
+        self.total += pnl
+        self.total_sq += pnl * pnl
+
+    def summary(self):
+        if self.count == 0:
+            return {'trades': 0, 'win_rate': 0.0, 'mean': 0.0, 'std': 0.0}
+        mean = self.total / self.count
+        var = max(self.total_sq / self.count - mean * mean, 0.0)
+        if self.count > 1:
+            var *= self.count / (self.count - 1)
+        return {
+            'trades': self.count,
+            'win_rate': self.wins / self.count,
+            'mean': mean,
+            'std': math.sqrt(var)
+        }
+
+
+class StrategyStats:
+    """
+    In-memory rolling performance per strategy and per (strategy, symbol).
+
+    A closed trade counts for every strategy that voted on it, with its P&L
+    negated for a vote against the trade. Results are loaded once from the
+    trade_attribution view at startup. After that, DatabaseHandler calls
+    record() each time a trade transitions to CLOSED, so reads cost O(strategies) no matter how large the history gets.
+    """
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._by_strategy = {}
+        self._by_symbol = {}
+
+    def load(self, conn, strategies):
+        """Seed the windows with the last N closed trades credited to each (strategy, symbol)"""
+        # trade_attribution (see database.py) credits each trade to the strategies that voted on it
+        query = '''
+        SELECT pnl FROM trade_attribution
+        WHERE strategy = ? AND symbol = ?
+        ORDER BY exit_time DESC
+        LIMIT ?
+        '''
+        for strategy, symbol in strategies:
+            rows = conn.execute(query, (strategy, symbol, self.window)).fetchall()
+            for (pnl,) in reversed(rows):
+                self._window(self._by_symbol, (strategy, symbol)).add(pnl)
+
+        # Strategy-level windows: newest N across all of that strategy's symbols
+        query = '''
+        SELECT pnl FROM trade_attribution
+        WHERE strategy = ?
+        ORDER BY exit_time DESC
+        LIMIT ?
+        '''
+        for strategy in {s for s, _ in strategies}:
+            rows = conn.execute(query, (strategy, self.window)).fetchall()
+            for (pnl,) in reversed(rows):
+                self._window(self._by_strategy, strategy).add(pnl)
+
+    def _window(self, table, key):
+        window = table.get(key)
+        if window is None:
+            window = table[key] = RollingWindow(self.window)
+        return window
+
+    def record(self, strategy, symbol, pnl):
+        """Account for one newly closed trade"""
+        with self._lock:
+            self._window(self._by_strategy, strategy).add(pnl)
+            self._window(self._by_symbol, (strategy, symbol)).add(pnl)
+
+    def win_rates(self):
+        with self._lock:
+            return {name: w.wins / w.count for name, w in self._by_strategy.items() if w.count}
+
+    def summary(self):
+        """
+        Returns: Dict {strategy: {trades, win_rate, mean, std, symbols: {symbol: {...}}}}
+        """
+        with self._lock:
+            result = {name: dict(w.summary(), symbols={}) for name, w in self._by_strategy.items()}
+            for (strategy, symbol), w in self._by_symbol.items():
+                result.setdefault(strategy, {'symbols': {}})['symbols'][symbol] = w.summary()
+            return result
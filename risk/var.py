@@ -0,0 +1,129 @@
+import math
+from statistics import NormalDist
+import numpy as np
+import config
+
+
+class PortfolioRiskGate:
+    """
+    Value-at-Risk / Expected Shortfall check for the whole book plus a candidate trade.
+
+    Open positions are mapped to an exposure vector over the correlation
+    engine's symbols, in account currency per unit log return. Two estimates
+    come from the engine's state:
+    - parametric: from the rolling covariance matrix
+    - historical: by replaying the window of aligned returns
+    Both are scaled to VAR_HORIZON_BARS.
+
+    If adding the candidate would push the larger of the two VaRs above
+    MAX_PORTFOLIO_VAR x equity, the candidate is scaled down to the largest
+    size that fits, or rejected. Trades that reduce book risk always pass.
+    Everything is a handful of small matrix products, so it can sit on the
+    order path.
+    """
+    def __init__(self, correlation, broker, confidence=config.VAR_CONFIDENCE,
+                 horizon=config.VAR_HORIZON_BARS, limit=config.MAX_PORTFOLIO_VAR):
+        self.correlation = correlation
+        self.broker = broker
+        self.confidence = confidence
+        self.horizon_scale = math.sqrt(horizon)
+        self.limit = limit
+        self.z = NormalDist().inv_cdf(confidence)
+        # ES multiplier for a normal distribution: phi(z) / (1 - alpha)
+        self.es_factor = math.exp(-0.5 * self.z ** 2) / math.sqrt(2 * math.pi) / (1 - confidence)
+        # Candidate sizes evaluated in one pass for the historical estimate
+        self.grid = np.linspace(0.0, 1.0, 21)
+
+    def _value_per_lot(self, symbol, price):
+        """Account-currency P&L of one lot for a 100% price move (so x log return = P&L)"""
+        info = self.broker.symbol_info(symbol)
+        if info is None or not info.trade_tick_size:
+            return None
+        return price * info.trade_tick_value / info.trade_tick_size
+
+    def exposure_vector(self, positions):
+        """Signed account-currency exposure per engine symbol; untracked symbols are skipped"""
+        index = self.correlation.index
+        prices = self.correlation.last_closes()
+        exposure = np.zeros(len(index))
+        for pos in positions:
+            i = index.get(pos.symbol)
+            if i is None:
+                continue
+            value = self._value_per_lot(pos.symbol, prices[i])
+            if value is None:
+                continue
+            exposure[i] += value * pos.volume * (1.0 if pos.type == 0 else -1.0)
+        return exposure
+
+    def measure(self, exposure, cov=None, returns=None):
+        """Returns: dict of parametric/historical VaR and ES (account currency, positive = loss)"""
+        if cov is None:
+            cov = self.correlation.covariance()[1]
+        if returns is None:
+            returns = self.correlation.returns()
+        sigma = math.sqrt(max(float(exposure @ cov @ exposure), 0.0)) * self.horizon_scale
+        pnl = returns @ exposure * self.horizon_scale
+        var_hist = -float(np.quantile(pnl, 1 - self.confidence))
+        tail = pnl[pnl <= -var_hist]
+        return {
+            'var_param': self.z * sigma,
+            'es_param': self.es_factor * sigma,
+            'var_hist': var_hist,
+            'es_hist': -float(tail.mean()) if len(tail) else var_hist
+        }
+
+    def adjust(self, symbol, direction, lots, positions, equity):
+        """
+        Returns: (allowed_lots, report). allowed_lots is `lots`, a smaller
+        step-rounded size that keeps the book within the limit, or 0.0.
+        """
+        engine = self.correlation
+        i = engine.index.get(symbol)
+        if not engine.ready or i is None or equity <= 0:
+            return lots, {'skipped': True}
+
+        value = self._value_per_lot(symbol, engine.last_closes()[i])
+        if value is None:
+            return lots, {'skipped': True}
+
+        cov = engine.covariance()[1]
+        returns = engine.returns()
+        book = self.exposure_vector(positions)
+        delta = np.zeros_like(book)
+        delta[i] = value * lots * (1.0 if direction == "BUY" else -1.0)
+
+        before = self.measure(book, cov, returns)
+        after = self.measure(book + delta, cov, returns)
+        limit = self.limit * equity
+        report = {'before': before, 'after': after, 'limit': limit}
+
+        worst_before = max(before['var_param'], before['var_hist'])
+        worst_after = max(after['var_param'], after['var_hist'])
+        if worst_after <= limit or worst_after <= worst_before:
+            return lots, report
+
+        # Largest fraction s of the candidate that keeps both estimates within the limit.
+        # Parametric: z^2 h (a + 2 s b + s^2 c) = L^2, solved for s.
+        h2 = self.horizon_scale ** 2
+        a = float(book @ cov @ book) * h2
+        b = float(book @ cov @ delta) * h2
+        c = float(delta @ cov @ delta) * h2
+        target = (limit / self.z) ** 2
+        disc = b * b - c * (a - target)
+        s_param = 0.0 if disc < 0 or c <= 0 else max(0.0, min(1.0, (-b + math.sqrt(disc)) / c))
+
+        # Historical: evaluate all grid sizes at once (window x grid)
+        pnl = (returns @ book)[:, None] + (returns @ delta)[:, None] * self.grid[None, :]
+        var_grid = -np.quantile(pnl * self.horizon_scale, 1 - self.confidence, axis=0)
+        fits = self.grid[var_grid <= limit]
+        s_hist = float(fits.max()) if len(fits) else 0.0
+
+        scale = min(s_param, s_hist)
+        info = self.broker.symbol_info(symbol)
+        step = info.volume_step if info else 0.01
+        allowed = math.floor(lots * scale / step) * step
+        if info and allowed < info.volume_min:
+            allowed = 0.0
+        report['scale'] = scale
+        return round(allowed, 8), report
@@ -1,29 +1,31 @@
-from .base import BaseStrategy
-import pandas as pd
+from .base import BaseStrategy, CLOSED_BARS
+import numpy as np
+from utils.bars import BarFrame
 
 class StatisticalArbitrageStrategy(BaseStrategy):
-    def __init__(self):
+    features = ('z_score', 'rsi')
+    depends_on = CLOSED_BARS
+
+    def __init__(self, z_entry=2.5, rsi_low=30, rsi_high=70, z_full=4.0):
         super().__init__("Statistical Arbitrage")
+        self.z_entry = z_entry  # |z-score| beyond which price is "extreme"
+        self.rsi_low = rsi_low
+        self.rsi_high = rsi_high
+        self.z_full = z_full  # |z-score| at which confidence reaches 1.0
+
+    def signals(self, z_score, rsi):
+        """
+        Vectorized rule over feature columns (arrays or scalars).
+        Returns: (direction, confidence)
+        """
+        # Extreme Oversold (Mean Reversion Long) / Extreme Overbought (Mean Reversion Short)
+        buy = (z_score < -self.z_entry) & (rsi < self.rsi_low)
+        sell = (z_score > self.z_entry) & (rsi > self.rsi_high)
+        direction = self._direction(buy, sell)
+        # Confidence scales with extremeness
+        confidence = np.where(direction != 0, np.minimum(np.abs(z_score) / self.z_full, 1.0), 0.0)
+        return direction, confidence
 
-    def generate_signal(self, df: pd.DataFrame, symbol: str = ""):
-        latest = df.iloc[-1]
-        
-        # Z-Score Logic
-        z_score = latest['z_score']
-        rsi = latest['rsi']
-        
-        signal = None
-        confidence = 0.0
-        
-        # Extreme Oversold (Mean Reversion Long)
-        if z_score < -2.5 and rsi < 30:
-            signal = "BUY"
-            # Confidence scales with extremeness
-            confidence = min(abs(z_score) / 4.0, 1.0) 
-            
-        # Extreme Overbought (Mean Reversion Short)
-        elif z_score > 2.5 and rsi > 70:
-            signal = "SELL"
-            confidence = min(abs(z_score) / 4.0, 1.0)
-            
-        return signal, confidence
+    def generate_signal(self, df: BarFrame, symbol: str = ""):
+        latest = df.latest()
+        return self._vote(*self.signals(latest['z_score'], latest['rsi']))
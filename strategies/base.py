@@ -1,17 +1,34 @@
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
+from utils.bars import BarFrame
+
+# Vectorized rules encode direction as +1 (BUY), -1 (SELL), 0 (no signal)
+DIRECTIONS = {1: "BUY", -1: "SELL"}
+
+# What a strategy's vote depends on (BaseStrategy.depends_on)
+CLOSED_BARS = "closed_bars"  # Only completed bars: the vote holds until the next bar closes
+FORMING_BAR = "forming_bar"  # Also the still-open bar, which changes every tick
+LIVE = "live"                # Ticks, news or other outside state
 
 class BaseStrategy(ABC):
+    # Indicator columns generate_signal reads (see utils.features); only these are computed for it
+    features = ()
+    # CLOSED_BARS strategies can vote on the frame without the forming bar, their votes
+    # then reused until the next close (see strategies.signal_cache). TradingBot only
+    # does so with config.SIGNALS_ON_CLOSED_BARS; otherwise they run as FORMING_BAR.
+    depends_on = FORMING_BAR
+
     def __init__(self, name):
         self.name = name
 
     @abstractmethod
-    def generate_signal(self, df: pd.DataFrame, symbol: str = ""):
+    def generate_signal(self, df: BarFrame, symbol: str = ""):
         """
-        Analyze the provided DataFrame and return a signal.
+        Analyze the provided bars and return a signal.
         
         Args:
-            df (pd.DataFrame): Market data with indicators.
+            df (BarFrame): Market data with indicators (read-only, shared by all strategies).
             symbol (str): The currency pair symbol (e.g. "EURUSD")
             
         Returns:
@@ -21,6 +38,16 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def params_hash(self):
+        """
+        Hash of the scalar attributes (thresholds, model version...), so a vote
+        cached under one parameter set is never served to another.
+        """
+        return hash(tuple(sorted(
+            (key, value) for key, value in vars(self).items()
+            if isinstance(value, (bool, int, float, str))
+        )))
+
     def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Optional: Strategy-specific indicator calculation.
@@ -28,3 +55,14 @@ class BaseStrategy(ABC):
         not provided by the main data handler.
         """
         return df
+
+    @staticmethod
+    def _vote(direction, confidence):
+        """Turn one row of a vectorized rule's output into the (signal, confidence) vote"""
+        signal = DIRECTIONS.get(int(direction))
+        return (signal, float(confidence)) if signal else (None, 0.0)
+
+    @staticmethod
+    def _direction(buy, sell):
+        """+1 where buy, -1 where sell (buy wins ties), 0 elsewhere; arrays or scalars"""
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
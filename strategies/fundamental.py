@@ -1,12 +1,14 @@
-import pandas as pd
-from .base import BaseStrategy
+from utils.bars import BarFrame
+from .base import BaseStrategy, LIVE
 
 class FundamentalStrategy(BaseStrategy):
+    depends_on = LIVE
+
     def __init__(self, news_handler):
         super().__init__("Fundamental Analysis")
         self.news_handler = news_handler
 
-    def generate_signal(self, df: pd.DataFrame, symbol: str = ""):
+    def generate_signal(self, df: BarFrame, symbol: str = ""):
         """
         Generates a signal based on news sentiment/LLM analysis.
         """
@@ -30,7 +32,7 @@ class FundamentalStrategy(BaseStrategy):
              
         return None, 0.0
 
-    def generate_signal_with_symbol(self, df: pd.DataFrame, symbol: str):
+    def generate_signal_with_symbol(self, df: BarFrame, symbol: str):
          # New method to support symbol
         sentiment, safe = self.news_handler.get_market_sentiment(symbol)
         
@@ -1,52 +1,60 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-import joblib
 import os
-from .base import BaseStrategy
+from .base import BaseStrategy, CLOSED_BARS
+from utils.metrics import REGISTRY
+from utils.bars import BarFrame
 
 class MLEnsembleStrategy(BaseStrategy):
+    features = ('rsi', 'macd', 'adx', 'volatility_20', 'z_score', 'log_returns')
+    depends_on = CLOSED_BARS
+
     def __init__(self, model_path="models/rf_model.pkl"):
         super().__init__("ML Ensemble")
         self.model_path = model_path
         self.model = None
-        self.feature_cols = ['rsi', 'macd', 'adx', 'volatility_20', 'z_score', 'log_returns']
+        self.feature_cols = list(self.features)
+        self.horizon = 4  # Bars ahead the target looks
+        self.model_version = 0  # Bumped on every load/fit; part of params_hash, so retraining invalidates cached votes
         self._load_model()
 
     def _load_model(self):
         if os.path.exists(self.model_path):
             try:
+                import joblib  # Unpickling also imports sklearn; only paid when a model exists
                 self.model = joblib.load(self.model_path)
+                self.model_version += 1
                 print(f"[ML] Loaded model from {self.model_path}")
             except Exception as e:
                 print(f"[ML] Failed to load model: {e}")
         else:
             print("[ML] No model found. Training required.")
 
-    def train_model(self, df: pd.DataFrame):
+    @REGISTRY.timed('stage_seconds', stage='ml_train')
+    def train_model(self, df: BarFrame):
         """
-        Train the model on provided data and save it.
+        Train the model on provided data and save it. The frame is only read.
         """
         print("[ML] Starting training...")
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        import joblib
         
-        # Prepare Target: 1 if price rises in next 4 periods, else 0
-        df['target'] = (df['close'].shift(-4) > df['close']).astype(int)
-        
-        # Drop NaNs created by shift and indicators
-        data = df.dropna()
+        # Prepare Target: 1 if price rises in next 4 periods, else 0.
+        # The last 4 bars have no known outcome yet and are left out.
+        close = df['close']
+        y = (close[self.horizon:] > close[:-self.horizon]).astype(np.int8)
         
-        if len(data) < 500:
+        if len(y) < 500:
             print("[ML] Insufficient data for training")
             return
             
-        X = data[self.feature_cols]
-        y = data['target']
+        X = df.matrix(self.feature_cols, slice(None, -self.horizon))
         
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
         
         self.model = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
         self.model.fit(X_train, y_train)
+        self.model_version += 1
         
         train_score = self.model.score(X_train, y_train)
         test_score = self.model.score(X_test, y_test)
@@ -58,26 +66,31 @@ class MLEnsembleStrategy(BaseStrategy):
         joblib.dump(self.model, self.model_path)
         print(f"[ML] Model saved to {self.model_path}")
 
-    def generate_signal(self, df: pd.DataFrame, symbol: str = ""):
+    def signals(self, features):
+        """
+        Vectorized rule over a (bars x feature_cols) matrix: one forest pass for all rows.
+        Returns: (direction, confidence)
+        """
+        probabilities = self.model.predict_proba(np.nan_to_num(features))
+        # The predicted class is the most probable one
+        prediction = self.model.classes_[probabilities.argmax(axis=1)]
+        confidence = probabilities.max(axis=1) # Raw probability
+        
+        # Map prob to confidence score
+        # If prob is 0.55, confidence is low. If 0.8, high.
+        # Scale (0.5, 1.0) -> (0.0, 1.0) ideally, or just use raw prob if > threshold
+        confident = confidence >= 0.55
+        direction = self._direction(confident & (prediction == 1), confident & (prediction != 1))
+        return direction, np.where(direction != 0, confidence, 0.0)
+
+    @REGISTRY.timed('stage_seconds', stage='ml_predict')
+    def generate_signal(self, df: BarFrame, symbol: str = ""):
         if self.model is None:
             return None, 0.0
             
-        latest_features = df[self.feature_cols].iloc[-1:].fillna(0)
-        
         try:
-            prediction = self.model.predict(latest_features)[0]
-            confidence = self.model.predict_proba(latest_features)[0].max() # Raw probability
-            
-            # Map prob to confidence score
-            # If prob is 0.55, confidence is low. If 0.8, high.
-            # Scale (0.5, 1.0) -> (0.0, 1.0) ideally, or just use raw prob if > threshold
-            
-            if confidence < 0.55:
-                return None, 0.0
-                
-            signal = "BUY" if prediction == 1 else "SELL"
-            
-            return signal, confidence
+            direction, confidence = self.signals(df.matrix(self.feature_cols, slice(-1, None)))
+            return self._vote(direction[0], confidence[0])
         except Exception as e:
             print(f"[ML] Prediction error: {e}")
             return None, 0.0
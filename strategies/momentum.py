@@ -1,34 +1,41 @@
-from .base import BaseStrategy
-import pandas as pd
+from .base import BaseStrategy, CLOSED_BARS
+import numpy as np
+from utils.bars import BarFrame
 
 class MomentumBreakoutStrategy(BaseStrategy):
-    def __init__(self):
+    features = ('ema_20', 'ema_50', 'ema_200', 'adx', 'macd', 'macd_signal')
+    depends_on = CLOSED_BARS
+
+    def __init__(self, adx_min=25, adx_full=60.0):
         super().__init__("Momentum Breakout")
+        self.adx_min = adx_min  # Trend strength required to trade
+        self.adx_full = adx_full  # ADX at which confidence reaches 1.0
 
-    def generate_signal(self, df: pd.DataFrame, symbol: str = ""):
-        latest = df.iloc[-1]
-        
+    def signals(self, ema_20, ema_50, ema_200, adx, macd, macd_signal):
+        """
+        Vectorized rule over feature columns (arrays or scalars).
+        Returns: (direction, confidence)
+        """
         # Trend Consensus
-        ema_bullish = latest['ema_20'] > latest['ema_50'] > latest['ema_200']
-        ema_bearish = latest['ema_20'] < latest['ema_50'] < latest['ema_200']
-        
+        ema_bullish = (ema_20 > ema_50) & (ema_50 > ema_200)
+        ema_bearish = (ema_20 < ema_50) & (ema_50 < ema_200)
+
         # Trend Strength
-        strong_trend = latest['adx'] > 25
-        
+        strong_trend = adx > self.adx_min
+
         # MACD Confirmation
-        macd_bullish = latest['macd'] > latest['macd_signal'] and latest['macd'] > 0
-        macd_bearish = latest['macd'] < latest['macd_signal'] and latest['macd'] < 0
-        
-        signal = None
-        confidence = 0.0
-        
-        if ema_bullish and strong_trend and macd_bullish:
-            signal = "BUY"
-            # Confidence increases with ADX strength
-            confidence = min(latest['adx'] / 60.0, 1.0)
-            
-        elif ema_bearish and strong_trend and macd_bearish:
-            signal = "SELL"
-            confidence = min(latest['adx'] / 60.0, 1.0)
-            
-        return signal, confidence
+        macd_bullish = (macd > macd_signal) & (macd > 0)
+        macd_bearish = (macd < macd_signal) & (macd < 0)
+
+        direction = self._direction(ema_bullish & strong_trend & macd_bullish,
+                                    ema_bearish & strong_trend & macd_bearish)
+        # Confidence increases with ADX strength
+        confidence = np.where(direction != 0, np.minimum(adx / self.adx_full, 1.0), 0.0)
+        return direction, confidence
+
+    def generate_signal(self, df: BarFrame, symbol: str = ""):
+        latest = df.latest()
+        return self._vote(*self.signals(
+            latest['ema_20'], latest['ema_50'], latest['ema_200'],
+            latest['adx'], latest['macd'], latest['macd_signal']
+        ))
@@ -0,0 +1,51 @@
+"""
+Per-bar memo of strategy votes.
+
+A CLOSED_BARS strategy sees the same input from one bar close to the next, so
+with 60-second polling on H1 its vote is recomputed ~60 times per bar for the
+same answer. Votes are kept per (strategy, symbol) together with the last
+closed bar time and the strategy's params_hash(); a lookup matching both is
+served from here. One entry per pair: a new bar simply replaces it.
+FORMING_BAR and LIVE strategies always run (counted as 'bypass'), and so do
+the bar-driven ones unless config.SIGNALS_ON_CLOSED_BARS moves them onto
+closed bars.
+"""
+from collections import Counter
+
+from utils.metrics import REGISTRY
+from .base import CLOSED_BARS
+
+
+class SignalCache:
+    def __init__(self):
+        self._votes = {}  # (name, symbol) -> (bar_time, params_hash, (signal, confidence))
+        self.counts = Counter()  # result -> evaluations
+
+    def get(self, name, strategy, symbol, bar_time):
+        """Cached (signal, confidence) for this closed bar, or None if the strategy must run"""
+        if strategy.depends_on != CLOSED_BARS:
+            self._count(name, 'bypass')
+            return None
+        entry = self._votes.get((name, symbol))
+        if entry is not None and entry[0] == bar_time and entry[1] == strategy.params_hash():
+            self._count(name, 'hit')
+            return entry[2]
+        self._count(name, 'miss')
+        return None
+
+    def put(self, name, strategy, symbol, bar_time, vote):
+        if strategy.depends_on == CLOSED_BARS:
+            self._votes[(name, symbol)] = (bar_time, strategy.params_hash(), vote)
+
+    def clear(self):
+        """Drop every cached vote (counts are kept)"""
+        self._votes.clear()
+
+    def skip_ratio(self):
+        """Fraction of all strategy evaluations served from cache"""
+        total = sum(self.counts.values())
+        return self.counts['hit'] / total if total else 0.0
+
+    def _count(self, name, result):
+        self.counts[result] += 1
+        REGISTRY.inc('signal_evaluations_total', strategy=name, result=result)
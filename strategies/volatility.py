@@ -1,41 +1,51 @@
-from .base import BaseStrategy
-import pandas as pd
+from .base import BaseStrategy, CLOSED_BARS
+import numpy as np
+from utils.bars import BarFrame, percentile_of_last
 
 class VolatilityRegimeStrategy(BaseStrategy):
-    def __init__(self):
+    features = ('bb_upper', 'bb_lower', 'rsi', 'volatility_20')
+    depends_on = CLOSED_BARS
+
+    def __init__(self, low_vol=0.30, high_vol=0.70, band_low=0.1, band_high=0.9,
+                 range_confidence=0.7, breakout_confidence=0.6):
         super().__init__("Volatility Regime")
+        self.low_vol = low_vol  # Volatility percentile below which the market is ranging
+        self.high_vol = high_vol  # ... and above which breakouts are traded
+        self.band_low = band_low  # Position within the Bollinger band (0 = lower, 1 = upper)
+        self.band_high = band_high
+        self.range_confidence = range_confidence
+        self.breakout_confidence = breakout_confidence
 
-    def generate_signal(self, df: pd.DataFrame, symbol: str = ""):
-        latest = df.iloc[-1]
-        
+    def signals(self, close, bb_upper, bb_lower, rsi, vol_percentile):
+        """
+        Vectorized rule over feature columns (arrays or scalars).
+        vol_percentile: rank of volatility_20 within the lookback window, 0..1
+        Returns: (direction, confidence)
+        """
         # Determine Regime
         # High vol = Mean Reversion failure risk, but Trend opportunity
         # Low vol = Mean Reversion opportunity (range trading)
-        
-        vol_percentile = df['volatility_20'].rank(pct=True).iloc[-1]
-        
-        bb_pos = (latest['close'] - latest['bb_lower']) / (latest['bb_upper'] - latest['bb_lower'])
-        
-        signal = None
-        confidence = 0.0
-        
-        # Low Volatilty Regime (Range Trading)
-        if vol_percentile < 0.30:
-            if bb_pos < 0.1: # Near lower band
-                signal = "BUY"
-                confidence = 0.7
-            elif bb_pos > 0.9: # Near upper band
-                signal = "SELL"
-                confidence = 0.7
-                
+        low_regime = vol_percentile < self.low_vol
+        high_regime = vol_percentile > self.high_vol
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bb_pos = (close - bb_lower) / (bb_upper - bb_lower)
+
+        # Low Volatility Regime (Range Trading): fade the bands
+        range_buy = low_regime & (bb_pos < self.band_low)
+        range_sell = low_regime & (bb_pos > self.band_high)
         # High Volatility Regime (Breakout/Trend continuation)
-        elif vol_percentile > 0.70:
-            price = latest['close']
-            if price > latest['bb_upper'] and latest['rsi'] > 50:
-                signal = "BUY" # Breakout Logc
-                confidence = 0.6
-            elif price < latest['bb_lower'] and latest['rsi'] < 50:
-                signal = "SELL"
-                confidence = 0.6
-                
-        return signal, confidence
+        breakout_buy = high_regime & (close > bb_upper) & (rsi > 50)
+        breakout_sell = high_regime & (close < bb_lower) & (rsi < 50)
+
+        direction = self._direction(range_buy | breakout_buy, range_sell | breakout_sell)
+        confidence = np.where(range_buy | range_sell, self.range_confidence,
+                              np.where(direction != 0, self.breakout_confidence, 0.0))
+        return direction, confidence
+
+    def generate_signal(self, df: BarFrame, symbol: str = ""):
+        latest = df.latest()
+        vol_percentile = percentile_of_last(df['volatility_20'])
+        return self._vote(*self.signals(
+            latest['close'], latest['bb_upper'], latest['bb_lower'], latest['rsi'], vol_percentile
+        ))
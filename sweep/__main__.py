@@ -0,0 +1,72 @@
+"""
+Sweep strategy thresholds, consensus threshold and stop / target distances.
+
+    python -m sweep                                  # DEFAULT_SPACE grid
+    python -m sweep --space space.json --random 100000 --workers 16
+
+space.json maps parameters to values, e.g.
+    {"statistical_arbitrage.z_entry": [2.0, 2.5, 3.0],
+     "momentum_breakout.adx_min": {"low": 15, "high": 35},
+     "CONSENSUS_THRESHOLD": {"low": 0.1, "high": 0.5},
+     "SL_ATR_MULT": [1.0, 1.5, 2.0]}
+Strategy parameters are "<strategy>.<constructor argument>"; the others are
+config settings. Winners go into config.STRATEGY_PARAMS / config.py.
+"""
+import argparse
+import json
+import os
+
+from benchmarks import offline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep with cached features")
+    parser.add_argument("--space", help="JSON file with the search space (default: engine.DEFAULT_SPACE)")
+    parser.add_argument("--random", type=int, default=0, help="Sample N configs instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", default=offline.DEFAULT_PATH)
+    parser.add_argument("--bars", type=int, default=None, help="Use only the last N bars")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta of each rung")
+    parser.add_argument("--rungs", type=int, default=3)
+    parser.add_argument("--objective", default="sqn", choices=("sqn", "total_r", "expectancy", "profit_factor"))
+    parser.add_argument("--min-trades", type=int, default=30)
+    parser.add_argument("--horizon", type=int, default=500, help="Max bars a trade is held")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", default="sweep_results.json")
+    args = parser.parse_args()
+
+    rates, source = offline.load(args.data, count=args.bars)
+    # config (imported by the strategies too) needs MetaTrader5; the offline
+    # terminal also supplies point sizes
+    terminal = offline.install(rates)
+    import config
+    from sweep import engine
+
+    space = engine.DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = engine.random_search(space, args.random, args.seed) if args.random else engine.grid(space)
+    for params in configs[:1]:
+        engine.split_params(params)  # Fail on a misspelt parameter before any work is done
+
+    points = {symbol: terminal.symbol_info(symbol).point for symbol in rates}
+    features = engine.build_features(rates, points)
+    print(f"[Sweep] {len(configs)} configs, {len(rates)} symbols, data {source}, features {features}")
+
+    defaults = {key: getattr(config, key) for key in engine.SETTINGS}
+    rows = engine.run_sweep(
+        configs, features, config.STRATEGY_WEIGHTS, defaults, workers=args.workers, eta=args.eta,
+        rungs=args.rungs, objective=args.objective, min_trades=args.min_trades, horizon=args.horizon,
+    )
+    print(engine.table(rows, args.top))
+
+    with open(args.out, "w") as f:
+        json.dump({'data': source, 'objective': args.objective, 'space': space, 'results': rows},
+                  f, indent=1, default=str)
+    print(f"Results: {os.path.abspath(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
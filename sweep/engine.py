@@ -0,0 +1,408 @@
+"""
+Parameter sweep over the rule-based strategies, the consensus threshold and
+the stop / target distances.
+
+Work is layered so each config costs only what is specific to it:
+1. Features: add_features() runs once per symbol over the whole history and
+   is cached on disk (keyed by a hash of the bars), so later sweeps over the
+   same data skip pandas_ta entirely.
+2. Votes: each strategy's vectorized signals() runs once per distinct set of
+   its own parameters. A grid of 3 x 3 x 3 strategy settings costs 9 rule
+   evaluations, not 27.
+3. Outcomes: a triple-barrier exit (stop, target, or time limit) is computed
+   for every bar and both directions once per (SL_ATR_MULT, TP_SL_RATIO).
+4. Per config: sum the cached votes, apply the threshold, and walk the
+   entries of each symbol, skipping those that fall while a position is open
+   (the bot holds one position per symbol).
+
+Configs are scored in R (multiples of the stop distance, after spread).
+Successive halving prunes them. Every config is scored on the first
+1/eta**(rungs-1) of the history; only the top 1/eta of each rung moves on to
+a history eta times longer.
+
+Scope: the ML ensemble and the fundamental vote abstain (their weights
+still count in STRATEGY_WEIGHTS, as when they don't vote live). Sizing and
+the correlation / VaR / exposure gates are not modelled. Use replay to
+check the shortlisted configs against the full bot.
+"""
+import bisect
+import hashlib
+import itertools
+import os
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from strategies.arbitrage import StatisticalArbitrageStrategy
+from strategies.momentum import MomentumBreakoutStrategy
+from strategies.volatility import VolatilityRegimeStrategy
+
+FEATURE_VERSION = 1  # Bump when add_features() or the cached columns change
+CACHE_DIR = "sweep_cache"
+VOL_RANK_WINDOW = 800  # get_data's 1000 bars less the EMA-200 warm-up it drops
+WARMUP_BARS = 200  # Bars before every indicator is defined
+DEFAULT_HORIZON = 500  # Bars a position may stay open before it is marked to market
+MEMO_SIZE = 64  # Vote / outcome arrays kept per worker (each is symbols x bars)
+
+# Strategy -> (class, feature columns passed to signals() in order)
+STRATEGIES = {
+    'statistical_arbitrage': (StatisticalArbitrageStrategy, ('z_score', 'rsi')),
+    'momentum_breakout': (MomentumBreakoutStrategy,
+                          ('ema_20', 'ema_50', 'ema_200', 'adx', 'macd', 'macd_signal')),
+    'volatility_regime': (VolatilityRegimeStrategy,
+                          ('close', 'bb_upper', 'bb_lower', 'rsi', 'vol_percentile')),
+}
+SETTINGS = ('CONSENSUS_THRESHOLD', 'SL_ATR_MULT', 'TP_SL_RATIO')
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'atr', 'spread_price')
+FEATURE_COLUMNS = tuple(sorted(set(PRICE_COLUMNS).union(*(cols for _, cols in STRATEGIES.values()))))
+
+# Centred on the shipped defaults: 3**8 = 6561 configs
+DEFAULT_SPACE = {
+    'statistical_arbitrage.z_entry': [2.0, 2.5, 3.0],
+    'statistical_arbitrage.rsi_low': [25, 30, 35],
+    'momentum_breakout.adx_min': [20, 25, 30],
+    'volatility_regime.low_vol': [0.2, 0.3, 0.4],
+    'volatility_regime.band_low': [0.05, 0.1, 0.2],
+    'CONSENSUS_THRESHOLD': [0.15, 0.25, 0.40],
+    'SL_ATR_MULT': [1.0, 1.5, 2.0],
+    'TP_SL_RATIO': [1.5, 2.0, 3.0],
+}
+OBJECTIVES = ('sqn', 'total_r', 'expectancy', 'profit_factor')
+
+
+# === Features ===
+
+def _data_key(rates):
+    digest = hashlib.sha1(f"v{FEATURE_VERSION}:{VOL_RANK_WINDOW}".encode())
+    for symbol in sorted(rates):
+        digest.update(symbol.encode())
+        digest.update(np.ascontiguousarray(rates[symbol]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def build_features(rates, points, cache_dir=CACHE_DIR):
+    """
+    Indicator columns for every symbol, stacked into (symbols x bars) arrays.
+    Shorter histories are left-padded with NaN so bar i is aligned by recency.
+    points: {symbol: point size}, to turn recorded spreads into prices
+    Returns: path of the cached .npz (built on first use)
+    """
+    path = os.path.join(cache_dir, f"features_{_data_key(rates)}.npz")
+    if os.path.exists(path):
+        return path
+    from utils.features import add_features
+
+    symbols = sorted(rates)
+    length = max(len(rates[s]) for s in symbols)
+    columns = {name: np.full((len(symbols), length), np.nan) for name in FEATURE_COLUMNS}
+    times = np.zeros((len(symbols), length), dtype=np.int64)
+    for row, symbol in enumerate(symbols):
+        df = add_features(pd.DataFrame(rates[symbol]))
+        df['spread_price'] = df['spread'] * points[symbol]
+        # Same statistic the strategy computes over its get_data window
+        df['vol_percentile'] = df['volatility_20'].rolling(VOL_RANK_WINDOW, min_periods=1).rank(pct=True)
+        offset = length - len(df)
+        for name in FEATURE_COLUMNS:
+            columns[name][row, offset:] = df[name].to_numpy(dtype=np.float64)
+        times[row, offset:] = df['time'].to_numpy()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(path, symbols=np.array(symbols), time=times, **columns)
+    return path
+
+
+# === Search spaces ===
+
+def split_params(params):
+    """{'statistical_arbitrage.z_entry': 2.0, 'SL_ATR_MULT': 1.5} -> ({strategy: kwargs}, {setting: value})"""
+    strategy_params = {name: {} for name in STRATEGIES}
+    settings = {}
+    for key, value in params.items():
+        if '.' in key:
+            name, arg = key.split('.', 1)
+            if name not in STRATEGIES:
+                raise KeyError(f"Unknown strategy in parameter {key}")
+            strategy_params[name][arg] = value
+        elif key in SETTINGS:
+            settings[key] = value
+        else:
+            raise KeyError(f"Unknown sweep parameter: {key}")
+    return strategy_params, settings
+
+
+def grid(space):
+    """Every combination of the listed values"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_search(space, n, seed=0):
+    """
+    n configs sampled from the space. A list is sampled uniformly from its
+    values; {'low': a, 'high': b} uniformly from the interval (integers if
+    both ends are ints). SL_ATR_MULT and TP_SL_RATIO are best given as lists:
+    every distinct pair costs a full barrier scan.
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n):
+        params = {}
+        for key, values in space.items():
+            if isinstance(values, dict):
+                low, high = values['low'], values['high']
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = rng.randint(low, high)
+                else:
+                    params[key] = round(rng.uniform(low, high), 4)
+            else:
+                params[key] = rng.choice(values)
+        configs.append(params)
+    return configs
+
+
+# === Barrier outcomes ===
+
+def barrier_outcomes(columns, sl_mult, tp_ratio, horizon=DEFAULT_HORIZON):
+    """
+    Exit of a trade entered at every bar's close, in both directions.
+
+    Bars after the entry are scanned in order. A stop is assumed to fill
+    before a target touched in the same bar, and a gap through either level
+    fills at the bar's open (as SimulatedBroker does). Trades still open
+    after `horizon` bars are closed at that bar's close.
+    Returns: {+1: (r, exit), -1: (r, exit)} of (symbols x bars) arrays. r is
+    the result in R net of the spread; exit is the bar index the trade closed
+    on, -1 where history ran out first.
+    """
+    open_, high, low, close = (columns[c] for c in ('open', 'high', 'low', 'close'))
+    n = close.shape[1]
+    distance = columns['atr'] * sl_mult
+    cost = columns['spread_price'] / distance
+    outcomes = {}
+    for direction in (1, -1):
+        r = np.full(close.shape, np.nan)
+        exit_ = np.full(close.shape, -1, dtype=np.int64)
+        stop = close - direction * distance
+        target = close + direction * distance * tp_ratio
+        # Flat indices of trades still open; shrinks as barriers are hit
+        live = np.flatnonzero(np.isfinite(distance) & (distance > 0))
+        for step in range(1, horizon + 1):
+            live = live[live % n + step < n]
+            if not len(live):
+                break
+            at = live + step
+            if direction == 1:
+                stopped = low.flat[at] <= stop.flat[live]
+                reached = high.flat[at] >= target.flat[live]
+                fill_stop = np.minimum(stop.flat[live], open_.flat[at])
+                fill_target = np.maximum(target.flat[live], open_.flat[at])
+            else:
+                stopped = high.flat[at] >= stop.flat[live]
+                reached = low.flat[at] <= target.flat[live]
+                fill_stop = np.maximum(stop.flat[live], open_.flat[at])
+                fill_target = np.minimum(target.flat[live], open_.flat[at])
+            done = stopped | reached
+            if step == horizon:
+                fill = np.where(stopped, fill_stop, np.where(reached, fill_target, close.flat[at]))
+                done[:] = True
+            else:
+                fill = np.where(stopped, fill_stop, fill_target)
+            closed = live[done]
+            r.flat[closed] = direction * (fill[done] - close.flat[closed]) / distance.flat[closed]
+            exit_.flat[closed] = closed % n + step
+            live = live[~done]
+        outcomes[direction] = (r - cost, exit_)
+    return outcomes
+
+
+# === Evaluation ===
+
+class SweepEvaluator:
+    """
+    Scores configs against one feature file. Votes and barrier outcomes are
+    memoized per process, so a worker pays for each distinct strategy
+    setting / stop setting once however many configs share it.
+    """
+    def __init__(self, features_path, weights, defaults, horizon=DEFAULT_HORIZON):
+        with np.load(features_path) as data:
+            self.symbols = list(data['symbols'])
+            self.columns = {name: data[name] for name in FEATURE_COLUMNS}
+        self.weights = weights
+        self.defaults = defaults  # Settings not swept, e.g. {'CONSENSUS_THRESHOLD': 0.40, ...}
+        self.horizon = horizon
+        self.bars = self.columns['close'].shape[1]
+        self._memo = OrderedDict()
+
+    def _cached(self, key, compute):
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = compute()
+            if len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        else:
+            self._memo.move_to_end(key)
+        return value
+
+    def votes(self, name, kwargs):
+        """(buy, sell) weighted vote arrays of one strategy setting"""
+        def compute():
+            cls, inputs = STRATEGIES[name]
+            direction, confidence = cls(**kwargs).signals(*(self.columns[c] for c in inputs))
+            weighted = confidence * self.weights.get(name, 0.0)
+            return np.where(direction > 0, weighted, 0.0), np.where(direction < 0, weighted, 0.0)
+        return self._cached(('votes', name, tuple(sorted(kwargs.items()))), compute)
+
+    def outcomes(self, sl_mult, tp_ratio):
+        return self._cached(('outcomes', sl_mult, tp_ratio),
+                            lambda: barrier_outcomes(self.columns, sl_mult, tp_ratio, self.horizon))
+
+    def evaluate(self, params, end=None):
+        """Score one config on bars [WARMUP_BARS, end). Returns: metrics dict"""
+        strategy_params, settings = split_params(params)
+        settings = dict(self.defaults, **settings)
+        end = end or self.bars
+        window = slice(WARMUP_BARS, end)
+
+        buy = np.zeros_like(self.columns['close'][:, window])
+        sell = np.zeros_like(buy)
+        for name, kwargs in strategy_params.items():
+            strategy_buy, strategy_sell = self.votes(name, kwargs)
+            buy += strategy_buy[:, window]
+            sell += strategy_sell[:, window]
+        threshold = settings['CONSENSUS_THRESHOLD']
+        direction = np.where((buy > sell) & (buy > threshold), 1,
+                             np.where((sell > buy) & (sell > threshold), -1, 0))
+
+        outcomes = self.outcomes(settings['SL_ATR_MULT'], settings['TP_SL_RATIO'])
+        (long_r, long_exit), (short_r, short_exit) = outcomes[1], outcomes[-1]
+        results, times = [], []
+        for row in range(direction.shape[0]):
+            sides = direction[row]
+            entries = np.flatnonzero(sides)
+            if not len(entries):
+                continue
+            bars = entries + WARMUP_BARS
+            is_long = sides[entries] > 0
+            exits = np.where(is_long, long_exit[row, bars], short_exit[row, bars]).tolist()
+            bars_list = bars.tolist()
+            taken = []
+            position = 0
+            while position < len(bars_list):
+                if exits[position] < 0:
+                    position += 1  # History ends before this trade does
+                    continue
+                taken.append(position)
+                # Next signal at or after the bar the position closed on
+                position = bisect.bisect_left(bars_list, exits[position], position + 1)
+            taken = np.asarray(taken, dtype=np.int64)
+            results.append(np.where(is_long[taken], long_r[row, bars[taken]], short_r[row, bars[taken]]))
+            times.append(bars[taken])
+        if not results:
+            return summarize(np.empty(0))
+        times = np.concatenate(times)
+        order = np.argsort(times, kind='stable')
+        return summarize(np.concatenate(results)[order])
+
+
+def summarize(r):
+    """Trade statistics of a sequence of R results in entry order"""
+    n = len(r)
+    if n == 0:
+        return {'trades': 0, 'total_r': 0.0, 'expectancy': 0.0, 'win_rate': 0.0,
+                'profit_factor': 0.0, 'sqn': 0.0, 'max_drawdown_r': 0.0}
+    equity = np.cumsum(r)
+    drawdown = np.max(np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity)
+    gains, losses = r[r > 0].sum(), -r[r < 0].sum()
+    std = r.std(ddof=1) if n > 1 else 0.0
+    return {
+        'trades': n,
+        'total_r': float(equity[-1]),
+        'expectancy': float(r.mean()),
+        'win_rate': float((r > 0).mean()),
+        'profit_factor': float(gains / losses) if losses > 0 else float('inf'),
+        'sqn': float(r.mean() / std * np.sqrt(n)) if std > 0 else 0.0,
+        'max_drawdown_r': float(drawdown),
+    }
+
+
+# === Process pool ===
+
+_EVALUATOR = None
+
+
+def _init_worker(features_path, weights, defaults, horizon):
+    global _EVALUATOR
+    _EVALUATOR = SweepEvaluator(features_path, weights, defaults, horizon)
+
+
+def _evaluate_chunk(chunk):
+    configs, end = chunk
+    return [_EVALUATOR.evaluate(params, end) for params in configs]
+
+
+def _locality(params):
+    """Sort key that puts configs sharing barrier outcomes and votes in the same chunk"""
+    return tuple(sorted(params.items(), key=lambda item: (item[0] not in SETTINGS[1:], item[0])))
+
+
+def _score(metrics, objective, min_trades):
+    if metrics['trades'] < min_trades:
+        return float('-inf')
+    return metrics[objective]
+
+
+def run_sweep(configs, features_path, weights, defaults, workers=None, eta=3, rungs=3,
+              objective='sqn', min_trades=30, horizon=DEFAULT_HORIZON, chunk_size=64):
+    """
+    Successive halving over `configs`.
+    Rung k scores the survivors on the first 1/eta**(rungs-1-k) of the history
+    (after the warm-up) and keeps the best 1/eta of them; min_trades scales
+    with the history length. The last rung uses all of it.
+    Returns: one row per config, {'params', 'rung', 'score', **metrics},
+    ranked with the configs that got furthest first.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective}; choose from {OBJECTIVES}")
+    with np.load(features_path) as data:
+        bars = data['close'].shape[1]
+    span = bars - WARMUP_BARS
+
+    rows = [{'params': params, 'rung': -1, 'score': float('-inf')} for params in configs]
+    alive = list(range(len(rows)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(features_path, weights, defaults, horizon)) as pool:
+        for rung in range(rungs):
+            fraction = eta ** -(rungs - 1 - rung)
+            end = WARMUP_BARS + max(int(span * fraction), 1)
+            alive.sort(key=lambda i: _locality(rows[i]['params']))
+            chunks = [([rows[i]['params'] for i in alive[start:start + chunk_size]], end)
+                      for start in range(0, len(alive), chunk_size)]
+            scored = itertools.chain.from_iterable(pool.map(_evaluate_chunk, chunks))
+            required = max(int(min_trades * fraction), 1)
+            for i, metrics in zip(alive, scored):
+                rows[i].update(metrics, rung=rung, score=_score(metrics, objective, required))
+            print(f"[Sweep] Rung {rung}: {len(alive)} configs on {end - WARMUP_BARS} bars")
+            if rung < rungs - 1:
+                alive.sort(key=lambda i: rows[i]['score'], reverse=True)
+                alive = alive[:max(len(alive) // eta, 1)]
+
+    return sorted(rows, key=lambda row: (row['rung'], row['score']), reverse=True)
+
+
+def table(rows, top=20):
+    """Ranked results as text, one config per line"""
+    keys = sorted({key for row in rows[:top] for key in row['params']})
+    header = (f"{'#':>3} {'rung':>4} {'score':>7} {'trades':>6} {'total R':>8} {'exp R':>6} "
+              f"{'win%':>5} {'PF':>5} {'DD R':>6}  " + " ".join(keys))
+    lines = [header]
+    for rank, row in enumerate(rows[:top], 1):
+        values = " ".join(f"{key}={row['params'].get(key, '-')}" for key in keys)
+        lines.append(
+            f"{rank:>3} {row['rung']:>4} {row['score']:>7.2f} {row['trades']:>6} {row['total_r']:>8.1f} "
+            f"{row['expectancy']:>6.3f} {row['win_rate']:>5.0%} {min(row['profit_factor'], 99.0):>5.2f} "
+            f"{row['max_drawdown_r']:>6.1f}  {values}"
+        )
+    return "\n".join(lines)
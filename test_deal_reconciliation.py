@@ -0,0 +1,84 @@
+"""
+Partial and final exits pulled from the deal history across two syncs, with
+the trade server running ahead of the bot's clock.
+
+    python test_deal_reconciliation.py
+"""
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+from benchmarks import offline
+
+DAY = 1_767_225_600  # 2026-01-01 00:00 server time
+terminal = offline.install(offline.synthetic(["EURUSD"], 48, start=DAY))
+
+import config
+from database import DatabaseHandler
+from utils import clock
+from utils.reconciler import DealReconciler, _server_time
+
+SERVER_AHEAD = timedelta(hours=3)
+
+
+def exit_deal(position, volume, profit):
+    """Close `volume` of a position at the current bar, as the terminal would record it"""
+    tick = terminal.symbol_info_tick(position.symbol)
+    price = tick.bid if position.type == terminal.POSITION_TYPE_BUY else tick.ask
+    terminal.positions[position.ticket] = position._replace(volume=position.volume - volume)
+    return terminal._deal(position._replace(volume=volume), terminal.DEAL_ENTRY_OUT, price,
+                          terminal.now(), profit=profit)
+
+
+def test_partial_and_final_exit_across_syncs():
+    print("--- Testing deal reconciliation ---")
+    clock.set_source(lambda: _server_time(terminal.now()) - SERVER_AHEAD)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseHandler(os.path.join(tmp, "trades.db"))
+            reconciler = DealReconciler(db)
+
+            # Entry at 20:00 server time, logged the way handle_order_event does
+            terminal.cursor = 19
+            result = terminal.order_send({'symbol': "EURUSD", 'type': terminal.ORDER_TYPE_BUY,
+                                          'volume': 0.1, 'magic': config.MAGIC_NUMBER})
+            db.log_trade({'ticket': result.deal, 'position_id': result.order, 'symbol': "EURUSD",
+                          'strategy': 'Ensemble', 'direction': "BUY", 'entry_time': clock.now(),
+                          'entry_price': result.price, 'volume': 0.1, 'status': 'OPEN'})
+            position = terminal.positions[result.order]
+
+            # 40% out at 23:00 server time
+            terminal.cursor = 22
+            partial = exit_deal(position, 0.04, profit=4.0)
+            assert reconciler.sync() == 0
+            assert reconciler.server_offset == SERVER_AHEAD.total_seconds()
+            trade = db.get_trades_df().iloc[0]
+            assert trade['status'] == 'OPEN'
+            assert abs(trade['closed_volume'] - 0.04) < 1e-9
+
+            # The rest at 01:00 server time the next day: still 22:00 on the bot's clock
+            terminal.cursor = 24
+            final = exit_deal(terminal.positions[result.order], 0.06, profit=-1.0)
+            assert reconciler.sync() == 1
+            trade = db.get_trades_df().iloc[0]
+            print(trade[['status', 'closed_volume', 'exit_time', 'exit_date', 'exit_price', 'pnl_net']].to_dict())
+            assert trade['status'] == 'CLOSED'
+            assert abs(trade['closed_volume'] - 0.1) < 1e-9
+            assert trade['exit_date'] == "2026-01-01"
+            assert datetime.fromisoformat(trade['exit_time']) == datetime(2026, 1, 1, 22)
+            assert abs(trade['exit_price'] - (partial.price * 0.04 + final.price * 0.06) / 0.1) < 1e-9
+            assert abs(trade['pnl_net'] - 3.0) < 1e-9
+            assert db.get_day_trade_counts(date(2026, 1, 1)) == (1, 1)
+
+            # Nothing is applied twice on the next sync
+            assert reconciler.sync() == 0
+            assert abs(db.get_trades_df().iloc[0]['closed_volume'] - 0.1) < 1e-9
+            db.close()
+    finally:
+        clock.set_source()
+        terminal.reset()
+    print("[PASS] Partial and final exits reconcile across syncs with a server offset.")
+
+
+if __name__ == "__main__":
+    test_partial_and_final_exit_across_syncs()
@@ -0,0 +1,56 @@
+"""
+Closed trades are credited to the strategies that voted on them, not to 'Ensemble'.
+
+    python test_strategy_attribution.py
+"""
+import os
+import tempfile
+from datetime import datetime
+
+from benchmarks import offline
+offline.install()  # config imports MetaTrader5; no terminal needed here
+
+from database import DatabaseHandler
+
+VOTES = {
+    'statistical_arbitrage': ('BUY', 0.8, 0.3),
+    'momentum_breakout': ('SELL', 0.5, 0.2),
+    'ml_ensemble': (None, 0.0, 0.2),  # Abstained: not credited
+}
+
+
+def test_strategy_performance_by_voting_strategy():
+    print("--- Testing strategy attribution ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trades.db")
+        db = DatabaseHandler(path)
+        # Opened by the ensemble, closed by the deal sync with a profit of 8
+        db.log_trade({'ticket': 1, 'symbol': "EURUSD", 'strategy': 'Ensemble', 'direction': "BUY",
+                      'entry_time': datetime(2026, 1, 5, 10), 'volume': 0.1, 'status': 'OPEN',
+                      'votes': VOTES})
+        db.apply_deal_sync(
+            [(101, 1, -1.0)],
+            [{'position_id': 101, 'exit_time': datetime(2026, 1, 5, 14), 'exit_price': 1.1,
+              'volume': 0.1, 'profit': 10.0, 'commission': -1.0, 'swap': 0.0}],
+            {}
+        )
+
+        performance = db.get_strategy_performance()
+        print(performance)
+        assert set(performance) == {'statistical_arbitrage', 'momentum_breakout'}
+        assert performance['statistical_arbitrage'] == 1.0  # Voted with the winning trade
+        assert performance['momentum_breakout'] == 0.0  # Voted against it
+        stats = db.get_strategy_stats()
+        assert stats['statistical_arbitrage']['lifetime']['pnl_sum'] == 8.0
+        assert stats['momentum_breakout']['lifetime']['pnl_sum'] == -8.0
+        db.close()
+
+        # Same windows after a restart
+        db = DatabaseHandler(path)
+        assert db.get_strategy_performance() == performance
+        db.close()
+    print("[PASS] Closed trades are credited to the voting strategies.")
+
+
+if __name__ == "__main__":
+    test_strategy_performance_by_voting_strategy()
@@ -0,0 +1,181 @@
+"""
+Compact columnar storage for bars and their indicators.
+
+A BarFrame keeps every numeric column in one preallocated 2-D buffer, one
+contiguous row per column. frame['close'] is then a zero-copy view, the
+warm-up rows are dropped by moving a start offset rather than copying, and
+the buffer is reused from one fetch to the next. latest() gives the newest
+bar as a small __slots__ record instead of a pandas Series.
+"""
+import numpy as np
+
+
+class Bar:
+    """One bar of a BarFrame: bar['rsi'], bar.rsi or bar.get('rsi', 0); time is epoch seconds"""
+    __slots__ = ('_values', '_index', 'time')
+
+    def __init__(self, values, index, time):
+        self._values = values
+        self._index = index
+        self.time = time
+
+    def __getitem__(self, name):
+        if name == 'time':
+            return self.time
+        return self._values[self._index[name]]
+
+    def __getattr__(self, name):
+        try:
+            return self._values[self._index[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, name, default=None):
+        index = self._index.get(name)
+        return default if index is None else self._values[index]
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={self._values[i]:.5g}" for name, i in self._index.items())
+        return f"Bar(time={self.time}, {fields})"
+
+
+class BarFrame:
+    """
+    Bars plus indicators as column-contiguous arrays.
+
+    capacity: rows preallocated (grows if a load is larger)
+    dtype: float64, or float32 to halve memory (about 7 significant digits)
+    Column views share the buffer. They stay valid until the next load(),
+    which overwrites it in place.
+    """
+    def __init__(self, capacity=1000, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.columns = ()
+        self.index = {}
+        self._data = np.empty((0, capacity), dtype=self.dtype)
+        self._time = np.empty(capacity, dtype=np.int64)
+        self._start = 0
+        self._stop = 0
+
+    @classmethod
+    def from_dataframe(cls, df, dtype=np.float64):
+        frame = cls(len(df), dtype)
+        frame.load(df)
+        return frame
+
+    def load(self, df, skip=0):
+        """
+        Copy a bars/indicators DataFrame into the buffer. The first `skip`
+        rows and any row with a NaN are left out, like DataFrame.dropna().
+        'time' may be epoch seconds or datetime64.
+        """
+        columns = tuple(name for name in df.columns if name != 'time')
+        n = len(df)
+        if columns != self.columns or n > self._data.shape[1]:
+            self.columns = columns
+            self.index = {name: i for i, name in enumerate(columns)}
+            self._data = np.empty((len(columns), max(n, self._data.shape[1])), dtype=self.dtype)
+            self._time = np.empty(self._data.shape[1], dtype=np.int64)
+
+        data = self._data
+        for i, name in enumerate(columns):
+            data[i, :n] = df[name].to_numpy()
+        times = df['time'].to_numpy()
+        if np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype('datetime64[s]').astype(np.int64)
+        self._time[:n] = times
+
+        skip = min(skip, n)
+        valid = np.isfinite(data[:, skip:n]).all(axis=0)
+        invalid = np.flatnonzero(~valid)
+        if len(invalid) == 0 or invalid[-1] == len(invalid) - 1:
+            # Only leading rows are incomplete: drop them by offset, no copy
+            self._start, self._stop = skip + len(invalid), n
+        else:
+            keep = skip + np.flatnonzero(valid)
+            data[:, :len(keep)] = data[:, keep]
+            self._time[:len(keep)] = self._time[keep]
+            self._start, self._stop = 0, len(keep)
+        return self
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __contains__(self, name):
+        return name == 'time' or name in self.index
+
+    def __getitem__(self, name):
+        """Zero-copy view of one column"""
+        if name == 'time':
+            return self.time
+        return self._data[self.index[name], self._start:self._stop]
+
+    @property
+    def time(self):
+        """Bar open times, epoch seconds"""
+        return self._time[self._start:self._stop]
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes + self._time.nbytes
+
+    def matrix(self, names, rows=slice(None)):
+        """(rows x columns) array of the named columns, e.g. model features. This one copies."""
+        rows = range(self._start, self._stop)[rows]
+        return self._data[[self.index[name] for name in names], rows.start:rows.stop:rows.step].T
+
+    def view(self, start, stop):
+        """Rows [start, stop) as a frame sharing this buffer (no copy)"""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        view = object.__new__(BarFrame)
+        view.__dict__.update(self.__dict__)
+        view._start, view._stop = self._start + start, self._start + max(start, stop)
+        return view
+
+    def head(self, n):
+        """First n rows, e.g. head(len(frame) - 1) for closed bars only (no copy)"""
+        return self.view(0, max(0, n))
+
+    def truncate(self, n):
+        """Keep only the first n rows (in place; the buffer is untouched)"""
+        self._stop = self._start + max(0, min(n, len(self)))
+
+    def append(self, time, values):
+        """
+        Add one row after the last with `values` (column -> number); columns
+        not in `values` are NaN. Grows the buffer if full.
+        """
+        if self._stop == self._data.shape[1]:
+            extra = max(1, self._data.shape[1] // 4)
+            self._data = np.concatenate((self._data, np.empty((len(self.columns), extra), self.dtype)), axis=1)
+            self._time = np.concatenate((self._time, np.empty(extra, dtype=np.int64)))
+        row = self._stop
+        self._data[:, row] = np.nan
+        for name, value in values.items():
+            index = self.index.get(name)
+            if index is not None:
+                self._data[index, row] = value
+        self._time[row] = time
+        self._stop += 1
+
+    def latest(self):
+        """Newest bar as a Bar record (values as Python floats)"""
+        last = self._stop - 1
+        return Bar(self._data[:, last].tolist(), self.index, int(self._time[last]))
+
+
+def timeframe_seconds(timeframe):
+    """Bar length of an MT5 TIMEFRAME_* constant: minutes below 0x4000, hours with 0x4000 set, W1/MN1 above"""
+    if timeframe < 0x4000:
+        return timeframe * 60
+    if timeframe < 0x8000:
+        return (timeframe - 0x4000) * 3600
+    return 7 * 86400 if timeframe < 0xC000 else 31 * 86400
+
+
+def percentile_of_last(values):
+    """Percentile rank (0..1] of the last value within `values`, ties averaged like Series.rank(pct=True)"""
+    last = values[-1]
+    less = np.count_nonzero(values < last)
+    equal = np.count_nonzero(values == last)
+    return (less + (equal + 1) / 2) / len(values)
@@ -0,0 +1,115 @@
+import MetaTrader5 as mt5
+import threading
+import time
+from collections import defaultdict
+import config
+
+
+class BrokerStateCache:
+    """
+    Read-through cache in front of the MT5 terminal.
+
+    Each kind of data gets its own freshness rule:
+    - symbol_info: cached for the current cycle, like account_info. Most of
+      the spec is static, but trade_tick_value moves with price for USD/JPY,
+      USD/CAD and crosses, and position sizing depends on it.
+    - account_info: cached for the current cycle. begin_cycle() starts a new
+      one, and invalidate_account() drops it early (e.g. after a fill).
+    - symbol_info_tick: reused only while younger than max_age_ms.
+
+    Every call goes through one lookup, and hits/misses are counted per field.
+    """
+    def __init__(self, tick_max_age_ms=config.TICK_MAX_AGE_MS):
+        self.tick_max_age_ms = tick_max_age_ms
+        self._lock = threading.Lock()
+        self._symbols = {}  # symbol -> (info, cycle it was fetched in)
+        self._ticks = {}
+        self._account = None
+        self._account_cycle = -1
+        self.cycle = 0
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def begin_cycle(self):
+        """Start a new trading cycle; account and symbol info will be fetched again on first use"""
+        with self._lock:
+            self.cycle += 1
+
+    # === Account ===
+
+    def account_info(self):
+        with self._lock:
+            if self._account is not None and self._account_cycle == self.cycle:
+                self.hits['account'] += 1
+                return self._account
+            self.misses['account'] += 1
+
+        account = mt5.account_info()
+        with self._lock:
+            if account is not None:
+                self._account = account
+                self._account_cycle = self.cycle
+        return account
+
+    def invalidate_account(self):
+        with self._lock:
+            self._account = None
+
+    # === Contract specs ===
+
+    def symbol_info(self, symbol):
+        """Contract specification. Use symbol_info_tick for prices, not the bid/ask on this."""
+        with self._lock:
+            cached = self._symbols.get(symbol)
+            if cached is not None and cached[1] == self.cycle:
+                self.hits['symbol'] += 1
+                return cached[0]
+            self.misses['symbol'] += 1
+
+        info = mt5.symbol_info(symbol)
+        if info is not None:
+            with self._lock:
+                self._symbols[symbol] = (info, self.cycle)
+        return info
+
+    def invalidate_symbol(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._symbols.clear()
+            else:
+                self._symbols.pop(symbol, None)
+
+    # === Quotes ===
+
+    def symbol_info_tick(self, symbol, max_age_ms=None):
+        """Latest quote, refetched if the cached one is older than max_age_ms (0 forces a fetch)"""
+        max_age_ms = self.tick_max_age_ms if max_age_ms is None else max_age_ms
+        now = time.monotonic()
+        with self._lock:
+            cached = self._ticks.get(symbol)
+            if cached is not None and (now - cached[1]) * 1000 <= max_age_ms:
+                self.hits['tick'] += 1
+                return cached[0]
+            self.misses['tick'] += 1
+
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is not None:
+            with self._lock:
+                self._ticks[symbol] = (tick, time.monotonic())
+        return tick
+
+    def invalidate_ticks(self):
+        with self._lock:
+            self._ticks.clear()
+
+    # === Reporting ===
+
+    def stats(self):
+        """Returns: Dict {field: (hits, misses, hit_ratio)}"""
+        with self._lock:
+            result = {}
+            for field in set(self.hits) | set(self.misses):
+                hits, misses = self.hits[field], self.misses[field]
+                total = hits + misses
+                result[field] = (hits, misses, hits / total if total else 0.0)
+            return result
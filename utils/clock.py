@@ -0,0 +1,19 @@
+"""
+Time source for the trading loop.
+
+Bot code reads the time through now() rather than datetime.now(), so the
+replay harness can drive it from a simulated clock (set_source).
+"""
+from datetime import datetime
+
+_source = datetime.now
+
+
+def now():
+    return _source()
+
+
+def set_source(source=None):
+    """Use `source()` for the current time; None restores the wall clock"""
+    global _source
+    _source = source or datetime.now
@@ -1,19 +1,55 @@
 import MetaTrader5 as mt5
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
+import time
 from datetime import datetime
 import config
+from utils.metrics import REGISTRY
+from utils.features import GRAPH, WARMUP_BARS, add_features, plan
+from utils.bars import BarFrame, timeframe_seconds
 
 class MarketDataHandler:
-    def __init__(self):
-        if not mt5.initialize():
-            print("MT5 initialization failed in DataHandler")
+    """
+    Bars plus indicators. The terminal connection is opened once by
+    TradingBot; get_data reconnects if it drops.
 
-    def get_data(self, symbol, timeframe=config.TIMEFRAME, lookback=1000):
+    Only the features in `self.features` (set by require(); default all) are
+    computed. They are memoized per (symbol, timeframe, lookback) and reused
+    while the bars they were computed from are unchanged: same first bar,
+    same last bar time and contents.
+
+    The forming bar (its close is still ahead of the broker clock) changes
+    with every tick. With `forming_features` on, indicators are computed for
+    it as well, so the memo only holds until the next tick. With it off,
+    they are computed over the closed bars only, memoized from one close to
+    the next, and the forming bar is appended as the last row with its live
+    open/high/low/close and NaN indicators: the recursive ones (EMA, RSI,
+    ADX) cannot be updated for one row without redoing the window, and a
+    stale value must not pass for a current one.
+    """
+    def __init__(self, dtype=config.BAR_DTYPE):
+        self.dtype = dtype
+        self.features = frozenset(GRAPH)
+        self.forming_features = True  # Compute indicators for the forming bar too
+        # (symbol, timeframe, lookback) -> (bars fingerprint, features computed, BarFrame, rows with features)
+        self._frames = {}
+
+    def require(self, names):
+        """Compute only `names` (and their dependencies) from now on"""
+        plan(names)  # Unknown feature names fail here, not mid-cycle
+        self.features = frozenset(names)
+
+    def clear(self):
+        """Forget the memoized frames; the next get_data recomputes every feature"""
+        self._frames.clear()
+
+    def get_data(self, symbol, timeframe=config.TIMEFRAME, lookback=1000, features=None):
         """
         Fetch data from MT5 and calculate technical indicators.
+        features: columns needed by this caller (default: self.features); () for bars only
+        Returns: BarFrame, overwritten by the next call for the same symbol/timeframe/lookback
         """
+        start = time.perf_counter()
         rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, lookback)
         
         if rates is None:
@@ -32,55 +68,35 @@ class MarketDataHandler:
         if rates is None or len(rates) < lookback:
             print(f"[Data] Generic Failure or insufficient data for {symbol}")
             return None
-            
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        
-        # === Feature Engineering ===
-        
-        # Price Action
-        df['returns'] = df['close'].pct_change()
-        df['log_returns'] = np.log(df['close'] / df['close'].shift(1))
-        
-        # Moving Averages
-        df['ema_20'] = ta.ema(df['close'], length=20)
-        df['ema_50'] = ta.ema(df['close'], length=50)
-        df['ema_100'] = ta.ema(df['close'], length=100)
-        df['ema_200'] = ta.ema(df['close'], length=200)
+        REGISTRY.observe('stage_seconds', time.perf_counter() - start, stage='fetch')
         
-        # Momentum
-        df['rsi'] = ta.rsi(df['close'], length=14)
-        macd = ta.macd(df['close'])
-        df['macd'] = macd['MACD_12_26_9']
-        df['macd_signal'] = macd['MACDs_12_26_9']
-        
-        # Volatility
-        df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
-        bb = ta.bbands(df['close'], length=20, std=2)
-        # Handle dynamic column names from pandas_ta
-        # It typically returns BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
-        # But depending on version/precision it might vary.
-        if bb is not None:
-            # Find columns dynamically
-            col_lower = [c for c in bb.columns if c.startswith('BBL')][0]
-            col_mid = [c for c in bb.columns if c.startswith('BBM')][0]
-            col_upper = [c for c in bb.columns if c.startswith('BBU')][0]
+        start = time.perf_counter()
+        tick = mt5.symbol_info_tick(symbol)
+        forming = tick is None or tick.time < int(rates['time'][-1]) + timeframe_seconds(timeframe)
+        # Without forming_features the forming bar is left out, so the memo survives its ticks
+        source = rates[:-1] if forming and not self.forming_features else rates
+        wanted = self.features if features is None else frozenset(features)
+        key = (symbol, timeframe, lookback)
+        fingerprint = (int(source['time'][0]), int(source['time'][-1]), source[-1].tobytes())
+        cached = self._frames.get(key)
+        if cached is not None and cached[0] == fingerprint and wanted <= cached[1]:
+            REGISTRY.inc('feature_cache_total', result='hit')
+            frame, rows = cached[2], cached[3]
+        else:
+            REGISTRY.inc('feature_cache_total', result='miss')
             
-            df['bb_upper'] = bb[col_upper]
-            df['bb_lower'] = bb[col_lower]
-            df['bb_mid'] = bb[col_mid]
-        
-        # Trend Strength
-        adx = ta.adx(df['high'], df['low'], df['close'], length=14)
-        df['adx'] = adx['ADX_14']
-        
-        # Advanced Statistical Features
-        # Rolling Z-Score (Mean Reversion)
-        df['mean_100'] = df['close'].rolling(100).mean()
-        df['std_100'] = df['close'].rolling(100).std()
-        df['z_score'] = (df['close'] - df['mean_100']) / df['std_100']
-        
-        # Volatility Regime
-        df['volatility_20'] = df['returns'].rolling(20).std()
-        
-        return df.dropna()
+            # === Feature Engineering ===
+            df = add_features(pd.DataFrame(source), wanted)
+            
+            # Into the symbol's preallocated buffer; warm-up rows are skipped, not copied away
+            frame = cached[2] if cached is not None else BarFrame(lookback, self.dtype)
+            frame.load(df, skip=WARMUP_BARS)
+            rows = len(frame)
+            self._frames[key] = (fingerprint, wanted, frame, rows)
+            REGISTRY.observe('stage_seconds', time.perf_counter() - start, stage='features')
+
+        frame.truncate(rows)  # Drop the forming row of the previous call
+        if len(source) < len(rates):
+            bar = rates[-1]
+            frame.append(int(bar['time']), {name: bar[name] for name in bar.dtype.names if name != 'time'})
+        return frame
@@ -1,16 +1,35 @@
 import MetaTrader5 as mt5
+import random
 import time
+import config
+from utils.broker_cache import BrokerStateCache
+
+# Retcodes that mean "the price moved": reprice and try again
+RETRYABLE_RETCODES = (
+    mt5.TRADE_RETCODE_REQUOTE,
+    mt5.TRADE_RETCODE_PRICE_CHANGED,
+    mt5.TRADE_RETCODE_PRICE_OFF,
+)
+
 
 class TradeExecutor:
-    def execute_trade(self, symbol, direction, lots, sl, tp, strategy_name, confidence):
-        """
-        Execute trade on MT5
-        """
-        price = mt5.symbol_info_tick(symbol).ask if direction == "BUY" else mt5.symbol_info_tick(symbol).bid
+    def __init__(self, broker=None, max_retries=config.ORDER_MAX_RETRIES,
+                 backoff_base=config.ORDER_BACKOFF_BASE):
+        self.broker = broker or BrokerStateCache()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+    def build_request(self, symbol, direction, lots, sl, tp, strategy_name, confidence):
+        """Market order request priced off the cached quote, or None if the symbol can't be priced"""
+        tick = self.broker.symbol_info_tick(symbol)
+        if tick is None:
+            print(f"[Exec] Failed to get tick for {symbol}")
+            return None
+        price = tick.ask if direction == "BUY" else tick.bid
         order_type = mt5.ORDER_TYPE_BUY if direction == "BUY" else mt5.ORDER_TYPE_SELL
         
         # Determine correct filling mode
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self.broker.symbol_info(symbol)
         if symbol_info is None:
             print(f"[Exec] Failed to get symbol info for {symbol}")
             return None
@@ -24,7 +43,7 @@ class TradeExecutor:
         else:
             filling_mode = mt5.ORDER_FILLING_RETURN
             
-        request = {
+        return {
             "action": mt5.TRADE_ACTION_DEAL,
             "symbol": symbol,
             "volume": float(lots),
@@ -33,23 +52,80 @@ class TradeExecutor:
             "sl": float(sl),
             "tp": float(tp),
             "deviation": 20,
-            "magic": 123456,
+            "magic": config.MAGIC_NUMBER,
             "comment": f"{strategy_name[:10]} ({confidence:.2f})",
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": filling_mode,
         }
-        
-        # Retry logic
-        for i in range(3):
+
+    def validate(self, request):
+        """
+        Dry-run the request with order_check (volume, stops, margin, market open).
+        Returns: (ok, reason)
+        """
+        check = mt5.order_check(request)
+        if check is None:
+            return False, f"order_check failed: {mt5.last_error()}"
+        # order_check reports success as retcode 0
+        if check.retcode != 0:
+            return False, f"{check.retcode} {check.comment}"
+        return True, check.comment
+
+    def send(self, request, trace=None):
+        """
+        Send with retries on requote / price change. Each retry waits a jittered,
+        exponentially growing delay and reprices from a fresh quote. This blocks the
+        calling thread, so the OrderPipeline runs it on a worker.
+        trace: optional OrderTrace; gets the send/fill stamps, prices and retry count.
+        """
+        symbol = request["symbol"]
+        is_buy = request["type"] == mt5.ORDER_TYPE_BUY
+        if trace is not None:
+            info = self.broker.symbol_info(symbol)
+            trace.point = info.point if info is not None else None
+            trace.requested_price = request["price"]
+            trace.mark('sent')
+        result = None
+        for attempt in range(self.max_retries):
+            if trace is not None:
+                trace.retries = attempt
             result = mt5.order_send(request)
+            if result is None:
+                print(f"[Exec] order_send failed for {symbol}: {mt5.last_error()}")
+                return None
             if result.retcode == mt5.TRADE_RETCODE_DONE:
-                print(f"[Exec] {direction} {symbol} | Lots: {lots} | Price: {price}")
+                if trace is not None:
+                    trace.mark('filled')
+                    trace.filled_price = result.price
+                print(f"[Exec] {'BUY' if is_buy else 'SELL'} {symbol} | Lots: {request['volume']} | Price: {result.price}")
+                # Margin and equity changed with the fill
+                self.broker.invalidate_account()
                 return result
-            elif result.retcode == mt5.TRADE_RETCODE_REQUOTE:
-                time.sleep(0.5)
-                continue
-            else:
+            if result.retcode not in RETRYABLE_RETCODES:
                 print(f"[Exec] FAILED to execute: {result.comment}")
                 return result
-                
-        return None
+            if attempt + 1 == self.max_retries:
+                break
+
+            # Full jitter keeps concurrent retries from hitting the server in lockstep
+            time.sleep(random.uniform(0, self.backoff_base * 2 ** attempt))
+            # Our price is stale: reprice from a fresh quote
+            tick = self.broker.symbol_info_tick(symbol, max_age_ms=0)
+            if tick is not None:
+                request["price"] = tick.ask if is_buy else tick.bid
+
+        print(f"[Exec] Gave up on {symbol} after {self.max_retries} attempts ({result.comment})")
+        return result
+
+    def execute_trade(self, symbol, direction, lots, sl, tp, strategy_name, confidence):
+        """
+        Execute trade on MT5 (synchronously; see OrderPipeline for the concurrent path)
+        """
+        request = self.build_request(symbol, direction, lots, sl, tp, strategy_name, confidence)
+        if request is None:
+            return None
+        ok, reason = self.validate(request)
+        if not ok:
+            print(f"[Exec] {symbol} rejected by order_check: {reason}")
+            return None
+        return self.send(request)
@@ -0,0 +1,175 @@
+"""
+Technical indicators as a dependency graph.
+
+Each indicator is registered with the columns it produces and the columns it
+reads (bar fields or other indicators). add_features() resolves what a set of
+requested columns needs and computes only that, dependencies first:
+    volatility_20 <- returns <- close
+    z_score <- mean_100, std_100 <- close
+Strategies declare their inputs (BaseStrategy.features), so the data handler
+computes the union of what the enabled strategies read, and an indicator
+nobody uses (ema_100) costs nothing. Leading rows are left as NaN; callers
+decide whether to drop them (get_data skips WARMUP_BARS).
+"""
+import numpy as np
+import pandas as pd
+
+# Fields of a copy_rates_* bar, always present
+BASE_COLUMNS = ('open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume')
+# Leading bars before the longest indicator (EMA-200) has a value. Frames are cut
+# here whatever subset was computed, so each strategy sees the same window
+# regardless of which other strategies are enabled.
+WARMUP_BARS = 199
+
+ta = None  # pandas_ta, imported on first use (slow; TradingBot warms it at startup)
+
+
+class Feature:
+    """One node of the graph: compute(*input Series) -> Series, or a tuple with one Series per output"""
+    __slots__ = ('outputs', 'inputs', 'compute')
+
+    def __init__(self, outputs, inputs, compute):
+        self.outputs = outputs
+        self.inputs = inputs
+        self.compute = compute
+
+
+GRAPH = {}  # column -> Feature producing it
+
+
+def feature(*outputs, inputs=('close',)):
+    """Register the decorated function as the producer of `outputs`"""
+    def register(compute):
+        node = Feature(outputs, inputs, compute)
+        for name in outputs:
+            GRAPH[name] = node
+        return compute
+    return register
+
+
+def plan(names):
+    """Features needed to produce `names`, dependencies first. Raises KeyError on unknown columns."""
+    order = []
+    visited = set()
+
+    def visit(name):
+        if name in BASE_COLUMNS:
+            return
+        node = GRAPH.get(name)
+        if node is None:
+            raise KeyError(f"Unknown feature: {name}")
+        if node in visited:
+            return
+        visited.add(node)
+        for dependency in node.inputs:
+            visit(dependency)
+        order.append(node)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def add_features(df: pd.DataFrame, names=None) -> pd.DataFrame:
+    """
+    Add the requested indicators (default: all registered) and whatever they
+    depend on, in place. Columns already present are not recomputed.
+    Returns: df
+    """
+    global ta
+    if ta is None:
+        import pandas_ta as ta
+    for node in plan(GRAPH if names is None else names):
+        if all(name in df for name in node.outputs):
+            continue
+        values = node.compute(*(df[name] for name in node.inputs))
+        if len(node.outputs) == 1:
+            values = (values,)
+        for name, column in zip(node.outputs, values):
+            df[name] = column
+    return df
+
+
+# === Price Action ===
+
+@feature('returns')
+def _returns(close):
+    return close.pct_change()
+
+
+@feature('log_returns')
+def _log_returns(close):
+    return np.log(close / close.shift(1))
+
+
+# === Moving Averages ===
+
+for _length in (20, 50, 100, 200):
+    feature(f'ema_{_length}')(lambda close, length=_length: ta.ema(close, length=length))
+del _length
+
+
+# === Momentum ===
+
+@feature('rsi')
+def _rsi(close):
+    return ta.rsi(close, length=14)
+
+
+@feature('macd', 'macd_signal')
+def _macd(close):
+    macd = ta.macd(close)
+    return macd['MACD_12_26_9'], macd['MACDs_12_26_9']
+
+
+# === Volatility ===
+
+@feature('atr', inputs=('high', 'low', 'close'))
+def _atr(high, low, close):
+    return ta.atr(high, low, close, length=14)
+
+
+@feature('bb_upper', 'bb_lower', 'bb_mid')
+def _bbands(close):
+    bb = ta.bbands(close, length=20, std=2)
+    if bb is None:
+        missing = pd.Series(np.nan, index=close.index)
+        return missing, missing, missing
+    # Handle dynamic column names from pandas_ta
+    # It typically returns BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
+    # But depending on version/precision it might vary.
+    col_lower = [c for c in bb.columns if c.startswith('BBL')][0]
+    col_mid = [c for c in bb.columns if c.startswith('BBM')][0]
+    col_upper = [c for c in bb.columns if c.startswith('BBU')][0]
+    return bb[col_upper], bb[col_lower], bb[col_mid]
+
+
+# === Trend Strength ===
+
+@feature('adx', inputs=('high', 'low', 'close'))
+def _adx(high, low, close):
+    return ta.adx(high, low, close, length=14)['ADX_14']
+
+
+# === Advanced Statistical Features ===
+
+@feature('mean_100')
+def _mean_100(close):
+    return close.rolling(100).mean()
+
+
+@feature('std_100')
+def _std_100(close):
+    return close.rolling(100).std()
+
+
+# Rolling Z-Score (Mean Reversion)
+@feature('z_score', inputs=('close', 'mean_100', 'std_100'))
+def _z_score(close, mean_100, std_100):
+    return (close - mean_100) / std_100
+
+
+# Volatility Regime
+@feature('volatility_20', inputs=('returns',))
+def _volatility_20(returns):
+    return returns.rolling(20).std()
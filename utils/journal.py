@@ -0,0 +1,197 @@
+import queue
+import threading
+import time
+import config
+from utils.metrics import REGISTRY
+from utils import clock
+
+_STOP = object()
+# Record kinds that may be dropped when the database keeps failing; everything else is retried
+DROPPABLE = ('signals', 'metrics')
+
+
+class TradeJournal:
+    """
+    Write-behind queue in front of DatabaseHandler.
+
+    Callers enqueue trade, signal, metric, equity and execution records and return immediately.
+    A background thread drains the queue and writes each batch in a single
+    SQLite transaction.
+
+    The queue is bounded. Trades block until there is room because they must
+    never be lost. Signals and metrics wait up to JOURNAL_PUT_TIMEOUT and are
+    then dropped and counted, so a stalled disk cannot stall the trading loop.
+    A batch that still fails after three attempts loses only its signals and
+    metrics; the other records are kept and written ahead of the next batch,
+    and flush() reports False until they are in.
+
+    A cycle queues its records in a burst. The writer waits up to `linger`
+    after the first one so the burst goes out as one batch rather than as
+    many small ones competing with the loop for the GIL. flush() and close()
+    cut the wait short.
+    """
+    def __init__(self, db, max_pending=config.JOURNAL_MAX_PENDING,
+                 batch_size=config.JOURNAL_BATCH_SIZE,
+                 flush_interval=config.JOURNAL_FLUSH_INTERVAL,
+                 put_timeout=config.JOURNAL_PUT_TIMEOUT, linger=config.JOURNAL_LINGER,
+                 flush_timeout=config.JOURNAL_FLUSH_TIMEOUT):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.linger = linger
+        self.flush_timeout = flush_timeout
+        self._wake = threading.Event()
+        self._written = threading.Condition()  # Notified after every successful batch
+        self.dropped = 0
+        self.written = 0
+        self.failed_batches = 0
+        self._retry = []  # Records of failed batches, written ahead of the next one
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    # === Producers ===
+
+    def log_trade(self, trade_data):
+        """Queue a trade insert/update. Blocks rather than drop when the queue is full."""
+        self._put(('trades', trade_data), block=True)
+
+    def log_signal(self, symbol, strategy, signal, confidence, weight, timestamp=None):
+        """Queue a single strategy vote"""
+        self._put(('signals', {
+            'time': timestamp or clock.now(),
+            'symbol': symbol,
+            'strategy': strategy,
+            'signal': signal,
+            'confidence': float(confidence),
+            'weight': float(weight)
+        }))
+
+    def log_metric(self, name, value, symbol=None, timestamp=None):
+        """Queue a numeric sample"""
+        self._put(('metrics', {
+            'time': timestamp or clock.now(),
+            'name': name,
+            'value': float(value),
+            'symbol': symbol
+        }))
+
+    def log_equity(self, timestamp, equity):
+        """Queue one point of the equity curve (epoch seconds, account equity)"""
+        self._put(('equity', (int(timestamp), float(equity))))
+
+    def log_execution(self, record):
+        """Queue the telemetry of one order (see ExecutionTelemetry.finish)"""
+        self._put(('executions', record))
+
+    def _put(self, record, block=False):
+        if self._closed:
+            raise RuntimeError("TradeJournal is closed")
+        if block:
+            self._queue.put(record)
+            return
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            REGISTRY.inc('journal_dropped_total')
+            if self.dropped % 1000 == 1:
+                print(f"[Journal] Queue full, dropped {self.dropped} records so far")
+
+    # === Lifecycle ===
+
+    def pending(self):
+        return self._queue.qsize() + len(self._retry)
+
+    def flush(self, timeout=None):
+        """
+        Block until every record queued so far has been written.
+        Returns False if records of a failed batch are still waiting for a retry
+        after `timeout` seconds (default flush_timeout): they are not in the database yet.
+        """
+        self._wake.set()
+        self._queue.join()
+        with self._written:
+            return self._written.wait_for(lambda: not self._retry,
+                                          self.flush_timeout if timeout is None else timeout)
+
+    def close(self, timeout=30.0):
+        """Stop accepting records, write everything still queued and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"[Journal] Writer did not finish within {timeout}s ({self.pending()} pending)")
+        else:
+            print(f"[Journal] Closed. Written: {self.written}, Dropped: {self.dropped}")
+
+    # === Writer thread ===
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._retry:
+                    self._write([])
+                continue
+            if self.linger and first is not _STOP:
+                self._wake.wait(self.linger)
+                self._wake.clear()
+
+            batch = [first]
+            # Drain whatever else is already waiting, up to the batch size
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(record is _STOP for record in batch)
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+        if self._retry:
+            print(f"[Journal] Stopped with {len(self._retry)} unwritten records")
+
+    def _write(self, batch):
+        # Group by record kind; keys match DatabaseHandler.write_batch arguments
+        records = self._retry + [record for record in batch if record is not _STOP]
+        groups = {}
+        for kind, data in records:
+            groups.setdefault(kind, []).append(data)
+
+        if not groups:
+            return
+
+        count = len(records)
+        for attempt in range(3):
+            try:
+                with REGISTRY.timer('stage_seconds', stage='db'):
+                    self.db.write_batch(**groups)
+                self.written += count
+                for kind, rows in groups.items():
+                    REGISTRY.inc('journal_records_total', len(rows), kind=kind)
+                with self._written:
+                    self._retry = []
+                    self._written.notify_all()
+                return
+            except Exception as e:
+                print(f"[Journal] Batch write failed (attempt {attempt + 1}): {e}")
+                time.sleep(0.1 * (attempt + 1))
+
+        self.failed_batches += 1
+        retry = [(kind, data) for kind, data in records if kind not in DROPPABLE]
+        with self._written:
+            self._retry = retry
+        dropped = count - len(retry)
+        self.dropped += dropped
+        REGISTRY.inc('journal_dropped_total', dropped)
+        print(f"[Journal] Gave up on batch: dropped {dropped} signals/metrics, "
+              f"keeping {len(retry)} records for the next attempt")
@@ -0,0 +1,280 @@
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+# Histogram bucket upper bounds in seconds: 100us .. 60s, roughly x2.5 apart
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram: observe() is a bisect and two additions"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms keyed by (name, labels).
+
+    Series are created on first use, so instrumented code needs no setup:
+        REGISTRY.inc('orders_total', status='FILLED')
+        with REGISTRY.timer('stage_seconds', stage='fetch'):
+            ...
+    render() produces the Prometheus text exposition format.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of the block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer()"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def histogram(self, name, **labels):
+        """Returns: (count, sum) of one histogram series, or (0, 0.0) if it was never observed"""
+        with self._lock:
+            histogram = self._histograms.get(self._key(name, labels))
+            return (histogram.count, histogram.sum) if histogram else (0, 0.0)
+
+    # === Export ===
+
+    @staticmethod
+    def _escape(value):
+        # Label value escaping of the text exposition format
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @staticmethod
+    def _labels(pairs, extra=()):
+        pairs = tuple(pairs) + tuple(extra)
+        if not pairs:
+            return ""
+        body = ",".join(f'{k}="{MetricsRegistry._escape(v)}"' for k, v in pairs)
+        return "{" + body + "}"
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(
+                ((key, (list(h.counts), h.sum, h.count, h.bounds)) for key, h in self._histograms.items()),
+                key=lambda item: item[0]
+            )
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name in declared:
+                return
+            declared.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            declare(name, "gauge")
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), (counts, total, count, bounds) in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{self._labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{self._labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by all instrumented modules
+REGISTRY = MetricsRegistry()
+REGISTRY.describe('cycle_seconds', "Wall time of one run_cycle")
+REGISTRY.describe('stage_seconds', "Wall time per trading-loop stage")
+REGISTRY.describe('strategy_seconds', "generate_signal time per strategy")
+REGISTRY.describe('orders_total', "Orders by outcome")
+REGISTRY.describe('reconcile_skipped_total', "Cycles whose deal sync was skipped because the journal still held unwritten trades")
+REGISTRY.describe('startup_seconds', "Wall time of each start-up component")
+REGISTRY.describe('feature_cache_total', "get_data calls served from memoized features (hit) or recomputed (miss)")
+REGISTRY.describe('signal_evaluations_total', "Strategy votes served from the per-bar signal cache (hit), computed (miss) or never cacheable (bypass)")
+REGISTRY.describe('signal_cache_skip_ratio', "Fraction of strategy evaluations skipped thanks to the signal cache")
+
+
+class MetricsExporter:
+    """
+    Publishes a registry in Prometheus text format.
+    - port: serve GET /metrics on host:port from a daemon thread (None = off)
+    - path: write() replaces this file atomically, for a node_exporter textfile collector (None = off)
+    """
+    def __init__(self, registry=REGISTRY, host=config.METRICS_HOST, port=config.METRICS_PORT,
+                 path=config.METRICS_FILE):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.path = path
+        self._server = None
+
+    def start(self):
+        if self.port is None or self._server is not None:
+            return
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"[Metrics] Could not listen on {self.host}:{self.port}: {e}")
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[Metrics] Serving on http://{self.host}:{self.port}/metrics")
+
+    def write(self):
+        if self.path is None:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.registry.render())
+        os.replace(tmp, self.path)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread (the trading loop by default).
+
+    A daemon thread reads the target's current stack every `interval` seconds
+    and counts it. Nothing is hooked into the profiled code, so overhead is a
+    small fixed cost per sample. dump() writes folded stacks
+    ("module:function;module:function count") for flamegraph.pl / speedscope.
+    """
+    def __init__(self, interval=config.PROFILER_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def top(self, n=10):
+        """Functions with the most samples at the top of the stack: [(function, share)]"""
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(name, count / total) for name, count in leaves.most_common(n)]
+
+    def dump(self, path=config.PROFILER_OUTPUT):
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
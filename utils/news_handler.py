@@ -1,28 +1,63 @@
-from .news_feed import NewsHarvester
-from .sentiment_engine import SentimentEngine
-from .llm_analyzer import LLMMarketAnalyzer
+import importlib
+import threading
+import time
 from datetime import datetime
 import pandas as pd
+from .metrics import REGISTRY
+
+# (attribute, module, class), built in order. The modules pull in cloudscraper,
+# transformers/torch and langchain, so they are only imported by the loader.
+COMPONENTS = (
+    ('harvester', '.news_feed', 'NewsHarvester'),
+    ('brain', '.sentiment_engine', 'SentimentEngine'),
+    ('llm_brain', '.llm_analyzer', 'LLMMarketAnalyzer'),
+)
 
 class NewsHandler:
-    def __init__(self):
+    """
+    News sentiment for the fundamental strategy.
+
+    The NLP stack (feed scraper, FinBERT, LLM chain) takes seconds to import
+    and load, so it is built on a background thread. Until it is ready,
+    get_market_sentiment() answers neutral and the bot trades on the other
+    strategies. warm_up=False builds it synchronously instead.
+    """
+    def __init__(self, warm_up=True):
         print("[News] Initializing News Filter...")
+        self.active = False
+        self.ready = threading.Event()
+        self.load_times = {}
+        if warm_up:
+            threading.Thread(target=self._load, name="news-warmup", daemon=True).start()
+        else:
+            self._load()
+
+    def _load(self):
+        start = time.perf_counter()
         try:
-            self.harvester = NewsHarvester()
-            self.brain = SentimentEngine()
-            self.llm_brain = LLMMarketAnalyzer()
+            for attr, module, cls in COMPONENTS:
+                t0 = time.perf_counter()
+                component = getattr(importlib.import_module(module, __package__), cls)()
+                setattr(self, attr, component)
+                self.load_times[attr] = time.perf_counter() - t0
             self.active = True
         except Exception as e:
             print(f"[News] Failed to init news system: {e}")
-            self.active = False
+        finally:
+            total = time.perf_counter() - start
+            REGISTRY.set('startup_seconds', total, component='news')
+            parts = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.load_times.items())
+            print(f"[News] {'Ready' if self.active else 'Disabled'} after {total:.2f}s ({parts})")
+            self.ready.set()
 
+    @REGISTRY.timed('stage_seconds', stage='news')
     def get_market_sentiment(self, symbol="EURUSD"):
         """
         Fetches latest news and returns a sentiment score (-1.0 to 1.0)
         and a 'safe to trade' flag.
         """
         if not self.active:
-            return 0.0, True
+            return 0.0, True  # Still warming up (or disabled): no bias
 
         try:
             news_df = self.harvester.fetch_latest_news(limit=5)
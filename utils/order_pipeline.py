@@ -0,0 +1,94 @@
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+import MetaTrader5 as mt5
+import config
+from utils import clock
+
+# status is FILLED or FAILED; context is whatever the caller passed to submit()
+OrderEvent = namedtuple('OrderEvent', ['symbol', 'direction', 'lots', 'status', 'result', 'context', 'time'])
+
+FILLED = 'FILLED'
+FAILED = 'FAILED'
+
+
+class OrderPipeline:
+    """
+    Concurrent order submission.
+
+    submit() builds the request and validates it with order_check on the
+    caller's thread, so a bad order is rejected right away. Valid orders go
+    to a bounded worker pool. There, requotes are retried with jittered
+    backoff without holding up the decision loop. Only one order per symbol
+    can be in flight.
+
+    Outcomes come back as OrderEvents. The owner collects them with drain()
+    and applies fills to its books on its own thread.
+    """
+    def __init__(self, executor, workers=config.ORDER_WORKERS):
+        self.executor = executor
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='order')
+        self._events = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def submit(self, symbol, direction, lots, sl, tp, strategy_name, confidence, context=None, trace=None):
+        """
+        Validate and queue an order. trace (an OrderTrace) is handed to the executor.
+        Returns: (accepted, reason)
+        """
+        with self._lock:
+            if symbol in self._in_flight:
+                return False, "order already in flight"
+
+        request = self.executor.build_request(symbol, direction, lots, sl, tp, strategy_name, confidence)
+        if request is None:
+            return False, "could not price order"
+        ok, reason = self.executor.validate(request)
+        if not ok:
+            return False, reason
+
+        with self._lock:
+            self._in_flight[symbol] = self._pool.submit(
+                self._send, symbol, direction, lots, request, context, trace
+            )
+        return True, reason
+
+    def _send(self, symbol, direction, lots, request, context, trace):
+        try:
+            result = self.executor.send(request, trace)
+        except Exception as e:
+            print(f"[Orders] {symbol} send raised: {e}")
+            result = None
+        status = FILLED if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE else FAILED
+        # Publish before clearing the in-flight slot, so drain() never misses an event
+        self._events.put(OrderEvent(symbol, direction, lots, status, result, context, clock.now()))
+        with self._lock:
+            self._in_flight.pop(symbol, None)
+
+    def is_pending(self, symbol):
+        with self._lock:
+            return symbol in self._in_flight
+
+    def drain(self, timeout=0):
+        """
+        Wait up to `timeout` seconds for in-flight orders, then return all finished events.
+        Orders still running after that show up in a later drain.
+        """
+        if timeout:
+            with self._lock:
+                futures = list(self._in_flight.values())
+            if futures:
+                wait(futures, timeout=timeout)
+
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        """Let in-flight orders finish; call drain() afterwards for their events"""
+        self._pool.shutdown(wait=True)
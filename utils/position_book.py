@@ -0,0 +1,156 @@
+import MetaTrader5 as mt5
+import itertools
+import threading
+from collections import namedtuple, defaultdict
+
+# Same attribute names as MT5's TradePosition, so either can be passed around
+BookPosition = namedtuple('BookPosition', ['ticket', 'symbol', 'type', 'volume', 'magic', 'price_open'])
+
+POSITION_BUY = 0
+POSITION_SELL = 1
+
+
+def currency_legs(symbol):
+    """'EURUSD' -> ('EUR', 'USD'). Broker suffixes such as 'EURUSD.m' are ignored."""
+    return symbol[:3], symbol[3:6]
+
+
+class PositionBook:
+    """
+    Open positions indexed for O(1) lookups within a cycle.
+
+    refresh() makes one positions_get() call at the start of a cycle. After
+    that, add_fill() records our own fills so later symbols in the same cycle
+    see them without another round trip to the terminal.
+
+    Orders still in flight are held as pending positions under negative
+    placeholder tickets, so risk checks count them before they fill.
+    refresh() leaves them alone; resolve_pending() swaps in the real ticket
+    (or drops the placeholder if the order failed).
+
+    Indexes:
+    - by symbol
+    - by direction
+    - by magic number
+    - net lots per currency leg: +volume on the base currency and -volume on
+      the quote currency for a long position, reversed for a short
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._placeholders = itertools.count(-1, -1)
+        self._clear()
+
+    def subscribe(self, listener):
+        """Register an object with add(position) / remove(position) to mirror the book"""
+        self._listeners.append(listener)
+        for pos in self.all():
+            listener.add(pos)
+
+    def _clear(self):
+        self._positions = {}
+        self._by_symbol = defaultdict(dict)
+        self._by_direction = {POSITION_BUY: {}, POSITION_SELL: {}}
+        self._by_magic = defaultdict(dict)
+        self._net_lots = defaultdict(float)
+
+    def refresh(self):
+        """
+        Rebuild from the terminal. Returns False (keeping the old book) if the call fails.
+        A position whose volume changed (partial close) is removed and re-added, so
+        net lots and listeners follow the new size.
+        """
+        positions = mt5.positions_get()
+        if positions is None:
+            print(f"[Positions] positions_get failed: {mt5.last_error()}")
+            return False
+        with self._lock:
+            # Apply the difference so listeners see individual opens and closes
+            current = {pos.ticket: pos for pos in positions}
+            closed = [pos for ticket, pos in self._positions.items()
+                      if ticket not in current and ticket > 0]
+            for pos in closed:
+                self._remove(pos.ticket)
+            for pos in positions:
+                known = self._positions.get(pos.ticket)
+                if known is not None and known.volume != pos.volume:
+                    self._remove(pos.ticket)  # Partial close: re-add at the new size
+                self._add(pos)
+        return True
+
+    def add_fill(self, ticket, symbol, direction, volume, magic, price):
+        """Record a position we just opened"""
+        position = BookPosition(ticket, symbol, POSITION_BUY if direction == "BUY" else POSITION_SELL,
+                                volume, magic, price)
+        with self._lock:
+            self._add(position)
+
+    def add_pending(self, symbol, direction, volume, magic, price):
+        """Hold an order that is still being sent. Returns its placeholder ticket."""
+        ticket = next(self._placeholders)
+        self.add_fill(ticket, symbol, direction, volume, magic, price)
+        return ticket
+
+    def resolve_pending(self, placeholder, ticket=None, price=None):
+        """Replace a pending order with its filled position, or just drop it if ticket is None"""
+        with self._lock:
+            pending = self._positions.get(placeholder)
+            self._remove(placeholder)
+            if pending is not None and ticket is not None:
+                self._add(pending._replace(ticket=ticket, price_open=price or pending.price_open))
+
+    def remove(self, ticket):
+        with self._lock:
+            self._remove(ticket)
+
+    def _remove(self, ticket):
+        pos = self._positions.pop(ticket, None)
+        if pos is None:
+            return
+        self._by_symbol[pos.symbol].pop(ticket, None)
+        self._by_direction[pos.type].pop(ticket, None)
+        self._by_magic[pos.magic].pop(ticket, None)
+        self._apply_legs(pos, -1)
+        for listener in self._listeners:
+            listener.remove(pos)
+
+    def _add(self, pos):
+        if pos.ticket in self._positions:
+            return
+        self._positions[pos.ticket] = pos
+        self._by_symbol[pos.symbol][pos.ticket] = pos
+        self._by_direction[pos.type][pos.ticket] = pos
+        self._by_magic[pos.magic][pos.ticket] = pos
+        self._apply_legs(pos, 1)
+        for listener in self._listeners:
+            listener.add(pos)
+
+    def _apply_legs(self, pos, sign):
+        base, quote = currency_legs(pos.symbol)
+        lots = pos.volume if pos.type == POSITION_BUY else -pos.volume
+        self._net_lots[base] += sign * lots
+        self._net_lots[quote] -= sign * lots
+
+    # === Lookups ===
+
+    def has_position(self, symbol):
+        return bool(self._by_symbol.get(symbol))
+
+    def all(self):
+        return tuple(self._positions.values())
+
+    def for_symbol(self, symbol):
+        return tuple(self._by_symbol.get(symbol, {}).values())
+
+    def for_direction(self, direction):
+        return tuple(self._by_direction[POSITION_BUY if direction == "BUY" else POSITION_SELL].values())
+
+    def for_magic(self, magic):
+        return tuple(self._by_magic.get(magic, {}).values())
+
+    def net_lots(self, currency):
+        """Signed lot exposure to one currency across all open positions"""
+        return self._net_lots.get(currency, 0.0)
+
+    def __len__(self):
+        return len(self._positions)
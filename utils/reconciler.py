@@ -0,0 +1,116 @@
+import MetaTrader5 as mt5
+from datetime import datetime, timedelta, timezone
+import config
+from utils import clock
+
+# Deal entry types (mt5.DEAL_ENTRY_*)
+ENTRY_IN = 0
+ENTRY_OUT = 1
+ENTRY_INOUT = 2
+ENTRY_OUT_BY = 3
+
+
+# Broker servers run at a whole or half-hour offset from the bot's clock, within +-14 h
+OFFSET_STEP = 1800
+MAX_OFFSET = 14 * 3600
+OFFSET_TOLERANCE = 120  # Seconds a fresh tick may deviate from a whole step
+
+
+def _server_time(epoch):
+    """Trade-server epoch seconds as a naive datetime on the server's wall clock"""
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+
+
+class DealReconciler:
+    """
+    Pulls new deals from the MT5 history and writes exits into the trades table.
+
+    A (time, ticket) cursor in sync_state marks the last deal already applied.
+    Each sync re-reads only a fixed overlap window behind that cursor and skips
+    anything at or below the cursor ticket. The cost per cycle therefore depends
+    on recent activity, not on how many deals the account has accumulated.
+    """
+    CURSOR_TIME = 'deals.last_time'
+    CURSOR_TICKET = 'deals.last_ticket'
+    SERVER_OFFSET = 'server.offset_seconds'
+
+    def __init__(self, db, magic=config.MAGIC_NUMBER):
+        self.db = db
+        self.magic = magic
+        self.last_time = int(db.get_sync_state(self.CURSOR_TIME, 0))
+        self.last_ticket = int(db.get_sync_state(self.CURSOR_TICKET, 0))
+        self.server_offset = int(db.get_sync_state(self.SERVER_OFFSET, 0))
+
+    def _update_server_offset(self):
+        """
+        Seconds trade-server time runs ahead of clock.now(), measured from a quote.
+        Only a fresh tick lands within OFFSET_TOLERANCE of a whole half hour; a stale
+        one (market closed) is ignored and the last stored offset is kept.
+        """
+        now = clock.now()
+        for symbol in config.SYMBOLS:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                continue
+            raw = (_server_time(tick.time) - now).total_seconds()
+            offset = round(raw / OFFSET_STEP) * OFFSET_STEP
+            if abs(raw - offset) <= OFFSET_TOLERANCE and abs(offset) <= MAX_OFFSET:
+                self.server_offset = int(offset)
+                break
+        return self.server_offset
+
+    def _deal_time(self, deal):
+        """Deal time on the bot's clock (naive, like entry_time and daily risk), not server time"""
+        return _server_time(deal.time) - timedelta(seconds=self.server_offset)
+
+    def sync(self):
+        """Apply all deals newer than the cursor. Returns the number of trades closed."""
+        if self.last_time:
+            date_from = datetime.fromtimestamp(self.last_time - config.RECONCILE_OVERLAP_SECONDS)
+        else:
+            date_from = clock.now() - timedelta(days=config.RECONCILE_INITIAL_DAYS)
+        # Server time can run ahead of local time; look a day past "now"
+        date_to = clock.now() + timedelta(days=1)
+
+        deals = mt5.history_deals_get(date_from, date_to)
+        if deals is None:
+            print(f"[Sync] history_deals_get failed: {mt5.last_error()}")
+            return 0
+
+        new_deals = [d for d in deals if d.ticket > self.last_ticket]
+        if not new_deals:
+            return 0
+        new_deals.sort(key=lambda d: d.ticket)
+        self._update_server_offset()
+
+        entries = []
+        exits = []
+        for deal in new_deals:
+            if deal.entry == ENTRY_IN:
+                if deal.magic != self.magic:
+                    continue
+                entries.append((deal.position_id, deal.ticket, deal.commission))
+            elif deal.entry in (ENTRY_OUT, ENTRY_OUT_BY, ENTRY_INOUT):
+                # SL/TP exits don't always carry our magic; matching on position_id is enough
+                exits.append({
+                    'position_id': deal.position_id,
+                    'exit_time': self._deal_time(deal),
+                    'exit_price': deal.price,
+                    'volume': deal.volume,
+                    'profit': deal.profit,
+                    'commission': deal.commission,
+                    'swap': deal.swap
+                })
+
+        last = new_deals[-1]
+        closed = self.db.apply_deal_sync(entries, exits, {
+            self.CURSOR_TIME: last.time,
+            self.CURSOR_TICKET: last.ticket,
+            self.SERVER_OFFSET: self.server_offset
+        })
+        self.last_time = last.time
+        self.last_ticket = last.ticket
+
+        if closed:
+            print(f"[Sync] Reconciled {len(new_deals)} deals, {closed} trades closed")
+        return closed
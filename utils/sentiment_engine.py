@@ -25,6 +25,19 @@ class SentimentEngine:
             print(f"Error analyzing text: {e}")
             return None
 
+    def analyze_batch(self, texts, batch_size=16):
+        """
+        Same as analyze() for a list of headlines, run through the model in batches.
+        Output: list of dicts (None where a headline could not be scored)
+        """
+        if not texts:
+            return []
+        try:
+            return self.nlp(list(texts), batch_size=batch_size)
+        except Exception as e:
+            print(f"Error analyzing batch: {e}")
+            return [self.analyze(text) for text in texts]
+
 # --- Unit Test Area ---
 if __name__ == "__main__":
     # This block only runs if you execute this file directly, useful for testing.
@@ -0,0 +1,196 @@
+import threading
+import time
+import numpy as np
+import config
+from utils import clock
+
+# Stages of one order, in the order they are reached
+STAGES = ('data_ready', 'votes', 'risk', 'sent', 'filled')
+
+# One row per finished order. Latencies are in ms between consecutive stages;
+# NaN where the order never reached the stage.
+RECORD_DTYPE = np.dtype([
+    ('symbol', np.int16),
+    ('filled', np.bool_),
+    ('retries', np.int8),
+    ('bar_age_ms', np.float32),
+    ('votes_ms', np.float32),
+    ('risk_ms', np.float32),
+    ('send_ms', np.float32),
+    ('fill_ms', np.float32),
+    ('total_ms', np.float32),
+    ('slippage_points', np.float32),
+    ('reference_slippage_points', np.float32),
+])
+
+PERCENTILES = (50, 95, 99)
+
+
+class OrderTrace:
+    """
+    Stage timestamps (time.monotonic_ns) and prices for one order decision.
+
+    bar_age_ms is how long the last closed bar had been closed when the data
+    was ready. It is measured on the broker's clock (latest tick time minus
+    the open of the forming bar), so local clock skew doesn't matter.
+    """
+    __slots__ = ('symbol', 'direction', 'stamps', 'bar_age_ms', 'reference_price',
+                 'requested_price', 'filled_price', 'retries', 'point')
+
+    def __init__(self, symbol, bar_age_ms=None):
+        self.symbol = symbol
+        self.direction = None
+        self.stamps = dict.fromkeys(STAGES)
+        self.stamps['data_ready'] = time.monotonic_ns()
+        self.bar_age_ms = bar_age_ms
+        self.reference_price = None
+        self.requested_price = None
+        self.filled_price = None
+        self.retries = 0
+        self.point = None
+
+    def mark(self, stage):
+        self.stamps[stage] = time.monotonic_ns()
+
+    def elapsed_ms(self, start, end):
+        a, b = self.stamps[start], self.stamps[end]
+        if a is None or b is None:
+            return float('nan')
+        return (b - a) / 1e6
+
+    def _adverse_points(self, price):
+        if self.filled_price is None or price is None or not self.point:
+            return float('nan')
+        move = self.filled_price - price
+        if self.direction == "SELL":
+            move = -move
+        return move / self.point
+
+    def slippage_points(self):
+        """Adverse distance of the fill from the first requested price (positive = worse)"""
+        return self._adverse_points(self.requested_price)
+
+    def reference_slippage_points(self):
+        """
+        Adverse distance of the fill from the price the decision was made on
+        (the close SL/TP were sized from), spread and quote drift included
+        """
+        return self._adverse_points(self.reference_price)
+
+
+class ExecutionTelemetry:
+    """
+    Latency and slippage of recent orders.
+
+    The bot opens a trace once a symbol's data is ready and marks each stage.
+    The executor marks the send and the fill. When the order event arrives,
+    finish() writes the trace as one row of a fixed-size numpy ring buffer
+    and queues it to the journal. percentiles() reads the buffer, so it
+    doesn't cost a database query.
+    """
+    def __init__(self, journal=None, capacity=config.TELEMETRY_CAPACITY):
+        self.journal = journal
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._buffer = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self._size = 0
+        self._next = 0
+        self._symbols = {}
+        self._names = []
+
+    def start(self, symbol, bar_time=None, market_time_ms=None):
+        """
+        New trace for a symbol whose data just became ready.
+        bar_time: open of the forming bar (epoch s); market_time_ms: latest tick time (epoch ms).
+        """
+        bar_age_ms = None
+        if bar_time is not None and market_time_ms:
+            bar_age_ms = market_time_ms - bar_time * 1000.0
+        return OrderTrace(symbol, bar_age_ms)
+
+    def _symbol_index(self, symbol):
+        index = self._symbols.get(symbol)
+        if index is None:
+            index = self._symbols[symbol] = len(self._names)
+            self._names.append(symbol)
+        return index
+
+    def finish(self, trace, filled):
+        """Record a trace whose order has completed (filled or not)"""
+        values = {
+            'bar_age_ms': np.nan if trace.bar_age_ms is None else trace.bar_age_ms,
+            'votes_ms': trace.elapsed_ms('data_ready', 'votes'),
+            'risk_ms': trace.elapsed_ms('votes', 'risk'),
+            'send_ms': trace.elapsed_ms('risk', 'sent'),
+            'fill_ms': trace.elapsed_ms('sent', 'filled'),
+            'total_ms': trace.elapsed_ms('data_ready', 'filled'),
+            'slippage_points': trace.slippage_points(),
+            'reference_slippage_points': trace.reference_slippage_points(),
+        }
+        with self._lock:
+            row = self._buffer[self._next]
+            row['symbol'] = self._symbol_index(trace.symbol)
+            row['filled'] = filled
+            row['retries'] = min(trace.retries, 127)
+            for field, value in values.items():
+                row[field] = value
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+        if self.journal is not None:
+            values.update({
+                'time': clock.now(),
+                'symbol': trace.symbol,
+                'direction': trace.direction,
+                'status': 'FILLED' if filled else 'FAILED',
+                'retries': trace.retries,
+                'reference_price': trace.reference_price,
+                'requested_price': trace.requested_price,
+                'filled_price': trace.filled_price,
+            })
+            self.journal.log_execution(values)
+
+    def records(self, symbol=None):
+        """Copy of the buffered rows, oldest first, optionally for one symbol"""
+        with self._lock:
+            if self._size < self.capacity:
+                rows = self._buffer[:self._size].copy()
+            else:
+                rows = np.roll(self._buffer, -self._next)
+            index = self._symbols.get(symbol)
+        if symbol is not None:
+            rows = rows[rows['symbol'] == index] if index is not None else rows[:0]
+        return rows
+
+    def percentiles(self, symbol=None, fields=('total_ms', 'fill_ms', 'slippage_points',
+                                                  'reference_slippage_points')):
+        """
+        Returns: Dict {field: (p50, p95, p99)} over filled orders, or {} with no fills.
+        """
+        rows = self.records(symbol)
+        rows = rows[rows['filled']]
+        if len(rows) == 0:
+            return {}
+        result = {}
+        for field in fields:
+            values = rows[field][~np.isnan(rows[field])]
+            if len(values):
+                result[field] = tuple(float(v) for v in np.percentile(values, PERCENTILES))
+        return result
+
+    def summary(self):
+        """Returns: Dict {symbol: {'orders', 'fill_rate', 'retries', field: (p50, p95, p99)}}"""
+        rows = self.records()
+        result = {}
+        for index, symbol in enumerate(list(self._names)):
+            mine = rows[rows['symbol'] == index]
+            if len(mine) == 0:
+                continue
+            stats = {
+                'orders': len(mine),
+                'fill_rate': float(mine['filled'].mean()),
+                'retries': float(mine['retries'].mean()),
+            }
+            stats.update(self.percentiles(symbol))
+            result[symbol] = stats
+        return result